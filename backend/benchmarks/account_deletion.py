@@ -0,0 +1,90 @@
+"""
+Benchmark account deletion for users with many rotated refresh tokens.
+
+For each token count, creates an account holding that many outstanding
+tokens (half of them blacklisted, as rotation leaves them) and times:
+
+- ``user.delete()``, the previous request path, through Django's collector;
+- deactivate_account(), what DELETE /api/auth/delete-account/ now does;
+- purge_deleted_accounts(), the background purge that removes the rows.
+
+Reports wall time, the longest single transaction (how long writers are
+locked out) and peak Python memory (tracemalloc).
+
+    python benchmarks/account_deletion.py --tokens 1000,10000,50000
+"""
+import argparse
+import tempfile
+import time
+import tracemalloc
+from datetime import timedelta
+from pathlib import Path
+
+from utils import setup_django
+
+
+def profile(func):
+    """Run ``func`` and return (result, seconds, peak traced MiB)"""
+    tracemalloc.start()
+    started = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak / 2 ** 20
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--tokens', default='1000,10000,50000', help='comma separated token counts per account')
+    parser.add_argument('--batch-size', type=int, default=1000)
+    args = parser.parse_args()
+
+    db_path = Path(tempfile.mkdtemp()) / 'account_deletion.db'
+    setup_django(db_path)
+
+    from django.contrib.auth import get_user_model
+    from django.utils import timezone
+    from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+    from users import deletion
+    User = get_user_model()
+
+    def make_account(name, tokens):
+        user = User.objects.create(email=f'{name}@example.com', username=name)
+        now = timezone.now()
+        created = OutstandingToken.objects.bulk_create([
+            OutstandingToken(user=user, jti=f'{name}-{i}', token='x' * 250, created_at=now,
+                             expires_at=now + timedelta(days=1))
+            for i in range(tokens)
+        ], batch_size=5000)
+        BlacklistedToken.objects.bulk_create([BlacklistedToken(token=t) for t in created[::2]], batch_size=5000)
+        return user
+
+    print(f'{"tokens":>7} {"case":<12} {"seconds":>8} {"longest tx":>11} {"peak MiB":>9}')
+    for count in map(int, args.tokens.split(',')):
+        user = make_account(f'collector{count}', count)
+        _, seconds, peak = profile(user.delete)
+        print(f'{count:>7} {"delete()":<12} {seconds:>8.3f} {seconds:>10.3f}s {peak:>9.1f}')
+
+        user = make_account(f'twophase{count}', count)
+        _, seconds, peak = profile(lambda: deletion.deactivate_account(user))
+        print(f'{count:>7} {"deactivate":<12} {seconds:>8.3f} {seconds:>10.3f}s {peak:>9.1f}')
+
+        longest = [0.0]
+        last = [time.perf_counter()]
+
+        def on_batch(metrics):
+            now = time.perf_counter()
+            longest[0] = max(longest[0], now - last[0])
+            last[0] = now
+
+        def purge():
+            last[0] = time.perf_counter()
+            return deletion.purge_deleted_accounts(batch_size=args.batch_size, pause=0, on_batch=on_batch)
+
+        _, seconds, peak = profile(purge)
+        print(f'{count:>7} {"purge":<12} {seconds:>8.3f} {longest[0]:>10.3f}s {peak:>9.1f}')
+
+
+if __name__ == '__main__':
+    main()
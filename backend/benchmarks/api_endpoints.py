@@ -0,0 +1,295 @@
+"""
+Benchmark the users API endpoints over HTTP.
+
+Seeds ``--users`` accounts into a throwaway SQLite database, starts a
+threaded WSGI server on a local port and drives register, login, token
+refresh, profile GET/PUT, change-password and delete-account with
+``--concurrency`` client threads; ``mixed`` interleaves profile reads,
+profile writes and token rotations, the load where SQLite writers and
+readers contend. For each endpoint it reports p50/p95/p99 latency,
+throughput, unexpected responses (such as 500s from "database is
+locked") and database queries per request (counted inside the server and
+returned in an X-Bench-Queries header). The server handles requests on a
+pool of ``--concurrency`` threads, as a threaded production worker would.
+
+Results can be saved as a JSON baseline and compared against a previous
+run, e.g. before and after a change:
+
+    python benchmarks/api_endpoints.py --output baseline.json
+    python benchmarks/api_endpoints.py --compare baseline.json
+
+The login throttle is switched off so the load is not rejected with 429;
+pass --throttle to keep it. --fast-hasher swaps PBKDF2 for MD5 (hashed
+inline rather than in the pool) to isolate framework overhead from
+password hashing cost. --sqlite tuned runs the server on the production
+SQLite mode (SQLITE_TUNED=1, users/sqlite/base.py) instead of the stock
+backend:
+
+    python benchmarks/api_endpoints.py --endpoints mixed --output stock.json
+    python benchmarks/api_endpoints.py --endpoints mixed --sqlite tuned --compare stock.json
+"""
+import argparse
+import http.client
+import json
+import os
+import platform
+import subprocess
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from itertools import chain
+from pathlib import Path
+
+from utils import BENCH_DIR, seed_users, setup_django, summarize
+
+PASSWORD = 'BenchPass123!'
+NEW_PASSWORD = 'BenchPass456!'
+ENDPOINTS = [
+    'register', 'login', 'token_refresh', 'profile_get', 'profile_put', 'change_password', 'delete_account', 'mixed',
+]
+
+
+def start_server(threads):
+    """Serve the project on an ephemeral local port with ``threads`` handler threads, counting queries per request"""
+    from django.core.handlers.wsgi import WSGIHandler
+    from django.core.servers.basehttp import WSGIRequestHandler, WSGIServer
+    from django.db import connection
+
+    application = WSGIHandler()
+
+    def app(environ, start_response):
+        queries = [0]
+
+        def count(execute, sql, params, many, context):
+            queries[0] += 1
+            return execute(sql, params, many, context)
+
+        def counted_start_response(status, headers, exc_info=None):
+            return start_response(status, [*headers, ('X-Bench-Queries', str(queries[0]))], exc_info)
+
+        with connection.execute_wrapper(count):
+            return application(environ, counted_start_response)
+
+    class QuietHandler(WSGIRequestHandler):
+        def log_message(self, *args):
+            pass
+
+    class PooledWSGIServer(WSGIServer):
+        """Reuses handler threads, so persistent database connections (CONN_MAX_AGE) outlive a request"""
+        pool = ThreadPoolExecutor(max_workers=threads)
+
+        def process_request(self, request, client_address):
+            self.pool.submit(self.handle_in_pool, request, client_address)
+
+        def handle_in_pool(self, request, client_address):
+            try:
+                self.finish_request(request, client_address)
+            except Exception:
+                self.handle_error(request, client_address)
+            finally:
+                self.shutdown_request(request)
+
+    server = PooledWSGIServer(('127.0.0.1', 0), QuietHandler, allow_reuse_address=False)
+    server.set_app(app)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+class Client:
+    """One HTTP/1.1 request per call against the benchmark server"""
+
+    def __init__(self, port):
+        self.port = port
+
+    def request(self, method, path, body=None, token=None):
+        headers = {'Content-Type': 'application/json'}
+        if token:
+            headers['Authorization'] = f'Bearer {token}'
+        conn = http.client.HTTPConnection('127.0.0.1', self.port, timeout=60)
+        try:
+            started = time.perf_counter()
+            conn.request(method, path, body=json.dumps(body) if body is not None else None, headers=headers)
+            response = conn.getresponse()
+            payload = response.read()
+            elapsed = (time.perf_counter() - started) * 1000
+            queries = int(response.getheader('X-Bench-Queries', '0'))
+            return response.status, payload, elapsed, queries
+        finally:
+            conn.close()
+
+
+def build_scenarios(users, requests_per_endpoint):
+    """
+    Return endpoint -> list of zero-argument request specs. Every spec is
+    independent, so specs can run concurrently in any order.
+    """
+    from rest_framework_simplejwt.tokens import RefreshToken
+    from django.urls import reverse
+
+    sample = users[:requests_per_endpoint]
+    tokens = {user.pk: RefreshToken.for_user(user) for user in users[:requests_per_endpoint * 3]}
+    # Disjoint users per mutating scenario, so concurrent requests never race on one account
+    put_users = users[:requests_per_endpoint]
+    password_users = users[requests_per_endpoint:2 * requests_per_endpoint]
+    delete_users = users[2 * requests_per_endpoint:3 * requests_per_endpoint]
+
+    def access(user):
+        return str(tokens[user.pk].access_token)
+
+    scenarios = {
+        'register': [
+            ('POST', reverse('register'), {
+                'email': f'new{i}@bench.example.com', 'password': PASSWORD, 'password2': PASSWORD
+            }, None, 201)
+            for i in range(requests_per_endpoint)
+        ],
+        'login': [
+            ('POST', reverse('login'), {'email': user.email, 'password': PASSWORD}, None, 200)
+            for user in sample
+        ],
+        'token_refresh': [
+            ('POST', reverse('token_refresh'), {'refresh': str(RefreshToken.for_user(user))}, None, 200)
+            for user in sample
+        ],
+        'profile_get': [('GET', reverse('profile'), None, access(user), 200) for user in sample],
+        'profile_put': [
+            ('PUT', reverse('profile'), {'first_name': f'Bench{i}', 'theme_mode': 'dark'}, access(user), 200)
+            for i, user in enumerate(put_users)
+        ],
+        'change_password': [
+            ('POST', reverse('change_password'), {
+                'old_password': PASSWORD, 'new_password': NEW_PASSWORD, 'new_password2': NEW_PASSWORD
+            }, access(user), 200)
+            for user in password_users
+        ],
+        'delete_account': [
+            ('DELETE', reverse('delete_account'), {'password': PASSWORD}, access(user), 200)
+            for user in delete_users
+        ],
+    }
+    # Reads, writes and token rotations arriving together; fresh refresh tokens, since rotation blacklists them
+    rotations = [
+        ('POST', reverse('token_refresh'), {'refresh': str(RefreshToken.for_user(user))}, None, 200)
+        for user in sample
+    ]
+    scenarios['mixed'] = list(chain.from_iterable(zip(scenarios['profile_get'], scenarios['profile_put'], rotations)))
+    return scenarios
+
+
+def run_endpoint(client, specs, concurrency):
+    """Fire ``specs`` with ``concurrency`` threads and return the endpoint's metrics"""
+    def call(spec):
+        method, path, body, token, expected = spec
+        status, _, elapsed, queries = client.request(method, path, body, token)
+        return status == expected, elapsed, queries
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(call, specs))
+    wall = time.perf_counter() - started
+
+    latencies = [elapsed for _, elapsed, _ in results]
+    return {
+        'requests': len(results),
+        'errors': sum(not ok for ok, _, _ in results),
+        'throughput': len(results) / wall,
+        'queries_per_request': sum(queries for _, _, queries in results) / len(results),
+        **summarize(latencies),
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=BENCH_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_report(results, baseline=None):
+    print(f'{"endpoint":<16} {"req":>5} {"err":>4} {"p50 ms":>8} {"p95 ms":>8} {"p99 ms":>8} {"req/s":>8} {"queries":>8}')
+    for endpoint, metrics in results.items():
+        line = (f'{endpoint:<16} {metrics["requests"]:>5} {metrics["errors"]:>4} {metrics["p50"]:>8.1f} '
+                f'{metrics["p95"]:>8.1f} {metrics["p99"]:>8.1f} {metrics["throughput"]:>8.1f} '
+                f'{metrics["queries_per_request"]:>8.1f}')
+        previous = (baseline or {}).get(endpoint)
+        if previous:
+            change = (metrics['p50'] - previous['p50']) / previous['p50'] * 100 if previous['p50'] else 0
+            line += (f'   p50 {change:+.0f}%, queries {metrics["queries_per_request"] - previous["queries_per_request"]:+.1f}')
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=10000, help='seeded accounts')
+    parser.add_argument('--requests', type=int, default=200, help='requests per endpoint')
+    parser.add_argument('--concurrency', type=int, default=8, help='client threads')
+    parser.add_argument('--endpoints', default=','.join(ENDPOINTS), help='comma separated subset of: ' + ', '.join(ENDPOINTS))
+    parser.add_argument('--throttle', action='store_true', help='keep the login throttle enabled')
+    parser.add_argument('--fast-hasher', action='store_true', help='hash passwords with MD5 instead of PBKDF2')
+    parser.add_argument('--sqlite', choices=['default', 'tuned'], default='default',
+                        help='stock sqlite3 backend or the production SQLite mode')
+    parser.add_argument('--output', help='write results as a JSON baseline')
+    parser.add_argument('--compare', help='JSON baseline to compare against')
+    args = parser.parse_args()
+
+    endpoints = args.endpoints.split(',')
+    unknown = set(endpoints) - set(ENDPOINTS)
+    if unknown:
+        parser.error(f'unknown endpoints: {", ".join(sorted(unknown))}')
+    if args.users < args.requests * 3:
+        parser.error('--users must be at least 3 x --requests (put, change-password and delete use disjoint users)')
+
+    overrides = {'DEBUG': False, 'ALLOWED_HOSTS': ['*']}
+    if not args.throttle:
+        overrides['LOGIN_THROTTLE'] = {'ENABLED': False}
+    if args.fast_hasher:
+        # Pool workers load the settings module, not these overrides, so hash inline
+        overrides['PASSWORD_HASHERS'] = ['django.contrib.auth.hashers.MD5PasswordHasher']
+        overrides['PASSWORD_HASHING'] = {'WORKERS': 0}
+    # Read by config/settings.py, so the server runs exactly what a deployment would
+    if args.sqlite == 'tuned':
+        os.environ['SQLITE_TUNED'] = '1'
+    else:
+        os.environ.pop('SQLITE_TUNED', None)
+    db_path = Path(tempfile.mkdtemp()) / 'api_endpoints.db'
+    setup_django(db_path, **overrides)
+
+    from django.contrib.auth import get_user_model
+    from django.contrib.auth.hashers import make_password
+    User = get_user_model()
+
+    seed_users(args.users)
+    User.objects.update(password=make_password(PASSWORD))
+    users = list(User.objects.order_by('pk')[:args.requests * 3])
+    scenarios = build_scenarios(users, args.requests)
+
+    server = start_server(args.concurrency)
+    client = Client(server.server_port)
+    results = {}
+    try:
+        for endpoint in endpoints:
+            results[endpoint] = run_endpoint(client, scenarios[endpoint], args.concurrency)
+    finally:
+        server.shutdown()
+
+    baseline = json.loads(Path(args.compare).read_text())['results'] if args.compare else None
+    print(f'{args.users} users, {args.requests} requests per endpoint, concurrency {args.concurrency}, '
+          f'{args.sqlite} SQLite')
+    print_report(results, baseline)
+
+    if args.output:
+        Path(args.output).write_text(json.dumps({
+            'commit': git_commit(),
+            'created': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+            'python': platform.python_version(),
+            'options': {key: value for key, value in vars(args).items() if key not in ('output', 'compare')},
+            'results': results,
+        }, indent=2))
+        print(f'saved {args.output}')
+
+
+if __name__ == '__main__':
+    main()
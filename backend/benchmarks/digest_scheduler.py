@@ -0,0 +1,63 @@
+"""
+Benchmark a digest scheduler tick.
+
+Seeds users with a mix of digest frequencies and do-not-disturb windows,
+queues a few notification events for each, then times one
+DigestScheduler.tick() (with an in-memory sender) at an instant where every
+window has closed, reporting digests sent, users deferred and throughput.
+
+    python benchmarks/digest_scheduler.py --users 100000 --events 3
+"""
+import argparse
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+from utils import SEED_PASSWORD_HASH, setup_django
+
+QUEUED_AT = datetime(2026, 3, 2, 10, tzinfo=timezone.utc)
+TICK_AT = QUEUED_AT + timedelta(days=7)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=100000)
+    parser.add_argument('--events', type=int, default=3, help='events queued per user')
+    parser.add_argument('--batch-size', type=int, default=500)
+    args = parser.parse_args()
+
+    db_path = Path(tempfile.mkdtemp()) / 'digest_scheduler.db'
+    setup_django(db_path)
+
+    from django.contrib.auth import get_user_model
+    from users.digests import FREQUENCIES, DigestScheduler, MemorySender
+    from users.models import NotificationEvent
+    User = get_user_model()
+
+    rng = random.Random(7)
+    for offset in range(0, args.users, 20000):
+        User.objects.bulk_create([
+            User(email=f'user{i}@bench.example.com', username=f'user{i}', password=SEED_PASSWORD_HASH,
+                 digest_frequency=rng.choice(FREQUENCIES), dnd_enabled=rng.random() < 0.3,
+                 dnd_start_time=rng.randrange(24) * 60, dnd_end_time=rng.randrange(24) * 60)
+            for i in range(offset, min(offset + 20000, args.users))
+        ])
+    user_ids = list(User.objects.values_list('pk', flat=True))
+    for offset in range(0, len(user_ids), 20000):
+        NotificationEvent.objects.bulk_create([
+            NotificationEvent(user_id=user_id, kind='mentions', created_at=QUEUED_AT + timedelta(minutes=n))
+            for user_id in user_ids[offset:offset + 20000] for n in range(args.events)
+        ])
+
+    scheduler = DigestScheduler(sender=MemorySender(), clock=lambda: TICK_AT, batch_size=args.batch_size)
+    started = time.perf_counter()
+    metrics = scheduler.tick()
+    seconds = time.perf_counter() - started
+    print(f"{args.users} users, {metrics['digests']} digests ({metrics['events']} events), "
+          f"{metrics['deferred']} deferred in {seconds:.2f}s ({metrics['events'] / seconds:.0f} events/s)")
+
+
+if __name__ == '__main__':
+    main()
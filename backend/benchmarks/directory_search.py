@@ -0,0 +1,114 @@
+"""
+Benchmark directory typeahead search.
+
+Seeds users with random first and last names, a share of them with
+``profile_searchable`` on, builds the directory index with
+users/directory.py index_users() (what ``manage.py rebuild_directory``
+runs), then measures search() latency for:
+
+- ``prefix-N``: a random N-letter prefix of a real name, the keystrokes of
+  a typeahead box;
+- ``two-words``: a first name plus a last name prefix;
+- ``next-page``: the second page of a one-letter query, through its cursor;
+- ``icontains``: the same first-page one-letter query as a naive
+  ``icontains`` over names and email, for comparison.
+
+The target is a p99 under 20 ms for the indexed cases.
+
+    python benchmarks/directory_search.py --users 1000000
+"""
+import argparse
+import random
+import tempfile
+import time
+from pathlib import Path
+
+from utils import SEED_PASSWORD_HASH, measure, setup_django, summarize
+
+FIRST_NAMES = [
+    'Ada', 'Alan', 'Amara', 'Anil', 'Astrid', 'Bruno', 'Chen', 'Chloé', 'Dmitri', 'Elena', 'Farah', 'Grace',
+    'Hiro', 'Ingrid', 'Jahan', 'José', 'Kavya', 'Lars', 'Leila', 'Malik', 'Mei', 'Nadia', 'Olu', 'Priya',
+    'Rafael', 'Sakura', 'Sven', 'Tariq', 'Uma', 'Wei', 'Yusuf', 'Zoë',
+]
+LAST_NAMES = [
+    'Abadi', 'Becker', 'Costa', 'Dubois', 'Eriksen', 'Fernández', 'Gupta', 'Haddad', 'Ivanova', 'Jensen',
+    'Kowalski', 'Lindqvist', 'Moreau', 'Nakamura', 'Okafor', 'Perera', 'Quinn', 'Rossi', 'Silva', 'Tanaka',
+    'Ueda', 'Vargas', 'Weber', 'Xu', 'Yilmaz', 'Zhang',
+]
+
+
+def seed(User, count, searchable, batch_size=20000):
+    """Users with random names; ``searchable`` of them listed in the directory"""
+    rng = random.Random(42)
+    for offset in range(0, count, batch_size):
+        users = []
+        for i in range(offset, min(offset + batch_size, count)):
+            user = User(email=f'user{i}@bench.example.com', username=f'user{i}', password=SEED_PASSWORD_HASH,
+                        first_name=rng.choice(FIRST_NAMES), last_name=f'{rng.choice(LAST_NAMES)}{i % 997}')
+            user.profile_searchable = rng.random() < searchable
+            users.append(user)
+        User.objects.bulk_create(users)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=200000)
+    parser.add_argument('--searchable', type=float, default=0.3, help='share of users listed')
+    parser.add_argument('--limit', type=int, default=20)
+    parser.add_argument('--samples', type=int, default=300)
+    args = parser.parse_args()
+
+    db_path = Path(tempfile.mkdtemp()) / 'directory_search.db'
+    setup_django(db_path)
+
+    from django.contrib.auth import get_user_model
+    from django.db.models import F, Q
+    from django.db.models.lookups import Exact
+    from users import directory
+    User = get_user_model()
+
+    started = time.perf_counter()
+    seed(User, args.users, args.searchable)
+    print(f'seeded {args.users} users in {time.perf_counter() - started:.1f}s')
+    started = time.perf_counter()
+    listed = directory.index_users(User.objects.all(), batch_size=20000)
+    print(f'indexed {listed} searchable users in {time.perf_counter() - started:.1f}s')
+
+    rng = random.Random(7)
+    names = FIRST_NAMES + LAST_NAMES
+
+    def prefix(length):
+        return lambda: directory.search(rng.choice(names)[:length], limit=args.limit)
+
+    def two_words():
+        return directory.search(f'{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)[:3]}', limit=args.limit)
+
+    def next_page():
+        term = rng.choice(names)[:1]
+        _, cursor = directory.search(term, limit=args.limit)
+        started = time.perf_counter()
+        directory.search(term, cursor=cursor, limit=args.limit)
+        return time.perf_counter() - started
+
+    def icontains():
+        term = rng.choice(names)[:1]
+        mask = User.profile_searchable.mask
+        list(User.objects.filter(
+            Q(first_name__icontains=term) | Q(last_name__icontains=term) | Q(email__icontains=term),
+            Exact(F('preference_flags').bitand(mask), mask), is_active=True,
+        ).only('first_name', 'last_name').order_by('last_name', 'pk')[:args.limit])
+
+    cases = [(f'prefix-{n}', prefix(n)) for n in (1, 2, 3, 4)] + [('two-words', two_words)]
+    print(f'{"case":<12} {"p50 ms":>8} {"p95 ms":>8} {"p99 ms":>8}')
+    for name, func in cases:
+        stats = summarize(measure(func, args.samples))
+        print(f'{name:<12} {stats["p50"]:>8.2f} {stats["p95"]:>8.2f} {stats["p99"]:>8.2f}')
+
+    stats = summarize([next_page() * 1000 for _ in range(args.samples)])
+    print(f'{"next-page":<12} {stats["p50"]:>8.2f} {stats["p95"]:>8.2f} {stats["p99"]:>8.2f}')
+    stats = summarize(measure(icontains, max(1, args.samples // 30)))
+    print(f'{"icontains":<12} {stats["p50"]:>8.2f} {stats["p95"]:>8.2f} {stats["p99"]:>8.2f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+"""
+Simulate credential stuffing against /api/auth/login/ and report CPU cost.
+
+Fires wrong-password attempts from ``--ips`` rotating client addresses at
+``--emails`` real accounts and records the process CPU time each batch of
+attempts consumes, with the login throttle on and then off. With the
+throttle on, CPU per batch drops to near zero once the limits are hit
+because rejected attempts never reach the user lookup or PBKDF2; with it
+off, every attempt pays for a full password verification.
+
+Hashing runs inline (PASSWORD_HASHING WORKERS = 0) so its CPU is counted in
+this process.
+
+    python benchmarks/login_attack.py --attempts 500 --batch 50
+"""
+import argparse
+import itertools
+import logging
+import tempfile
+import time
+from pathlib import Path
+
+from utils import setup_django
+
+
+def attack(client, attempts, batch, ips, emails):
+    """Run the attack and return (cpu_ms, statuses) per batch"""
+    from django.urls import reverse
+
+    targets = itertools.cycle(itertools.product(range(emails), range(ips)))
+    results = []
+    for _ in range(0, attempts, batch):
+        statuses = {}
+        started = time.process_time()
+        for _, (email, ip) in zip(range(batch), targets):
+            response = client.post(
+                reverse('login'),
+                {'email': f'user{email}@bench.example.com', 'password': 'WrongPass123!'},
+                content_type='application/json',
+                REMOTE_ADDR=f'10.0.{ip // 256}.{ip % 256}',
+            )
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+        results.append(((time.process_time() - started) * 1000, statuses))
+    return results
+
+
+def report(title, results, batch):
+    print(title)
+    print(f'{"batch":>6} {"cpu ms":>10} {"ms/attempt":>11}  statuses')
+    for index, (cpu_ms, statuses) in enumerate(results):
+        print(f'{index:>6} {cpu_ms:>10.1f} {cpu_ms / batch:>11.2f}  {dict(sorted(statuses.items()))}')
+    total = sum(cpu_ms for cpu_ms, _ in results)
+    print(f'total cpu: {total:.0f} ms\n')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--attempts', type=int, default=500, help='attempts with the throttle on')
+    parser.add_argument('--unthrottled-attempts', type=int, default=50, help='attempts with the throttle off')
+    parser.add_argument('--batch', type=int, default=50)
+    parser.add_argument('--ips', type=int, default=20, help='rotating attacker addresses')
+    parser.add_argument('--emails', type=int, default=5, help='targeted accounts')
+    args = parser.parse_args()
+
+    db_path = Path(tempfile.mkdtemp()) / 'login_attack.db'
+    setup_django(db_path, PASSWORD_HASHING={'WORKERS': 0}, ALLOWED_HOSTS=['*'])
+
+    from django.contrib.auth.hashers import make_password
+    from django.test import Client, override_settings
+    from utils import seed_users
+    from users.throttling import clear_local_buckets
+
+    # Real hashes at the current work factor, so each verification costs what it would in production
+    seed_users(args.emails)
+    from django.contrib.auth import get_user_model
+    get_user_model().objects.update(password=make_password('CorrectPass123!'))
+
+    # Every rejected attempt would otherwise log a warning
+    logging.getLogger('django.request').setLevel(logging.ERROR)
+    client = Client()
+    report('throttle on', attack(client, args.attempts, args.batch, args.ips, args.emails), args.batch)
+
+    clear_local_buckets()
+    with override_settings(LOGIN_THROTTLE={'ENABLED': False}):
+        batch = min(args.batch, args.unthrottled_attempts)
+        report('throttle off', attack(client, args.unthrottled_attempts, batch, args.ips, args.emails), batch)
+
+
+if __name__ == '__main__':
+    main()
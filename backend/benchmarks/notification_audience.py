@@ -0,0 +1,95 @@
+"""
+Benchmark notification audience selection.
+
+Seeds users with random notification preferences and do-not-disturb
+windows, then resolves the audience of several notification type/channel
+pairs at a fixed instant two ways:
+
+- ``scan``: load every user's preferences and filter in Python, which is
+  what a fan-out without users/audience.py has to do;
+- ``indexed``: stream ids from users/audience.py deliverable_user_ids().
+
+Both must agree on the number of recipients.
+
+    python benchmarks/notification_audience.py --users 1000000
+"""
+import argparse
+import random
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+from utils import SEED_PASSWORD_HASH, setup_django
+
+AT = datetime(2026, 1, 1, 23, 30, tzinfo=timezone.utc)
+CASES = [('mentions', 'email'), ('product_updates', 'push'), ('security', 'sms')]
+
+
+def seed(User, count, batch_size=20000):
+    """Users with random preference bits, DND windows, phones and activity"""
+    rng = random.Random(42)
+    flags = User._bit_flags
+    for offset in range(0, count, batch_size):
+        users = []
+        for i in range(offset, min(offset + batch_size, count)):
+            user = User(email=f'user{i}@bench.example.com', username=f'user{i}', password=SEED_PASSWORD_HASH,
+                        is_active=rng.random() < 0.95, phone='0771234567' if rng.random() < 0.6 else '',
+                        dnd_start_time=rng.randrange(24) * 60, dnd_end_time=rng.randrange(24) * 60)
+            for name in flags:
+                setattr(user, name, rng.random() < 0.5)
+            users.append(user)
+        User.objects.bulk_create(users)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=200000)
+    parser.add_argument('--chunk-size', type=int, default=10000)
+    parser.add_argument('--skip-scan', action='store_true', help='only run the indexed selection')
+    args = parser.parse_args()
+
+    db_path = Path(tempfile.mkdtemp()) / 'notification_audience.db'
+    setup_django(db_path)
+
+    from django.contrib.auth import get_user_model
+    from users import audience
+    User = get_user_model()
+
+    started = time.perf_counter()
+    seed(User, args.users)
+    print(f'seeded {args.users} users in {time.perf_counter() - started:.1f}s')
+
+    minute = audience.minute_of_day(AT)
+
+    def scan(notification_type, channel):
+        flag, respects_dnd = audience.NOTIFICATION_TYPES[notification_type]
+        recipients = 0
+        fields = User.storage_fields(['is_active', 'phone', flag, 'dnd_start_time', 'dnd_end_time'])
+        for user in User.objects.only(*fields).iterator(chunk_size=args.chunk_size):
+            if not (user.is_active and getattr(user, flag) and getattr(user, audience.CHANNELS[channel])):
+                continue
+            if channel == 'sms' and not user.phone:
+                continue
+            if respects_dnd and user.dnd_enabled:
+                start, end = (int(t[:2]) * 60 + int(t[3:]) for t in (user.dnd_start_time, user.dnd_end_time))
+                if start <= minute < end if start < end else start > end and (minute >= start or minute < end):
+                    continue
+            recipients += 1
+        return recipients
+
+    def indexed(notification_type, channel):
+        return sum(1 for _ in audience.deliverable_user_ids(notification_type, channel, AT, chunk_size=args.chunk_size))
+
+    print(f'{"type/channel":<24} {"case":<8} {"seconds":>8} {"recipients":>11}')
+    for notification_type, channel in CASES:
+        cases = [('indexed', indexed)] if args.skip_scan else [('scan', scan), ('indexed', indexed)]
+        for name, func in cases:
+            started = time.perf_counter()
+            recipients = func(notification_type, channel)
+            seconds = time.perf_counter() - started
+            print(f'{notification_type + "/" + channel:<24} {name:<8} {seconds:>8.2f} {recipients:>11}')
+
+
+if __name__ == '__main__':
+    main()
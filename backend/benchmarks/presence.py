@@ -0,0 +1,120 @@
+"""
+Benchmark presence tracking.
+
+Seeds users (a share of them hiding their online status) and replays a
+stream of authenticated requests from a pool of active users, recording
+last-seen two ways:
+
+- ``row-write``: ``UPDATE users_user SET last_login`` on every request, what
+  tracking last-seen on the User row costs;
+- ``presence``: users/presence.py heartbeat() per request and one flush()
+  at the end, standing in for the background flusher.
+
+Then asks "which of these 1,000 users are online" with presence.online()
+(one cache get_many()) and, for comparison, with a query over LastSeen
+joined to the users table for the show_online_status flag.
+
+    python benchmarks/presence.py --users 100000 --requests 200000
+"""
+import argparse
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+from utils import measure, seed_users, setup_django, summarize
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'OPTIONS': {'MAX_ENTRIES': 10_000_000},
+    }
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=100000)
+    parser.add_argument('--active', type=int, default=20000, help='users sending requests')
+    parser.add_argument('--requests', type=int, default=200000)
+    parser.add_argument('--hidden', type=float, default=0.2, help='share of users hiding their status')
+    parser.add_argument('--ids', type=int, default=1000, help='user ids per online query')
+    parser.add_argument('--samples', type=int, default=200)
+    args = parser.parse_args()
+
+    db_path = Path(tempfile.mkdtemp()) / 'presence.db'
+    setup_django(db_path, CACHES=CACHES)
+
+    from django.contrib.auth import get_user_model
+    from django.db import connection
+    from django.db.models import F
+    from django.db.models.lookups import Exact
+    from users import presence
+    from users.models import LastSeen
+    User = get_user_model()
+
+    started = time.perf_counter()
+    seed_users(args.users)
+    rng = random.Random(42)
+    ids = list(User.objects.values_list('pk', flat=True))
+    hidden = rng.sample(ids, int(len(ids) * args.hidden))
+    mask = User.show_online_status.mask
+    for start in range(0, len(hidden), 900):
+        User.objects.filter(pk__in=hidden[start:start + 900]).update(preference_flags=F('preference_flags').bitand(~mask))
+    print(f'seeded {args.users} users in {time.perf_counter() - started:.1f}s')
+
+    active = User.objects.in_bulk(rng.sample(ids, args.active))
+    stream = [rng.choice(list(active)) for _ in range(args.requests)]
+    # Requests arrive over an hour, so per-user heartbeats are spread over several intervals
+    clock = [time.time() - 3600 + i * 3600 / args.requests for i in range(args.requests)]
+
+    def row_write():
+        now = datetime.now(timezone.utc)
+        for user_id in stream:
+            User.objects.filter(pk=user_id).update(last_login=now)
+
+    def heartbeats():
+        for user_id, now in zip(stream, clock):
+            presence.heartbeat(active[user_id], now=now)
+        presence.flush()
+
+    writes = 0
+
+    def count_writes(execute, sql, params, many, context):
+        nonlocal writes
+        writes += sql.startswith(('UPDATE', 'INSERT'))
+        return execute(sql, params, many, context)
+
+    print(f'{"recording":<12} {"seconds":>8} {"writes":>8}')
+    for name, func in (('row-write', row_write), ('presence', heartbeats)):
+        writes = 0
+        with connection.execute_wrapper(count_writes):
+            started = time.perf_counter()
+            func()
+            seconds = time.perf_counter() - started
+        print(f'{name:<12} {seconds:>8.2f} {writes:>8}')
+
+    query_ids = [rng.sample(ids, args.ids) for _ in range(args.samples)]
+    queries = iter(query_ids * 2)
+    since = datetime.now(timezone.utc) - timedelta(seconds=presence.get_setting('TTL'))
+
+    def cached():
+        presence.online(next(queries))
+
+    def database():
+        list(LastSeen.objects.filter(
+            Exact(F('user__preference_flags').bitand(mask), mask),
+            user_id__in=next(queries), seen_at__gte=since, user__is_active=True,
+        ).values_list('user_id', 'seen_at'))
+
+    print(f'\n{args.ids}-id online query   p50 ms   p95 ms   p99 ms')
+    for name, func in (('presence.online', cached), ('LastSeen query', database)):
+        stats = summarize(measure(func, args.samples))
+        print(f'{name:<22} {stats["p50"]:>8.2f} {stats["p95"]:>8.2f} {stats["p99"]:>8.2f}')
+    online = presence.online(query_ids[0])
+    print(f'\nonline among the first query: {len(online)} of {args.ids}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,54 @@
+"""
+Microbenchmark the profile payload: UserSerializer vs FastUserSerializer.
+
+Times building the ``user`` dict (and rendering it to JSON) for a saved
+user, plus FastUserSerializer.from_row() over a values() row.
+
+    python benchmarks/profile_serializer.py --samples 20000
+"""
+import argparse
+import tempfile
+from pathlib import Path
+
+from utils import measure, seed_users, setup_django, summarize
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--samples', type=int, default=20000)
+    args = parser.parse_args()
+
+    db_path = Path(tempfile.mkdtemp()) / 'profile_serializer.db'
+    setup_django(db_path)
+
+    from django.contrib.auth import get_user_model
+    from rest_framework.renderers import JSONRenderer
+    from users.serializers import FastUserSerializer, UserSerializer
+    User = get_user_model()
+
+    seed_users(1, first_name='Ada', last_name='Lovelace', country='United Kingdom', phone='+44-20-7946-0000')
+    user = User.objects.get()
+    row = User.objects.values(*FastUserSerializer.row_fields()).get()
+    render = JSONRenderer().render
+    assert render(FastUserSerializer(user).data) == render(UserSerializer(user).data)
+
+    # (case, function, case it is compared against)
+    cases = [
+        ('UserSerializer.data', lambda: UserSerializer(user).data, None),
+        ('FastUserSerializer.data', lambda: FastUserSerializer(user).data, 'UserSerializer.data'),
+        ('FastUserSerializer.from_row', lambda: FastUserSerializer.from_row(row), 'UserSerializer.data'),
+        ('UserSerializer + JSON', lambda: render(UserSerializer(user).data), None),
+        ('FastUserSerializer + JSON', lambda: render(FastUserSerializer(user).data), 'UserSerializer + JSON'),
+    ]
+    results = {name: summarize(measure(func, args.samples)) for name, func, _ in cases}
+
+    print(f'{"case":<30} {"p50 us":>8} {"p99 us":>8} {"mean us":>8} {"speedup":>8}')
+    for name, _, baseline in cases:
+        stats = results[name]
+        speedup = results[baseline]['mean'] / stats['mean'] if baseline else 1.0
+        print(f'{name:<30} {stats["p50"] * 1000:>8.1f} {stats["p99"] * 1000:>8.1f} '
+              f'{stats["mean"] * 1000:>8.1f} {speedup:>7.1f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+"""
+Benchmark the streaming user export against loading every User into memory.
+
+For each table size, exports all users as CSV and NDJSON with
+users/export.py (discarding the output, as a client download would) and,
+for comparison, the ad-hoc approach of ``list(User.objects.all())`` plus
+FastUserSerializer. Reports throughput and peak Python memory (tracemalloc)
+so it is visible that the streaming export's memory does not grow with the
+table.
+
+    python benchmarks/user_export.py --sizes 10000,100000,300000
+"""
+import argparse
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+from utils import seed_users, setup_django
+
+
+def profile(func):
+    """Run ``func`` and return (seconds, peak traced MiB)"""
+    tracemalloc.start()
+    started = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak / 2 ** 20
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', default='10000,100000', help='comma separated user counts')
+    parser.add_argument('--chunk-size', type=int, default=2000)
+    parser.add_argument('--skip-in-memory', action='store_true', help='only run the streaming export')
+    args = parser.parse_args()
+
+    db_path = Path(tempfile.mkdtemp()) / 'user_export.db'
+    setup_django(db_path)
+
+    from django.contrib.auth import get_user_model
+    from users import export
+    from users.serializers import FastUserSerializer
+    User = get_user_model()
+
+    def drain(chunks):
+        for _ in chunks:
+            pass
+
+    def in_memory():
+        users = list(User.objects.order_by('pk'))
+        [FastUserSerializer(user).data for user in users]
+
+    print(f'{"users":>9} {"case":<14} {"seconds":>8} {"rows/s":>9} {"peak MiB":>9}')
+    seeded = 0
+    for size in map(int, args.sizes.split(',')):
+        seed_users(size - seeded, start=seeded, first_name='Bench', country='Sri Lanka')
+        seeded = size
+
+        cases = [
+            ('stream csv', lambda: drain(export.export_chunks(User.objects.all(), 'csv', chunk_size=args.chunk_size))),
+            ('stream ndjson', lambda: drain(export.export_chunks(User.objects.all(), 'ndjson', chunk_size=args.chunk_size))),
+        ]
+        if not args.skip_in_memory:
+            cases.append(('load all', in_memory))
+        for name, func in cases:
+            seconds, peak = profile(func)
+            print(f'{size:>9} {name:<14} {seconds:>8.2f} {size / seconds:>9.0f} {peak:>9.1f}')
+
+
+if __name__ == '__main__':
+    main()
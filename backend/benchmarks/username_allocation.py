@@ -0,0 +1,99 @@
+"""
+Benchmark username allocation against table size.
+
+Seeds a hot local part (``info``, ``info1`` ... ``infoK``) plus filler users
+up to each requested table size, all recorded as the allocator writes them,
+then times the next allocation for ``info@`` three ways:
+
+- ``alloc``: users/usernames.py, one seek of the stem/suffix index;
+- ``range``: the previous single query, a username range scan whose
+  matches are sorted by length to find the highest suffix;
+- ``legacy``: the original probe-one-candidate-at-a-time loop.
+
+    python benchmarks/username_allocation.py --sizes 10000,100000,1000000
+"""
+import argparse
+import re
+import tempfile
+from pathlib import Path
+
+from utils import SEED_PASSWORD_HASH, measure, setup_django, summarize
+
+
+def seed(User, assign_username, start, count, stem=None, batch_size=10000):
+    """Users ``start`` ... ``start + count - 1``: suffixes of ``stem``, or filler stems of their own"""
+    for offset in range(start, start + count, batch_size):
+        users = []
+        for i in range(offset, min(offset + batch_size, start + count)):
+            user = User(email=f'user{i}@bench.example.com', password=SEED_PASSWORD_HASH)
+            if stem is None:
+                assign_username(user, f'user{i}', 0)
+            else:
+                assign_username(user, stem, i)
+            users.append(user)
+        User.objects.bulk_create(users)
+
+
+def range_next_username(User, base):
+    """The previous allocator: range scan of the username index, sorted by length"""
+    from django.db.models.functions import Length
+    highest = (
+        User.objects
+        .filter(username__gt='', username__gte=base, username__lt=base + ':')
+        .filter(username__regex=r'^%s([1-9][0-9]*)?$' % re.escape(base))
+        .order_by(Length('username').desc(), '-username')
+        .values_list('username', flat=True)
+        .first()
+    )
+    if highest is None:
+        return base
+    return f'{base}{int(highest[len(base):] or 0) + 1}'
+
+
+def legacy_next_username(User, base):
+    """The original registration loop: one query per taken candidate"""
+    username = base
+    counter = 1
+    while User.objects.filter(username=username).exists():
+        username = f'{base}{counter}'
+        counter += 1
+    return username
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', default='10000,100000,1000000', help='comma separated table sizes')
+    parser.add_argument('--hot', type=int, default=1000, help='existing suffixes for the hot local part')
+    parser.add_argument('--samples', type=int, default=200)
+    parser.add_argument('--range-samples', type=int, default=50)
+    parser.add_argument('--legacy-samples', type=int, default=5)
+    args = parser.parse_args()
+
+    db_path = Path(tempfile.mkdtemp()) / 'username_allocation.db'
+    setup_django(db_path)
+
+    from django.contrib.auth import get_user_model
+    from users.usernames import assign_username, next_free_username
+    User = get_user_model()
+
+    seed(User, assign_username, 0, args.hot + 1, stem='info')
+    seeded = args.hot + 1
+
+    print(f'hot local part: info@ with {args.hot} existing suffixes')
+    print(f'{"users":>10} {"alloc p50":>10} {"alloc p95":>10} {"alloc p99":>10} {"range p50":>10} {"legacy p50":>11}  (ms)')
+    for size in [int(s) for s in args.sizes.split(',')]:
+        if size > seeded:
+            seed(User, assign_username, seeded, size - seeded)
+            seeded = size
+
+        expected = f'info{args.hot + 1}'
+        assert next_free_username('info') == range_next_username(User, 'info') == expected
+        alloc = summarize(measure(lambda: next_free_username('info'), args.samples))
+        ranged = summarize(measure(lambda: range_next_username(User, 'info'), args.range_samples))
+        legacy = summarize(measure(lambda: legacy_next_username(User, 'info'), args.legacy_samples))
+        print(f'{size:>10} {alloc["p50"]:>10.3f} {alloc["p95"]:>10.3f} {alloc["p99"]:>10.3f} '
+              f'{ranged["p50"]:>10.3f} {legacy["p50"]:>11.3f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,81 @@
+"""
+Shared helpers for the standalone benchmark scripts in this directory.
+
+Each script configures Django against its own throwaway SQLite file so runs
+never touch db.sqlite3:
+
+    python benchmarks/username_allocation.py --help
+"""
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+BENCH_DIR = Path(__file__).resolve().parent
+
+# Any valid hash works for seeded users; hashing a million passwords would dominate seeding
+SEED_PASSWORD_HASH = 'pbkdf2_sha256$1000000$benchsalt$0fG3o3lHcJ6y3L0pO8bYc4sR1s0m1hJrSx2t0YcJ9dA='
+
+
+def setup_django(db_path=None, **overrides):
+    """Configure Django for a benchmark run and migrate the benchmark database"""
+    if str(BACKEND_DIR) not in sys.path:
+        sys.path.insert(0, str(BACKEND_DIR))
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+
+    import django
+    from django.conf import settings
+
+    if db_path is not None:
+        settings.DATABASES['default']['NAME'] = str(db_path)
+    for name, value in overrides.items():
+        setattr(settings, name, value)
+    django.setup()
+
+    from django.core.management import call_command
+    call_command('migrate', verbosity=0)
+
+
+def seed_users(count, start=0, batch_size=10000, username=lambda i: f'user{i}', **fields):
+    """Bulk insert users numbered [start, start + count) with a fixed password hash"""
+    from django.contrib.auth import get_user_model
+    User = get_user_model()
+
+    for offset in range(start, start + count, batch_size):
+        stop = min(offset + batch_size, start + count)
+        User.objects.bulk_create([
+            User(
+                email=f'user{i}@bench.example.com',
+                username=username(i),
+                password=SEED_PASSWORD_HASH,
+                **fields,
+            )
+            for i in range(offset, stop)
+        ])
+
+
+def measure(func, samples):
+    """Call ``func`` ``samples`` times and return per-call latencies in milliseconds"""
+    latencies = []
+    for _ in range(samples):
+        started = time.perf_counter()
+        func()
+        latencies.append((time.perf_counter() - started) * 1000)
+    return latencies
+
+
+def summarize(latencies):
+    """Return p50/p95/p99/mean of a list of millisecond latencies"""
+    ordered = sorted(latencies)
+
+    def pct(p):
+        return ordered[min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))]
+
+    return {
+        'p50': pct(50),
+        'p95': pct(95),
+        'p99': pct(99),
+        'mean': statistics.fmean(ordered),
+    }
@@ -12,5 +12,15 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+# Serve /api/auth/ from the native async views under ASGI
+os.environ.setdefault('USERS_ASYNC_VIEWS', '1')
 
 application = get_asgi_application()
+
+# Periodic purges of expired refresh tokens and deleted accounts, when their INTERVAL is set,
+# and the flush of presence last-seen times
+from users import deletion, presence, purge  # noqa: E402
+
+purge.start_periodic_purge()
+deletion.start_periodic_purge()
+presence.start_flusher()
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/6.0/ref/settings/
 """
 
+import os
 from pathlib import Path
 from datetime import timedelta
 
@@ -51,6 +52,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # First, so its total covers every other middleware (users/timing.py)
+    'users.timing.RequestTimingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -91,6 +94,50 @@ DATABASES = {
     }
 }
 
+# Production SQLite mode (users/sqlite/base.py): WAL journaling and tuned pragmas,
+# IMMEDIATE transactions behind a per-process write queue, persistent connections
+if os.environ.get('SQLITE_TUNED') == '1':
+    DATABASES['default'].update({
+        'ENGINE': 'users.sqlite',
+        'CONN_MAX_AGE': 600,
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            'pragmas': {'busy_timeout': 5000},  # overrides for users.sqlite.base.PRAGMAS
+        },
+    })
+
+# Local stand-in for a read replica: a second SQLite file, refreshed by `manage.py sync_replica`
+if os.environ.get('SQLITE_REPLICA') == '1':
+    DATABASES['replica'] = {**DATABASES['default'], 'NAME': BASE_DIR / 'db.replica.sqlite3'}
+
+# Writes and most reads go to 'default'; profile GET, login lookup and the admin
+# user list read from REPLICAS, with read-your-writes pinning (users/routers.py)
+DATABASE_ROUTERS = ['users.routers.ReplicaRouter']
+DATABASE_ROUTING = {
+    'REPLICAS': [alias for alias in DATABASES if alias != 'default'],
+    'PIN_SECONDS': 5,          # reads of a user stay on the primary this long after it was written
+    'CACHE_ALIAS': 'default',  # must be shared by all processes for pins to reach them
+}
+
+
+# Cache
+# https://docs.djangoproject.com/en/6.0/topics/cache/
+# Local memory is per-process; point this at Redis or Memcached in production
+# so user cache invalidation reaches every worker.
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
+# Cached user resolution for JWT-authenticated requests (users/cache.py)
+USER_CACHE = {
+    'CACHE_ALIAS': 'default',
+    'LRU_SIZE': 1024,  # per-process entries
+    'TIMEOUT': 300,    # seconds a user stays in the shared cache
+}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/6.0/ref/settings/#auth-password-validators
@@ -111,6 +158,77 @@ AUTH_PASSWORD_VALIDATORS = [
 ]
 
 
+# Password hashing runs in a bounded process pool (users/hashing.py). Each web
+# worker process has its own pool: keep web workers x WORKERS near the CPU count.
+PASSWORD_HASHING = {
+    'WORKERS': 2,                    # per web worker process; 0 hashes inline on the request thread
+    'MAX_PENDING': 64,               # queued + running jobs before requests get 503
+    'TIMEOUT': 10,                   # seconds a request waits for its job
+}
+
+# Login brute-force throttle, checked before any user lookup or hashing (users/throttling.py)
+LOGIN_THROTTLE = {
+    'CACHE_ALIAS': 'default',
+    'BURST': 10,               # back-to-back attempts per client IP (in-process token bucket)
+    'REFILL_PER_SECOND': 0.5,
+    'WINDOW': 300,             # seconds; shared sliding-window counters below
+    'IP_LIMIT': 100,
+    'EMAIL_LIMIT': 10,
+}
+
+# Batched deletion of expired refresh tokens (users/purge.py, manage.py purge_tokens)
+TOKEN_PURGE = {
+    'BATCH_SIZE': 1000,  # rows per transaction
+    'PAUSE': 0.1,        # seconds between batches
+    'INTERVAL': 0,       # seconds between in-process runs; 0 = management command only
+}
+
+# Background purge of deleted accounts (users/deletion.py, manage.py purge_deleted_accounts)
+ACCOUNT_DELETION = {
+    'BATCH_SIZE': 1000,  # dependent rows per transaction
+    'PAUSE': 0.1,        # seconds between batches
+    'INTERVAL': 0,       # seconds between in-process runs; 0 = management command only
+}
+
+# Notification digests (users/digests.py, manage.py run_digests)
+DIGESTS = {
+    'SENDER': 'users.digests.LogSender',  # any class with send(digests)
+    'BATCH_SIZE': 500,                    # users per batch
+    'INTERVAL': 60,                       # seconds between ticks
+}
+
+# Online presence from request heartbeats (users/presence.py)
+PRESENCE = {
+    'CACHE_ALIAS': 'default',
+    'TTL': 120,                # seconds a user stays online after their last request
+    'HEARTBEAT_INTERVAL': 30,  # seconds between presence writes for one user per process
+    'FLUSH_INTERVAL': 60,      # seconds between last-seen writes to the database
+}
+
+# Per-request Server-Timing header and users.timing log records (users/timing.py)
+REQUEST_TIMING = {
+    'SAMPLE_RATE': float(os.environ.get('REQUEST_TIMING_SAMPLE_RATE', '0')),  # 0 disables, 1 times every request
+    'PATH_PREFIX': '/api/auth/',
+    'HEADER': True,   # Server-Timing on responses to staff users only
+    'LOG': True,
+}
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'users.timing': {'handlers': ['console'], 'level': 'INFO', 'propagate': False},
+    },
+}
+
+# Route /api/auth/ to the native async views (users/async_views.py).
+# config/asgi.py turns this on; WSGI deployments keep the DRF views.
+USERS_ASYNC_VIEWS = os.environ.get('USERS_ASYNC_VIEWS') == '1'
+
+
 # Internationalization
 # https://docs.djangoproject.com/en/6.0/topics/i18n/
 
@@ -172,8 +290,12 @@ CORS_ALLOW_PRIVATE_NETWORK = True
 CORS_PREFLIGHT_MAX_AGE = 86400
 
 REST_FRAMEWORK = {
+    'DEFAULT_RENDERER_CLASSES': [
+        'users.timing.TimedJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'users.authentication.CachedJWTAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
@@ -185,4 +307,13 @@ SIMPLE_JWT = {
     'REFRESH_TOKEN_LIFETIME': timedelta(days=7),
     'ROTATE_REFRESH_TOKENS': True,
     'BLACKLIST_AFTER_ROTATION': True,
+    # Checks the blacklist through the Bloom filter in users/blacklist.py
+    'TOKEN_REFRESH_SERIALIZER': 'users.serializers.TokenRefreshSerializer',
+}
+
+# In-memory Bloom filter of blacklisted refresh tokens (users/blacklist.py)
+BLACKLIST_FILTER = {
+    'CACHE_ALIAS': 'default',
+    'CAPACITY': 100000,   # expected blacklisted tokens; the filter grows past this on rebuild
+    'ERROR_RATE': 0.001,  # share of non-blacklisted tokens that still get a DB check
 }
\ No newline at end of file
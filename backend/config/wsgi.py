@@ -14,3 +14,11 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
 
 application = get_wsgi_application()
+
+# Periodic purges of expired refresh tokens and deleted accounts, when their INTERVAL is set,
+# and the flush of presence last-seen times
+from users import deletion, presence, purge  # noqa: E402
+
+purge.start_periodic_purge()
+deletion.start_periodic_purge()
+presence.start_flusher()
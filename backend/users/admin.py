@@ -1,6 +1,91 @@
+from datetime import datetime
+
 from django.contrib import admin
+from django.contrib.admin.options import IncorrectLookupParameters
+from django.contrib.admin.views.main import ORDER_VAR, PAGE_VAR, ChangeList
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
+from django.db.models import Q
+from . import routers
+from .export import export_response
 from .models import User
+from .pagination import EstimatedCountPaginator
+from .search import search_users
+
+# Query parameter carrying the keyset position: "<date_joined ISO>_<id>" of the last row shown
+CURSOR_VAR = 'after'
+
+
+def before(joined, pk):
+    """
+    Rows after (joined, pk) in newest-first order. The leading
+    ``date_joined <=`` bound lets SQLite range-scan users_user_joined_idx;
+    the OR alone would walk the index from the start.
+    """
+    return Q(date_joined__lte=joined) & (Q(date_joined__lt=joined) | Q(pk__lt=pk))
+
+
+def encode_cursor(user):
+    return f'{user.date_joined.isoformat()}_{user.pk}'
+
+
+def decode_cursor(value):
+    """(date_joined, id) from a cursor; IncorrectLookupParameters if malformed"""
+    try:
+        joined, pk = value.rsplit('_', 1)
+        return datetime.fromisoformat(joined), int(pk)
+    except ValueError:
+        raise IncorrectLookupParameters(f'Invalid cursor {value!r}')
+
+
+class KeysetChangeList(ChangeList):
+    """
+    Changelist that pages the default newest-first ordering by keyset
+    (``WHERE (date_joined, id) < cursor``, served by users_user_joined_idx)
+    instead of OFFSET, so page 10,000 costs the same as page 1. Other
+    orderings and ?p= keep Django's numbered pages.
+    """
+
+    def __init__(self, request, *args, **kwargs):
+        self.cursor = getattr(request, 'users_admin_cursor', None)
+        self.next_cursor = None
+        self.numbered_pages = PAGE_VAR in request.GET
+        super().__init__(request, *args, **kwargs)
+
+    @property
+    def keyset(self):
+        return ORDER_VAR not in self.params and not self.numbered_pages and not self.show_all
+
+    def get_results(self, request):
+        if not self.keyset:
+            return super().get_results(request)
+
+        paginator = self.model_admin.get_paginator(request, self.queryset, self.list_per_page)
+        queryset = self.queryset
+        if self.cursor:
+            joined, pk = decode_cursor(self.cursor)
+            queryset = queryset.filter(before(joined, pk))
+
+        result_list = queryset[:self.list_per_page]
+        page = list(result_list)
+        if len(page) == self.list_per_page:
+            last = page[-1]
+            if queryset.filter(before(last.date_joined, last.pk)).exists():
+                self.next_cursor = encode_cursor(last)
+
+        self.result_count = paginator.count
+        self.show_full_result_count = False
+        self.show_admin_actions = True
+        self.full_result_count = None
+        self.result_list = result_list
+        self.can_show_all = False
+        self.multi_page = bool(self.cursor or self.next_cursor)
+        self.paginator = paginator
+
+    def next_page_url(self):
+        return self.get_query_string({CURSOR_VAR: self.next_cursor})
+
+    def first_page_url(self):
+        return self.get_query_string()
 
 
 @admin.register(User)
@@ -10,8 +95,18 @@ class UserAdmin(BaseUserAdmin):
     # Fields to display in the user list
     list_display = ['email', 'first_name', 'last_name', 'is_staff', 'is_active', 'date_joined']
     list_filter = ['is_staff', 'is_active', 'gender', 'date_joined']
+    # Matched word by word against the FTS5 index in users/search.py
     search_fields = ['email', 'first_name', 'last_name', 'phone']
-    ordering = ['-date_joined']
+    search_help_text = 'Matches the start of words in email, name and phone.'
+    # pk breaks ties, matching users_user_joined_idx
+    ordering = ['-date_joined', '-pk']
+    
+    # Counts and pages stay cheap at millions of rows
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    
+    # Streamed downloads of the selected (or, with "select all", every filtered) user
+    actions = ['export_csv', 'export_ndjson']
     
     # Fields to show when editing a user
     fieldsets = (
@@ -28,3 +123,45 @@ class UserAdmin(BaseUserAdmin):
             'fields': ('email', 'password1', 'password2', 'first_name', 'last_name', 'is_staff', 'is_active')}
         ),
     )
+    
+    def changelist_view(self, request, extra_context=None):
+        # The admin treats unknown query parameters as field lookups; carry the cursor on the request instead
+        if CURSOR_VAR in request.GET:
+            request.GET = request.GET.copy()
+            request.users_admin_cursor = request.GET.pop(CURSOR_VAR)[-1]
+        # Listing reads from a replica, unless this admin just changed something
+        if request.method == 'GET':
+            request.users_read_alias = routers.read_alias(user_id=request.user.pk)
+        return super().changelist_view(request, extra_context)
+    
+    def get_queryset(self, request):
+        queryset = super().get_queryset(request)
+        alias = getattr(request, 'users_read_alias', None)
+        # .using() rather than a routing block: the list is only fetched when the response renders
+        return queryset.using(alias) if alias else queryset
+    
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        routers.pin(request.user)
+    
+    def delete_model(self, request, obj):
+        super().delete_model(request, obj)
+        routers.pin(request.user)
+    
+    def delete_queryset(self, request, queryset):
+        super().delete_queryset(request, queryset)
+        routers.pin(request.user)
+    
+    def get_changelist(self, request, **kwargs):
+        return KeysetChangeList
+    
+    def get_search_results(self, request, queryset, search_term):
+        return search_users(queryset, search_term), False
+    
+    @admin.action(description='Export selected users as CSV', permissions=['view'])
+    def export_csv(self, request, queryset):
+        return export_response(queryset.using(routers.read_alias(user_id=request.user.pk)), 'csv')
+    
+    @admin.action(description='Export selected users as NDJSON', permissions=['view'])
+    def export_ndjson(self, request, queryset):
+        return export_response(queryset.using(routers.read_alias(user_id=request.user.pk)), 'ndjson')
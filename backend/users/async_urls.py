@@ -0,0 +1,30 @@
+from django.urls import path, re_path
+from rest_framework_simplejwt.views import TokenRefreshView
+from . import async_views, views
+
+# Same routes and names as users/urls.py, served by the async views.
+# Token refresh, the batch endpoint, the directory, presence and the export have no async variant yet.
+urlpatterns = [
+    # Authentication endpoints
+    path('register/', async_views.register_view, name='register'),
+    path('login/', async_views.login_view, name='login'),
+    path('logout/', async_views.logout_view, name='logout'),
+    
+    # Token refresh
+    path('token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
+    
+    # Profile endpoints
+    path('profile/', async_views.profile_view, name='profile'),
+    path('profile/batch/', views.profile_batch_view, name='profile_batch'),
+    path('change-password/', async_views.change_password_view, name='change_password'),
+    path('delete-account/', async_views.delete_account_view, name='delete_account'),
+    
+    # Directory search
+    path('directory/', views.directory_view, name='directory'),
+    
+    # Online presence
+    path('presence/', views.presence_view, name='presence'),
+    
+    # Staff-only streaming export
+    re_path(r'^users/export\.(?P<export_format>csv|ndjson)$', views.export_users_view, name='export_users'),
+]
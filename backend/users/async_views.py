@@ -0,0 +1,269 @@
+"""
+Native async versions of the views in users/views.py for ASGI deployments.
+
+They return the same payloads and status codes as the DRF views, but every
+database access goes through Django's async ORM, tokens are validated
+without a thread hop, and password hashing is awaited on the hashing pool.
+config/urls.py routes to these when USERS_ASYNC_VIEWS is enabled (the
+default under config/asgi.py); WSGI deployments keep the sync views.
+"""
+import json
+from functools import wraps
+
+from django.contrib.auth import get_user_model
+from django.http import HttpResponse
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework import serializers, status
+from rest_framework.exceptions import APIException, AuthenticationFailed, NotAuthenticated, ParseError, Throttled
+from rest_framework_simplejwt.exceptions import TokenError
+
+from . import deletion, hashing, routers
+from .authentication import CachedJWTAuthentication
+from .serializers import (
+    EMAIL_REGISTERED_MESSAGE,
+    EMAIL_TAKEN_MESSAGE,
+    OLD_PASSWORD_INCORRECT_MESSAGE,
+    FastUserSerializer,
+    AsyncUserRegistrationSerializer,
+    AsyncUserProfileUpdateSerializer,
+    AsyncChangePasswordSerializer
+)
+from .throttling import LoginThrottle
+from .timing import TimedJsonResponse
+from .tokens import AsyncRefreshToken, arefresh_for_user
+from .usernames import acreate_user
+from .views import etag_matches, profile_etag, requested_profile_fields, with_profile_etag
+
+User = get_user_model()
+
+
+def _exception_response(exc, authenticator):
+    """Render an APIException the way DRF's default exception handler does"""
+    if isinstance(exc, (NotAuthenticated, AuthenticationFailed)):
+        exc.status_code = status.HTTP_401_UNAUTHORIZED
+    data = exc.detail if isinstance(exc.detail, (list, dict)) else {'detail': exc.detail}
+    response = TimedJsonResponse(data, status=exc.status_code, safe=False)
+    if exc.status_code == status.HTTP_401_UNAUTHORIZED:
+        response['WWW-Authenticate'] = authenticator.authenticate_header(None)
+    if getattr(exc, 'wait', None):
+        response['Retry-After'] = '%d' % exc.wait
+    return response
+
+
+def async_api_view(methods, authenticated=True):
+    """
+    Minimal async stand-in for DRF's @api_view: method check, JSON body
+    parsing into ``request.data``, JWT authentication into ``request.user``
+    and APIException rendering.
+    """
+    def decorator(view):
+        @csrf_exempt
+        @wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            authenticator = CachedJWTAuthentication()
+            if request.method not in methods:
+                return TimedJsonResponse(
+                    {'detail': f'Method "{request.method}" not allowed.'},
+                    status=status.HTTP_405_METHOD_NOT_ALLOWED,
+                    headers={'Allow': ', '.join(methods)},
+                )
+            try:
+                try:
+                    request.data = json.loads(request.body or b'{}')
+                except ValueError as e:
+                    raise ParseError(f'JSON parse error - {e}')
+                if not isinstance(request.data, dict):
+                    raise ParseError('Expected a JSON object.')
+
+                if authenticated:
+                    result = await authenticator.aauthenticate(request)
+                    if result is None:
+                        raise NotAuthenticated()
+                    request.user, request.auth = result
+                return await view(request, *args, **kwargs)
+            except APIException as exc:
+                return _exception_response(exc, authenticator)
+        return wrapper
+    return decorator
+
+
+@async_api_view(['POST'], authenticated=False)
+async def register_view(request):
+    """
+    POST /api/auth/register/
+    Register a new user account
+    """
+    serializer = AsyncUserRegistrationSerializer(data=request.data)
+    if not serializer.is_valid():
+        return TimedJsonResponse(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+    data = serializer.validated_data
+    if await User.objects.filter(email=data['email']).aexists():
+        return TimedJsonResponse({'email': [EMAIL_REGISTERED_MESSAGE]}, status=status.HTTP_400_BAD_REQUEST)
+
+    user = await acreate_user(
+        email=data['email'],
+        password=data['password'],
+        first_name=data.get('first_name', ''),
+        last_name=data.get('last_name', '')
+    )
+    refresh = await arefresh_for_user(user)
+
+    return TimedJsonResponse({
+        'user': FastUserSerializer(user).data,
+        'access': str(refresh.access_token),
+        'refresh': str(refresh),
+        'message': 'User registered successfully'
+    }, status=status.HTTP_201_CREATED)
+
+
+@async_api_view(['POST'], authenticated=False)
+async def login_view(request):
+    """
+    POST /api/auth/login/
+    Login with email and password, returns JWT tokens
+    """
+    throttle = LoginThrottle()
+    if not await throttle.aallow_request(request):
+        raise Throttled(wait=throttle.wait())
+
+    email = request.data.get('email')
+    password = request.data.get('password')
+
+    if not email or not password:
+        return TimedJsonResponse({
+            'error': 'Please provide both email and password'
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        user = await User.objects.using(await routers.aread_alias(email=email)).aget(email=email)
+    except User.DoesNotExist:
+        return TimedJsonResponse({'error': 'Invalid credentials'}, status=status.HTTP_401_UNAUTHORIZED)
+
+    if not await hashing.acheck_password(user, password):
+        return TimedJsonResponse({'error': 'Invalid credentials'}, status=status.HTTP_401_UNAUTHORIZED)
+
+    if not user.is_active:
+        return TimedJsonResponse({'error': 'User account is disabled'}, status=status.HTTP_401_UNAUTHORIZED)
+
+    refresh = await arefresh_for_user(user)
+
+    return TimedJsonResponse({
+        'user': FastUserSerializer(user).data,
+        'access': str(refresh.access_token),
+        'refresh': str(refresh),
+        'message': 'Login successful'
+    }, status=status.HTTP_200_OK)
+
+
+@async_api_view(['POST'])
+async def logout_view(request):
+    """
+    POST /api/auth/logout/
+    Logout user by blacklisting refresh token
+    """
+    refresh_token = request.data.get('refresh')
+    if refresh_token:
+        try:
+            token = AsyncRefreshToken(refresh_token)
+            await token.acheck_blacklist()
+            await token.ablacklist()
+        except TokenError:
+            return TimedJsonResponse({'error': 'Invalid token'}, status=status.HTTP_400_BAD_REQUEST)
+
+    return TimedJsonResponse({'message': 'Logout successful'}, status=status.HTTP_200_OK)
+
+
+@routers.read_replica
+@async_api_view(['GET', 'PUT'])
+async def profile_view(request):
+    """
+    GET /api/auth/profile/ - Get user profile (?fields=theme,email for a subset)
+    PUT /api/auth/profile/ - Update user profile
+    """
+    user = request.user
+
+    if request.method == 'GET':
+        try:
+            fields = requested_profile_fields(request.GET)
+        except serializers.ValidationError as e:
+            return TimedJsonResponse({
+                'error': 'Invalid data',
+                'details': {'fields': e.detail}
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        etag = profile_etag(user, fields)
+        if etag_matches(request, etag):
+            return with_profile_etag(HttpResponse(status=status.HTTP_304_NOT_MODIFIED), etag)
+        return with_profile_etag(TimedJsonResponse({
+            'user': FastUserSerializer(user, fields).data
+        }, status=status.HTTP_200_OK), etag)
+
+    serializer = AsyncUserProfileUpdateSerializer(user, data=request.data, partial=True)
+    if not serializer.is_valid():
+        return TimedJsonResponse({
+            'error': 'Invalid data',
+            'details': serializer.errors
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    email = serializer.validated_data.get('email')
+    if email is not None and await User.objects.filter(email=email).exclude(pk=user.pk).aexists():
+        return TimedJsonResponse({
+            'error': 'Invalid data',
+            'details': {'email': [EMAIL_TAKEN_MESSAGE]}
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    await serializer.asave()
+    return with_profile_etag(TimedJsonResponse({
+        'user': FastUserSerializer(user).data,
+        'message': 'Profile updated successfully'
+    }, status=status.HTTP_200_OK), profile_etag(user))
+
+
+@async_api_view(['POST'])
+async def change_password_view(request):
+    """
+    POST /api/auth/change-password/
+    Change user password
+    """
+    user = request.user
+    serializer = AsyncChangePasswordSerializer(data=request.data, context={'request': request})
+    errors = {} if serializer.is_valid() else dict(serializer.errors)
+
+    old_password = request.data.get('old_password')
+    if old_password and 'old_password' not in errors:
+        if not await hashing.acheck_password(user, old_password):
+            errors = {**errors, 'old_password': [OLD_PASSWORD_INCORRECT_MESSAGE]}
+
+    if errors:
+        return TimedJsonResponse({
+            'error': 'Invalid data',
+            'details': errors
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    await hashing.aset_password(user, serializer.validated_data['new_password'])
+    await user.asave()
+
+    return TimedJsonResponse({'message': 'Password changed successfully'}, status=status.HTTP_200_OK)
+
+
+@async_api_view(['DELETE'])
+async def delete_account_view(request):
+    """
+    DELETE /api/auth/delete-account/
+    Delete user account
+    """
+    user = request.user
+
+    password = request.data.get('password')
+    if not password:
+        return TimedJsonResponse({
+            'error': 'Password is required to delete account'
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    if not await hashing.acheck_password(user, password):
+        return TimedJsonResponse({'error': 'Incorrect password'}, status=status.HTTP_401_UNAUTHORIZED)
+
+    await deletion.adeactivate_account(user)
+
+    return TimedJsonResponse({'message': 'Account deleted successfully'}, status=status.HTTP_200_OK)
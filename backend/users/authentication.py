@@ -0,0 +1,94 @@
+from django.contrib.auth import get_user_model
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from . import presence
+from .cache import aget_cached_user, get_cached_user
+from .routers import aunless_pinned, unless_pinned
+from .timing import phase
+
+User = get_user_model()
+
+
+def load_user(user_id):
+    """
+    Fetch a user from the database, or None if it does not exist. On replica
+    paths a user who just wrote is read from the primary, so the user cache
+    is never filled with a lagging copy (see users/routers.py).
+    """
+    try:
+        with unless_pinned(user_id):
+            return User.objects.get(**{api_settings.USER_ID_FIELD: user_id})
+    except User.DoesNotExist:
+        return None
+
+
+async def aload_user(user_id):
+    """Async variant of load_user()"""
+    try:
+        async with aunless_pinned(user_id):
+            return await User.objects.aget(**{api_settings.USER_ID_FIELD: user_id})
+    except User.DoesNotExist:
+        return None
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWT authentication that resolves ``request.user`` from the user cache
+    instead of querying the users table on every request.
+    """
+
+    def authenticate(self, request):
+        with phase('auth'):
+            return super().authenticate(request)
+
+    def get_user(self, validated_token):
+        user = get_cached_user(self._user_id(validated_token), load_user)
+        return self._check_user(user, validated_token)
+
+    async def aget_user(self, validated_token):
+        user = await aget_cached_user(self._user_id(validated_token), aload_user)
+        return self._check_user(user, validated_token)
+
+    async def aauthenticate(self, request):
+        """
+        Async counterpart of authenticate() for plain Django async views.
+        Token validation is CPU-only; the user comes from the cache or the
+        async ORM.
+        """
+        with phase('auth'):
+            header = self.get_header(request)
+            if header is None:
+                return None
+
+            raw_token = self.get_raw_token(header)
+            if raw_token is None:
+                return None
+
+            validated_token = self.get_validated_token(raw_token)
+            return await self.aget_user(validated_token), validated_token
+
+    def _user_id(self, validated_token):
+        try:
+            return validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError as e:
+            raise InvalidToken(_("Token contained no recognizable user identification")) from e
+
+    def _check_user(self, user, validated_token):
+        if user is None:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found")
+
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != get_md5_hash_password(user.password):
+                raise AuthenticationFailed(
+                    _("The user's password has been changed."), code="password_changed"
+                )
+
+        presence.heartbeat(user)
+        return user
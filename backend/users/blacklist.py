@@ -0,0 +1,243 @@
+"""
+In-memory Bloom filter of blacklisted refresh-token JTIs.
+
+Every token refresh and logout asks simplejwt whether the presented token
+is blacklisted, which is a join against the token_blacklist tables. Almost
+every answer is "no", so each process keeps a Bloom filter of blacklisted
+JTIs and only queries the database when the filter reports a possible
+match.
+
+Blacklist writes reach other processes through a delta log in the shared
+cache: a sequence counter plus one entry per blacklisted JTI. Each check
+reads the counter and folds in any entries this process has not seen. If
+an entry is missing (evicted, or the cache was flushed) or the filter
+outgrows its capacity, it is rebuilt from the database, so a gap can cost
+a query but never lets a blacklisted token through.
+
+Configured through the BLACKLIST_FILTER setting.
+"""
+import hashlib
+import math
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+
+DEFAULTS = {
+    'ENABLED': True,
+    'CACHE_ALIAS': 'default',
+    'CAPACITY': 100000,       # expected blacklisted JTIs; grows on rebuild
+    'ERROR_RATE': 0.001,      # false positive rate at capacity
+    'LOG_TIMEOUT': 86400,     # seconds delta log entries are kept
+    'MAX_DELTA': 1000,        # unseen entries to fetch before rebuilding instead
+}
+
+SEQ_KEY = 'users:blacklist:seq'
+
+
+def get_setting(name):
+    """Read a BLACKLIST_FILTER setting, falling back to the module defaults"""
+    return getattr(settings, 'BLACKLIST_FILTER', {}).get(name, DEFAULTS[name])
+
+
+def _shared_cache():
+    return caches[get_setting('CACHE_ALIAS')]
+
+
+def _entry_key(seq):
+    return f'users:blacklist:entry:{seq}'
+
+
+def _current_seq(cache):
+    """
+    Read the delta log position. Like user cache versions, the counter
+    starts from a nanosecond timestamp, so a counter lost to eviction comes
+    back far ahead of every filter and forces a rebuild instead of silently
+    reusing sequence numbers.
+    """
+    seq = cache.get(SEQ_KEY)
+    if seq is None:
+        cache.add(SEQ_KEY, time.time_ns(), timeout=None)
+        seq = cache.get(SEQ_KEY)
+    return seq
+
+
+async def _acurrent_seq(cache):
+    seq = await cache.aget(SEQ_KEY)
+    if seq is None:
+        await cache.aadd(SEQ_KEY, time.time_ns(), timeout=None)
+        seq = await cache.aget(SEQ_KEY)
+    return seq
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over strings using double hashing"""
+
+    def __init__(self, capacity, error_rate):
+        self.capacity = max(1, capacity)
+        self.size = max(8, int(-self.capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / self.capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, value):
+        digest = hashlib.blake2b(value.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hashes))
+
+    def add(self, value):
+        for position in self._positions(value):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, value):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(value))
+
+
+class BlacklistFilter:
+    """This process's Bloom filter and the delta log position it reflects"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.bloom = None
+        self.seq = 0
+
+    def install(self, seq, jtis):
+        """Replace the filter with one built from ``jtis`` as of log position ``seq``"""
+        capacity = max(get_setting('CAPACITY'), 2 * len(jtis))
+        bloom = BloomFilter(capacity, get_setting('ERROR_RATE'))
+        for jti in jtis:
+            bloom.add(jti)
+        with self._lock:
+            self.bloom, self.seq = bloom, seq
+
+    def add(self, jti):
+        with self._lock:
+            if self.bloom is None:
+                return
+            self.bloom.add(jti)
+            if self.bloom.count > self.bloom.capacity:
+                # Past capacity the false positive rate climbs; rebuild bigger on the next check
+                self.bloom = None
+
+    def missing(self, seq):
+        """Delta log keys between this filter's position and ``seq``, or None if a rebuild is needed"""
+        if self.bloom is None or seq < self.seq or seq - self.seq > get_setting('MAX_DELTA'):
+            return None
+        return [_entry_key(n) for n in range(self.seq + 1, seq + 1)]
+
+    def apply(self, seq, entries):
+        """Fold fetched delta log entries in; False if any were missing"""
+        with self._lock:
+            if self.bloom is None:
+                return False
+            for n in range(self.seq + 1, seq + 1):
+                jti = entries.get(_entry_key(n))
+                if jti is None:
+                    return False
+                self.bloom.add(jti)
+            self.seq = max(self.seq, seq)
+            if self.bloom.count > self.bloom.capacity:
+                self.bloom = None
+                return False
+        return True
+
+    def __contains__(self, jti):
+        bloom = self.bloom
+        return bloom is None or jti in bloom
+
+
+_filter = BlacklistFilter()
+
+
+def _blacklisted_jtis():
+    return BlacklistedToken.objects.values_list('token__jti', flat=True)
+
+
+def rebuild():
+    """Rebuild this process's filter from the blacklist table"""
+    # Read the log position first: anything logged after it is folded in by the next check
+    seq = _current_seq(_shared_cache())
+    _filter.install(seq, list(_blacklisted_jtis()))
+
+
+async def arebuild():
+    """Async variant of rebuild()"""
+    seq = await _acurrent_seq(_shared_cache())
+    _filter.install(seq, [jti async for jti in _blacklisted_jtis()])
+
+
+def might_be_blacklisted(jti):
+    """
+    False when ``jti`` is definitely not blacklisted. True means the caller
+    must check the database.
+    """
+    if not get_setting('ENABLED'):
+        return True
+    cache = _shared_cache()
+    seq = _current_seq(cache)
+    if seq != _filter.seq or _filter.bloom is None:
+        keys = _filter.missing(seq)
+        if keys is None or not _filter.apply(seq, cache.get_many(keys)):
+            rebuild()
+    return jti in _filter
+
+
+async def amight_be_blacklisted(jti):
+    """Async variant of might_be_blacklisted()"""
+    if not get_setting('ENABLED'):
+        return True
+    cache = _shared_cache()
+    seq = await _acurrent_seq(cache)
+    if seq != _filter.seq or _filter.bloom is None:
+        keys = _filter.missing(seq)
+        if keys is None or not _filter.apply(seq, await cache.aget_many(keys)):
+            await arebuild()
+    return jti in _filter
+
+
+def record_local(jti):
+    """Add a newly blacklisted JTI to this process's filter"""
+    _filter.add(jti)
+
+
+def publish(jti):
+    """Append a committed blacklist write to the shared delta log for other processes"""
+    cache = _shared_cache()
+    _current_seq(cache)
+    try:
+        seq = cache.incr(SEQ_KEY)
+    except ValueError:
+        # Counter evicted since the read; the new one starts far ahead, so
+        # every filter rebuilds from the database and picks this JTI up
+        _current_seq(cache)
+        return
+    cache.set(_entry_key(seq), jti, timeout=get_setting('LOG_TIMEOUT'))
+
+
+def publish_many(jtis):
+    """publish() for a batch of JTIs, with one counter increment and one cache write"""
+    jtis = list(jtis)
+    if not jtis:
+        return
+    cache = _shared_cache()
+    _current_seq(cache)
+    try:
+        last = cache.incr(SEQ_KEY, len(jtis))
+    except ValueError:
+        _current_seq(cache)
+        return
+    if len(jtis) > get_setting('MAX_DELTA'):
+        # Every other filter is now more than MAX_DELTA behind and rebuilds
+        # from the database, so the entries would never be read
+        return
+    first = last - len(jtis) + 1
+    cache.set_many({_entry_key(first + n): jti for n, jti in enumerate(jtis)}, timeout=get_setting('LOG_TIMEOUT'))
+
+
+def reset():
+    """Forget this process's filter (used by tests)"""
+    _filter.bloom, _filter.seq = None, 0
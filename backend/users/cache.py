@@ -0,0 +1,209 @@
+"""
+Two-level cache for resolved User instances.
+
+A small per-process LRU sits in front of Django's shared cache. Entries are
+keyed by user id and a row version kept in the shared cache; saving or
+deleting a User bumps that version (see users/signals.py), so every process
+drops its stale copy on the next lookup.
+
+Writes that bypass ``Model.save()``/``Model.delete()`` (``QuerySet.update()``,
+raw SQL) must call ``invalidate_user()`` themselves.
+"""
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+DEFAULTS = {
+    'CACHE_ALIAS': 'default',
+    'LRU_SIZE': 1024,
+    'TIMEOUT': 300,
+}
+
+
+def get_setting(name):
+    """Read a USER_CACHE setting, falling back to the module defaults"""
+    return getattr(settings, 'USER_CACHE', {}).get(name, DEFAULTS[name])
+
+
+def _shared_cache():
+    return caches[get_setting('CACHE_ALIAS')]
+
+
+def _version_key(user_id):
+    return f'users:user:{user_id}:version'
+
+
+def _entry_key(user_id, version):
+    return f'users:user:{user_id}:{version}'
+
+
+class LRUCache:
+    """Thread-safe, size-bounded mapping that evicts the least recently used key"""
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            try:
+                self._data.move_to_end(key)
+            except KeyError:
+                return None
+            return self._data[key]
+
+    def set(self, key, value):
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+_local = LRUCache(get_setting('LRU_SIZE'))
+
+
+def get_user_version(user_id):
+    """
+    Return the current row version for a user.
+
+    Versions start from a nanosecond timestamp rather than 0 so that a version
+    lost to cache eviction is never handed out again for different row data.
+    """
+    cache = _shared_cache()
+    version = cache.get(_version_key(user_id))
+    if version is None:
+        cache.add(_version_key(user_id), time.time_ns(), timeout=None)
+        version = cache.get(_version_key(user_id))
+    return version
+
+
+def bump_user_version(user_id):
+    """Move a user to a new version, orphaning every cached copy of the old one"""
+    cache = _shared_cache()
+    try:
+        version = cache.incr(_version_key(user_id))
+    except ValueError:
+        version = time.time_ns()
+        cache.set(_version_key(user_id), version, timeout=None)
+    _local.pop(user_id)
+    return version
+
+
+def invalidate_user(user_id, user=None):
+    """
+    Invalidate cached copies of a user.
+
+    The version is bumped immediately and again once the surrounding
+    transaction commits, so a reader that repopulated the cache from
+    not-yet-committed state cannot leave a stale entry behind. Returns the
+    immediate new version.
+
+    When the saved instance is passed as ``user``, its ``_cache_version``
+    follows both bumps, so an ETag computed from it after the commit names
+    the version the next read will see.
+    """
+    version = bump_user_version(user_id)
+    if user is not None:
+        user._cache_version = version
+
+    def bump_after_commit():
+        committed = bump_user_version(user_id)
+        if user is not None:
+            user._cache_version = committed
+
+    # Under autocommit this runs at once, after the stamp above
+    transaction.on_commit(bump_after_commit)
+    return version
+
+
+def _lookup(user_id):
+    """Return (version, user) from the LRU or shared cache; user is None on a miss"""
+    version = get_user_version(user_id)
+
+    entry = _local.get(user_id)
+    if entry is not None and entry[0] == version:
+        return version, entry[1]
+
+    user = _shared_cache().get(_entry_key(user_id, version))
+    if user is not None:
+        _local.set(user_id, (version, user))
+    return version, user
+
+
+def _remember(user_id, version, user):
+    _shared_cache().set(_entry_key(user_id, version), user, timeout=get_setting('TIMEOUT'))
+    _local.set(user_id, (version, user))
+
+
+def get_cached_user(user_id, loader):
+    """
+    Resolve a user through the per-process LRU, then the shared cache, then
+    ``loader(user_id)``. Returns a private copy so callers may mutate it, or
+    None when the loader finds no user.
+
+    The copy carries the version it was resolved under as ``_cache_version``;
+    the row can only be the same age or newer than that version.
+    """
+    version, user = _lookup(user_id)
+    if user is None:
+        user = loader(user_id)
+        if user is None:
+            return None
+        _remember(user_id, version, user)
+    return _versioned_copy(user, version)
+
+
+async def aget_cached_user(user_id, loader):
+    """
+    Async variant of get_cached_user() taking a coroutine ``loader``. Cache
+    lookups stay synchronous; they are in-memory or a single network round trip.
+    """
+    version, user = _lookup(user_id)
+    if user is None:
+        user = await loader(user_id)
+        if user is None:
+            return None
+        _remember(user_id, version, user)
+    return _versioned_copy(user, version)
+
+
+def _versioned_copy(user, version):
+    user = copy.copy(user)
+    user._cache_version = version
+    return user
+
+
+def user_version_for(user):
+    """
+    Return the version describing ``user``'s in-memory state: the version it
+    was resolved under, or the current one for instances loaded elsewhere.
+    """
+    version = getattr(user, '_cache_version', None)
+    if version is None:
+        version = get_user_version(user.pk)
+    return version
+
+
+def clear_local_cache():
+    """Drop every entry from this process's LRU"""
+    _local.clear()
@@ -0,0 +1,216 @@
+"""
+Two-phase account deletion.
+
+``user.delete()`` removes a user and everything that references it (admin
+log entries, queued notification events and group/permission links are
+cascaded, every OutstandingToken has its user nulled) in a single
+transaction whose length grows with the account's history, holding the
+write lock throughout, and leaves the account's refresh tokens
+un-blacklisted.
+
+Instead, deactivate_account() only soft-deletes: it marks the user inactive
+with ``deletion_requested_at`` set, replaces its email with a placeholder
+and revokes every live refresh token in one INSERT ... SELECT into the
+blacklist. The account can no longer log in, refresh or authenticate from
+that moment, and its email address is free to register again at once.
+
+purge_deleted_accounts() later removes the marked accounts: each user's
+dependent rows go in bounded batches of single set-based DELETE statements
+(no collector, no per-row signals), each batch in its own short transaction,
+and the user row itself goes last. It runs from the purge_deleted_accounts
+management command, or periodically in-process when ACCOUNT_DELETION
+INTERVAL is set.
+"""
+import logging
+import secrets
+import threading
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.admin.models import LogEntry
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.db import connection, transaction
+from django.utils import timezone
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+
+from . import blacklist, purge
+from .cache import invalidate_user
+from .models import DirectoryEntry, LastSeen, NotificationEvent
+
+logger = logging.getLogger(__name__)
+
+User = get_user_model()
+
+DEFAULTS = {
+    'BATCH_SIZE': 1000,       # dependent rows deleted per transaction
+    'PAUSE': 0.1,             # seconds slept between batches
+    'INTERVAL': 0,            # seconds between in-process runs; 0 disables them
+    'CACHE_ALIAS': 'default',
+}
+
+LOCK_KEY = 'users:deletion:lock'
+
+# Rows that reference a user, deleted in this order before the user row.
+# (metric name, model, user column); blacklist entries go with their tokens.
+DEPENDENTS = [
+    ('tokens_deleted', OutstandingToken, 'user_id'),
+    ('log_entries_deleted', LogEntry, 'user_id'),
+    ('notification_events_deleted', NotificationEvent, 'user_id'),
+    ('directory_entries_deleted', DirectoryEntry, 'user_id'),
+    ('last_seen_deleted', LastSeen, 'user_id'),
+    ('groups_deleted', User.groups.through, 'user_id'),
+    ('permissions_deleted', User.user_permissions.through, 'user_id'),
+]
+
+
+def get_setting(name):
+    """Read an ACCOUNT_DELETION setting, falling back to the module defaults"""
+    return getattr(settings, 'ACCOUNT_DELETION', {}).get(name, DEFAULTS[name])
+
+
+def _raw_delete(queryset):
+    """Delete ``queryset`` with one DELETE statement, skipping the collector and signals"""
+    return queryset._raw_delete(queryset.db)
+
+
+def _revoke_tokens(user_id, now):
+    """Blacklist every live refresh token of a user in one statement; returns their JTIs"""
+    outstanding = connection.ops.quote_name(OutstandingToken._meta.db_table)
+    blacklisted = connection.ops.quote_name(BlacklistedToken._meta.db_table)
+    live = OutstandingToken.objects.filter(user_id=user_id, expires_at__gt=now, blacklistedtoken__isnull=True)
+    jtis = list(live.values_list('jti', flat=True))
+    if jtis:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'INSERT INTO {blacklisted} (token_id, blacklisted_at) '
+                f'SELECT o.id, %s FROM {outstanding} o '
+                f'WHERE o.user_id = %s AND o.expires_at > %s '
+                f'AND NOT EXISTS (SELECT 1 FROM {blacklisted} b WHERE b.token_id = o.id)',
+                [now, user_id, now],
+            )
+    return jtis
+
+
+def released_email(user_id):
+    """
+    Placeholder email for a deactivated account. Unique and unguessable, so
+    nobody can register it first and block the deactivation.
+    """
+    return f'deleted-{user_id}-{secrets.token_hex(8)}@deleted.invalid'
+
+
+def deactivate_account(user):
+    """
+    Soft-delete ``user``: mark it inactive and pending deletion, release its
+    email address and revoke its refresh tokens. Returns the number of
+    tokens revoked.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        user.is_active = False
+        user.deletion_requested_at = now
+        # Login by the old address now finds no account, exactly as after the
+        # purge, and the address can register again
+        user.email = released_email(user.pk)
+        # save() rather than update() so the cache, replica-pin and directory signals fire
+        user.save(update_fields=['is_active', 'deletion_requested_at', 'email'])
+        jtis = _revoke_tokens(user.pk, now)
+        # The rows bypassed post_save, so feed the blacklist Bloom filters directly
+        for jti in jtis:
+            blacklist.record_local(jti)
+        transaction.on_commit(lambda: blacklist.publish_many(jtis))
+    return len(jtis)
+
+
+async def adeactivate_account(user):
+    """Async variant of deactivate_account()"""
+    return await sync_to_async(deactivate_account)(user)
+
+
+def _purge_batch(user_id, batch_size):
+    """
+    Delete up to ``batch_size`` dependent rows of one pending account, or
+    the account itself once none are left. Returns (metric name, rows).
+    """
+    with transaction.atomic():
+        for name, model, column in DEPENDENTS:
+            ids = list(model.objects.filter(**{column: user_id}).values_list('pk', flat=True)[:batch_size])
+            if not ids:
+                continue
+            if model is OutstandingToken:
+                _raw_delete(BlacklistedToken.objects.filter(token_id__in=ids))
+            return name, _raw_delete(model.objects.filter(pk__in=ids))
+
+        # Re-check the mark, so an account restored since it was queued survives
+        deleted = _raw_delete(User.objects.filter(pk=user_id, deletion_requested_at__isnull=False))
+    invalidate_user(user_id)
+    return 'users_deleted', deleted
+
+
+def purge_deleted_accounts(batch_size=None, pause=None, max_batches=None, on_batch=None):
+    """
+    Remove accounts marked by deactivate_account(), oldest request first.
+
+    Returns metrics for the run. ``on_batch(metrics)`` is called after each
+    batch for progress reporting.
+    """
+    batch_size = batch_size or get_setting('BATCH_SIZE')
+    pause = get_setting('PAUSE') if pause is None else pause
+    pending = User.objects.filter(deletion_requested_at__isnull=False).order_by('deletion_requested_at', 'pk')
+
+    metrics = {
+        'batches': 0,
+        'users_deleted': 0,
+        'seconds': 0.0,
+        **{name: 0 for name, _, _ in DEPENDENTS},
+    }
+    started = time.monotonic()
+    while max_batches is None or metrics['batches'] < max_batches:
+        user_id = pending.values_list('pk', flat=True).first()
+        if user_id is None:
+            break
+        if metrics['batches'] and pause:
+            time.sleep(pause)
+        name, rows = _purge_batch(user_id, batch_size)
+
+        metrics['batches'] += 1
+        metrics[name] += rows
+        metrics['seconds'] = time.monotonic() - started
+        if on_batch is not None:
+            on_batch(metrics)
+
+    metrics['seconds'] = time.monotonic() - started
+    return metrics
+
+
+class PeriodicAccountPurge(purge.PeriodicPurge):
+    """Daemon thread that purges deleted accounts every ACCOUNT_DELETION INTERVAL seconds"""
+    thread_name = 'account-purge'
+    lock_key = LOCK_KEY
+
+    def lock_cache(self):
+        return caches[get_setting('CACHE_ALIAS')]
+
+    def purge(self):
+        metrics = purge_deleted_accounts()
+        logger.info('Purged %(users_deleted)d deleted accounts and %(tokens_deleted)d tokens '
+                    'in %(batches)d batches (%(seconds).1fs)', metrics)
+
+
+_periodic = None
+_periodic_lock = threading.Lock()
+
+
+def start_periodic_purge():
+    """Start the in-process purge thread if ACCOUNT_DELETION INTERVAL is set; returns it or None"""
+    global _periodic
+    interval = get_setting('INTERVAL')
+    if not interval:
+        return None
+    with _periodic_lock:
+        if _periodic is None:
+            _periodic = PeriodicAccountPurge(interval)
+            _periodic.start()
+    return _periodic
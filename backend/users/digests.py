@@ -0,0 +1,212 @@
+"""
+Digest scheduler for pending notifications.
+
+Notifications are queued as NotificationEvent rows (enqueue()) and sent in
+digests whose size follows each user's ``digest_frequency``: events fall
+into UTC-aligned windows (one hour, one calendar day, or a week starting
+Monday), and once a window has closed all of a user's events up to it go
+out together as one Digest. ``instant`` users get whatever is pending on
+every tick. A user inside their do-not-disturb window (see
+audience.quiet_hours()) is skipped, and their digest goes out on the first
+tick after the window ends. Events of inactive users are discarded rather
+than kept for a digest that would never go out.
+
+Each DigestScheduler.tick() works in bulk: per frequency, one query finds
+the users with closed windows, then users and events are read, sent and
+deleted BATCH_SIZE users at a time. Events are only deleted once the
+sender returns, so a failed send is retried on the next tick.
+
+Senders are pluggable through DIGESTS SENDER: any object with a
+``send(digests)`` method. LogSender (the default) logs each digest and
+MemorySender keeps them in a list for tests. Run it with the run_digests
+management command; the clock is injectable so tests can drive windows
+without waiting.
+"""
+import logging
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone as dt_timezone
+from itertools import islice
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .audience import minute_of_day, quiet_hours
+from .models import NotificationEvent
+
+logger = logging.getLogger(__name__)
+
+User = get_user_model()
+
+DEFAULTS = {
+    'SENDER': 'users.digests.LogSender',
+    'BATCH_SIZE': 500,    # users read, sent and deleted together
+    'INTERVAL': 60,       # seconds between ticks of run_digests
+}
+
+# User.DIGEST_FREQUENCY_CHOICES values, each a window length (see window_start())
+FREQUENCIES = ('instant', 'hourly', 'daily', 'weekly')
+
+# Event ids per DELETE, under SQLite's bound parameter limit
+DELETE_CHUNK = 500
+
+
+def get_setting(name):
+    """Read a DIGESTS setting, falling back to the module defaults"""
+    return getattr(settings, 'DIGESTS', {}).get(name, DEFAULTS[name])
+
+
+def window_start(at, frequency):
+    """Start of the UTC window containing ``at`` for ``frequency`` (``at`` itself for instant)"""
+    at = at.astimezone(dt_timezone.utc) if timezone.is_aware(at) else at.replace(tzinfo=dt_timezone.utc)
+    if frequency == 'instant':
+        return at
+    if frequency == 'hourly':
+        return at.replace(minute=0, second=0, microsecond=0)
+    day = at.replace(hour=0, minute=0, second=0, microsecond=0)
+    if frequency == 'daily':
+        return day
+    return day - timedelta(days=day.weekday())
+
+
+@dataclass
+class Digest:
+    """One user's events, from the window containing the oldest up to ``window_end``"""
+    user: User
+    frequency: str
+    window_start: datetime
+    window_end: datetime
+    events: list = field(default_factory=list)
+
+    def counts(self):
+        """Number of events per kind"""
+        counts = {}
+        for event in self.events:
+            counts[event.kind] = counts.get(event.kind, 0) + 1
+        return counts
+
+
+class LogSender:
+    """Logs a line per digest; stands in until a real delivery channel is configured"""
+
+    def send(self, digests):
+        for digest in digests:
+            logger.info('Digest for %s (%s, %d events): %s', digest.user.email, digest.frequency,
+                        len(digest.events), digest.counts())
+
+
+class MemorySender:
+    """Keeps sent digests in ``sent``, for tests"""
+
+    def __init__(self):
+        self.sent = []
+
+    def send(self, digests):
+        self.sent.extend(digests)
+
+
+def get_sender():
+    """Instance of the DIGESTS SENDER class"""
+    return import_string(get_setting('SENDER'))()
+
+
+def enqueue(user, kind, payload=None, created_at=None):
+    """Queue one notification for ``user``'s next digest"""
+    return NotificationEvent.objects.create(
+        user=user, kind=kind, payload=payload or {}, created_at=created_at or timezone.now(),
+    )
+
+
+def enqueue_many(user_ids, kind, payload=None, batch_size=2000):
+    """Queue the same notification for many users, e.g. an audience from users/audience.py"""
+    now = timezone.now()
+    user_ids = iter(user_ids)
+    queued = 0
+    while batch := list(islice(user_ids, batch_size)):
+        NotificationEvent.objects.bulk_create([
+            NotificationEvent(user_id=user_id, kind=kind, payload=payload or {}, created_at=now) for user_id in batch
+        ])
+        queued += len(batch)
+    return queued
+
+
+class DigestScheduler:
+    """Sends due digests on each tick(); ``clock`` returns the current time"""
+
+    def __init__(self, sender=None, clock=timezone.now, batch_size=None):
+        self.sender = sender or get_sender()
+        self.clock = clock
+        self.batch_size = batch_size or get_setting('BATCH_SIZE')
+
+    def tick(self):
+        """Send every digest due now; returns metrics for the tick"""
+        now = self.clock()
+        awake = User.dnd_enabled.lookup(False) | ~quiet_hours(minute_of_day(now))
+        metrics = {'digests': 0, 'events': 0, 'deferred': 0, 'discarded': 0}
+        for frequency in FREQUENCIES:
+            cutoff = window_start(now, frequency)
+            due = NotificationEvent.objects.filter(user__digest_frequency=frequency, created_at__lt=cutoff)
+            due_users = due.order_by('user_id').values_list('user_id', flat=True).distinct()
+            last = 0
+            while True:
+                user_ids = list(due_users.filter(user_id__gt=last)[:self.batch_size])
+                if not user_ids:
+                    break
+                last = user_ids[-1]
+                users = User.objects.filter(awake, pk__in=user_ids, is_active=True).in_bulk()
+                skipped = [user_id for user_id in user_ids if user_id not in users]
+                if skipped:
+                    self._skip(skipped, due, metrics)
+                if users:
+                    self._flush(users, due, frequency, cutoff, metrics)
+        return metrics
+
+    def _skip(self, user_ids, due, metrics):
+        # Users in quiet hours keep their events for a later tick; inactive
+        # ones never get a digest, so theirs are deleted instead of being
+        # found again on every tick
+        quiet = set(User.objects.filter(pk__in=user_ids, is_active=True).values_list('pk', flat=True))
+        inactive = [user_id for user_id in user_ids if user_id not in quiet]
+        if inactive:
+            deleted, _ = due.filter(user_id__in=inactive).delete()
+            metrics['discarded'] += deleted
+        metrics['deferred'] += len(quiet)
+
+    def _flush(self, users, due, frequency, cutoff, metrics):
+        digests = {}
+        for event in due.filter(user_id__in=users).order_by('user_id', 'created_at'):
+            digest = digests.get(event.user_id)
+            if digest is None:
+                digest = digests[event.user_id] = Digest(
+                    user=users[event.user_id], frequency=frequency,
+                    window_start=window_start(event.created_at, frequency), window_end=cutoff,
+                )
+            digest.events.append(event)
+
+        self.sender.send(list(digests.values()))
+
+        ids = [event.pk for digest in digests.values() for event in digest.events]
+        for start in range(0, len(ids), DELETE_CHUNK):
+            # No cascades or signals, so this is a single DELETE per chunk
+            NotificationEvent.objects.filter(pk__in=ids[start:start + DELETE_CHUNK]).delete()
+        metrics['digests'] += len(digests)
+        metrics['events'] += len(ids)
+
+    def run(self, interval=None, max_ticks=None, on_tick=None):
+        """Tick every ``interval`` seconds, forever or for ``max_ticks`` ticks"""
+        interval = get_setting('INTERVAL') if interval is None else interval
+        ticks = 0
+        while max_ticks is None or ticks < max_ticks:
+            if ticks:
+                time.sleep(interval)
+            ticks += 1
+            try:
+                metrics = self.tick()
+            except Exception:
+                # Unsent events stay queued and are retried on the next tick
+                logger.exception('Digest tick failed')
+                continue
+            if on_tick is not None:
+                on_tick(metrics)
@@ -0,0 +1,161 @@
+"""
+Searchable user directory.
+
+Only users with ``profile_searchable`` on (and active) are listed. Each
+listed user has one DirectoryEntry row per normalized word of their first
+name, last name and email local part: lower-cased, accents stripped, split
+on anything that is not a letter or digit. "José O'Brien" <jo.ob@x.com> is
+stored as jose, o, brien, jo and ob.
+
+A search normalizes the query the same way and requires every query word
+to be a prefix of one of the user's words. The first word drives a range
+scan of users_directory_key_idx in (key, user) order, which is also the
+result order, so a page costs one index seek plus ``limit`` rows however
+many users match; the other words are checked per user through
+users_directory_user_idx. Pages continue from an opaque keyset cursor
+instead of an offset.
+
+Entries are rewritten from the post_save signal whenever a save touches a
+field they depend on. Writes that bypass save() (``QuerySet.update()``,
+``bulk_create()``) must call index_users() themselves; ``manage.py
+rebuild_directory`` rebuilds the whole index.
+"""
+import base64
+import binascii
+import json
+import re
+import unicodedata
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Exists, F, OuterRef, Q
+from django.db.models.lookups import Exact
+
+from .models import DirectoryEntry
+
+User = get_user_model()
+
+# Fields the entries are built from; saving any of them reindexes the user
+INDEXED_FIELDS = {'first_name', 'last_name', 'email', 'is_active', 'preference_flags'}
+
+MAX_LIMIT = 50
+DEFAULT_LIMIT = 20
+
+_WORD_RE = re.compile(r'[^\W_]+')
+
+
+def normalize_words(text):
+    """Lower-case, accent-free words of ``text``"""
+    decomposed = unicodedata.normalize('NFKD', text or '')
+    stripped = ''.join(char for char in decomposed if not unicodedata.combining(char))
+    return _WORD_RE.findall(stripped.casefold())
+
+
+def entry_keys(first_name, last_name, email):
+    """Distinct directory words of a user, in order of appearance"""
+    local_part = (email or '').split('@', 1)[0]
+    words = normalize_words(first_name) + normalize_words(last_name) + normalize_words(local_part)
+    max_length = DirectoryEntry._meta.get_field('key').max_length
+    return list(dict.fromkeys(word[:max_length] for word in words))
+
+
+def is_listed(user):
+    return user.is_active and user.profile_searchable
+
+
+def index_user(user):
+    """Rewrite ``user``'s entries from its current field values"""
+    with transaction.atomic():
+        DirectoryEntry.objects.filter(user_id=user.pk).delete()
+        if is_listed(user):
+            DirectoryEntry.objects.bulk_create([
+                DirectoryEntry(user_id=user.pk, key=key)
+                for key in entry_keys(user.first_name, user.last_name, user.email)
+            ])
+
+
+def index_users(queryset, batch_size=2000):
+    """
+    Rewrite the entries of every user in ``queryset``, ``batch_size`` users
+    per transaction; returns the number of users listed.
+    """
+    queryset = queryset.order_by('pk')
+    mask = User.profile_searchable.mask
+    listed_count = 0
+    last = 0
+    while True:
+        batch = list(queryset.filter(pk__gt=last).values_list(
+            'pk', 'first_name', 'last_name', 'email', 'is_active', 'preference_flags',
+        )[:batch_size])
+        if not batch:
+            return listed_count
+        last = batch[-1][0]
+        entries = [
+            DirectoryEntry(user_id=pk, key=key)
+            for pk, first_name, last_name, email, is_active, flags in batch
+            if is_active and flags & mask
+            for key in entry_keys(first_name, last_name, email)
+        ]
+        with transaction.atomic():
+            DirectoryEntry.objects.filter(user_id__in=[row[0] for row in batch]).delete()
+            DirectoryEntry.objects.bulk_create(entries, batch_size=batch_size)
+        listed_count += len({entry.user_id for entry in entries})
+
+
+def _prefix_range(prefix, **filters):
+    """Q for keys starting with ``prefix``, as a range an index can seek"""
+    upper = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+    return Q(key__gte=prefix, key__lt=upper, **filters)
+
+
+def encode_cursor(key, user_id):
+    return base64.urlsafe_b64encode(json.dumps([key, user_id]).encode()).decode().rstrip('=')
+
+
+def decode_cursor(value):
+    """(key, user id) from a cursor; ValueError if malformed"""
+    try:
+        key, user_id = json.loads(base64.urlsafe_b64decode(value + '=' * (-len(value) % 4)))
+    except (binascii.Error, UnicodeDecodeError, TypeError, ValueError):
+        raise ValueError('Invalid cursor')
+    if not isinstance(key, str) or not isinstance(user_id, int):
+        raise ValueError('Invalid cursor')
+    return key, user_id
+
+
+def search(term, cursor=None, limit=DEFAULT_LIMIT, using=None):
+    """
+    One page of directory users matching ``term``, as (users, next cursor);
+    the cursor is None on the last page. ValueError if ``cursor`` is
+    malformed.
+    """
+    words = list(dict.fromkeys(normalize_words(term)))
+    if not words:
+        return [], None
+    first, others = words[0], words[1:]
+
+    entries = DirectoryEntry.objects.using(using) if using else DirectoryEntry.objects
+    matches = entries.filter(_prefix_range(first))
+    # A user with several words matching the first query word is listed
+    # once, at the smallest of them, so keyset pages never repeat a user
+    matches = matches.exclude(Exists(
+        entries.filter(_prefix_range(first, user_id=OuterRef('user_id')), key__lt=OuterRef('key'))
+    ))
+    for word in others:
+        matches = matches.filter(Exists(entries.filter(_prefix_range(word), user_id=OuterRef('user_id'))))
+    # Entries are rewritten on save; checking the row as well keeps writes
+    # that skipped the index from exposing unlisted users
+    mask = User.profile_searchable.mask
+    matches = matches.filter(Exact(F('user__preference_flags').bitand(mask), mask), user__is_active=True)
+
+    if cursor:
+        key, user_id = decode_cursor(cursor)
+        # The leading key >= bound keeps this a range seek on users_directory_key_idx
+        matches = matches.filter(Q(key__gte=key) & (Q(key__gt=key) | Q(user_id__gt=user_id)))
+
+    page = list(
+        matches.select_related('user').only('key', 'user__first_name', 'user__last_name')
+        .order_by('key', 'user_id')[:limit + 1]
+    )
+    next_cursor = encode_cursor(page[limit - 1].key, page[limit - 1].user_id) if len(page) > limit else None
+    return [entry.user for entry in page[:limit]], next_cursor
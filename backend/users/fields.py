@@ -0,0 +1,161 @@
+"""
+Compact column types for the preference settings on User.
+
+Preferences used to be one column each: 18 booleans, five short strings
+for choice fields and two 'HH:MM' strings. These types keep the same
+Python values on the model while storing far less per row:
+
+- ChoiceCodeField: a string choice stored as a small integer code
+- MinutesField: an 'HH:MM' time of day stored as minutes since midnight
+- BitFlag: a boolean attribute backed by one bit of an integer column
+
+Stored codes and bit positions are data: new choices and flags must be
+appended, never reordered or reused.
+"""
+import re
+
+from django import forms
+from django.core.exceptions import ValidationError
+from django.db import models
+from django.db.models import F
+from django.db.models.lookups import Exact
+from django.utils.functional import cached_property
+
+TIME_OF_DAY_RE = re.compile(r'^([01]\d|2[0-3]):([0-5]\d)$')
+
+
+def parse_time_of_day(value):
+    """Minutes since midnight for an 'HH:MM' string; ValueError if malformed"""
+    match = TIME_OF_DAY_RE.match(value) if isinstance(value, str) else None
+    if match is None:
+        raise ValueError(f'{value!r} is not a time of day in HH:MM format')
+    return int(match[1]) * 60 + int(match[2])
+
+
+def format_time_of_day(minutes):
+    """'HH:MM' for a number of minutes since midnight"""
+    return '%02d:%02d' % divmod(minutes, 60)
+
+
+class CompactIntegerField(models.PositiveSmallIntegerField):
+    """
+    Small integer column whose Python value is not the integer itself, so
+    the integer range validators do not apply to it.
+    """
+
+    @cached_property
+    def validators(self):
+        return [*self.default_validators, *self._validators]
+
+
+class ChoiceCodeField(CompactIntegerField):
+    """String choice stored as its position in ``choices``"""
+
+    @cached_property
+    def _values(self):
+        return [value for value, _ in self.flatchoices]
+
+    @cached_property
+    def _codes(self):
+        return {value: code for code, value in enumerate(self._values)}
+
+    def from_db_value(self, value, expression, connection):
+        return None if value is None else self._values[value]
+
+    def to_python(self, value):
+        if value is None or value in self._codes:
+            return value
+        if isinstance(value, int) and 0 <= value < len(self._values):
+            return self._values[value]
+        raise ValidationError(self.error_messages['invalid_choice'], code='invalid_choice', params={'value': value})
+
+    def get_prep_value(self, value):
+        if isinstance(value, str):
+            try:
+                value = self._codes[value]
+            except KeyError:
+                raise ValueError(f'{value!r} is not a valid choice for {self.name}')
+        return super().get_prep_value(value)
+
+
+class MinutesField(CompactIntegerField):
+    """'HH:MM' time of day stored as minutes since midnight"""
+
+    def from_db_value(self, value, expression, connection):
+        return None if value is None else format_time_of_day(value)
+
+    def to_python(self, value):
+        if value is None:
+            return value
+        if isinstance(value, int) and 0 <= value < 24 * 60:
+            return format_time_of_day(value)
+        try:
+            return format_time_of_day(parse_time_of_day(value))
+        except ValueError:
+            raise ValidationError('Enter a time of day in HH:MM format.', code='invalid', params={'value': value})
+
+    def get_prep_value(self, value):
+        if isinstance(value, str):
+            value = parse_time_of_day(value)
+        return super().get_prep_value(value)
+
+    def formfield(self, **kwargs):
+        return models.Field.formfield(self, **{'form_class': forms.CharField, 'max_length': 5, **kwargs})
+
+
+class BitFlag(property):
+    """
+    Boolean model attribute stored as one bit of an integer field.
+
+    Subclasses property so Django accepts it as a constructor keyword, e.g.
+    ``User(compact_mode=True)``. It is not a model field: query it with
+    ``User.objects.filter(User.compact_mode.lookup(True))`` and save it
+    through its storage field, see ``storage_fields()``.
+    """
+
+    def __init__(self, bit, default=False, storage='preference_flags'):
+        super().__init__()
+        self.bit = bit
+        self.mask = 1 << bit
+        self.default = default
+        self.storage = storage
+
+    def __set_name__(self, owner, name):
+        self.name = name
+        if '_bit_flags' not in owner.__dict__:
+            owner._bit_flags = {**getattr(owner, '_bit_flags', {})}
+        owner._bit_flags[name] = self
+
+    def __get__(self, instance, owner=None):
+        if instance is None:
+            return self
+        return bool(getattr(instance, self.storage) & self.mask)
+
+    def __set__(self, instance, value):
+        flags = getattr(instance, self.storage)
+        setattr(instance, self.storage, flags | self.mask if value else flags & ~self.mask)
+
+    def lookup(self, value=True):
+        """Filter expression matching rows where this flag equals ``value``"""
+        return Exact(F(self.storage).bitand(self.mask), self.mask if value else 0)
+
+
+def bit_flags(model):
+    """Name -> BitFlag for every flag declared on ``model``"""
+    return getattr(model, '_bit_flags', {})
+
+
+def default_flags(model, storage='preference_flags'):
+    """Integer value of ``storage`` with every flag at its default"""
+    return sum(flag.mask for flag in bit_flags(model).values() if flag.storage == storage and flag.default)
+
+
+def storage_fields(model, names):
+    """Map attribute names to the model fields that store them, for save(update_fields=...) and only()"""
+    flags = bit_flags(model)
+    fields = []
+    for name in names:
+        field = flags[name].storage if name in flags else name
+        if field not in fields:
+            fields.append(field)
+    return fields
@@ -0,0 +1,237 @@
+"""
+Password hashing off the request thread.
+
+PBKDF2 hashing and verification run in a bounded process pool so a burst of
+logins cannot pin every web worker thread. Requests wait on the pool's
+future (blocking for sync views, awaiting for async ones); when more than
+MAX_PENDING jobs are already queued or running, new ones are rejected with
+503 instead of piling up.
+
+Configured through the PASSWORD_HASHING setting; WORKERS = 0 hashes inline.
+Every web worker process starts its own pool, so a server runs
+web workers x WORKERS hashing processes: size WORKERS so that product is
+about the number of CPUs (e.g. 8 CPUs under 4 gunicorn workers: 2).
+"""
+import asyncio
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+
+from django.conf import settings
+from django.contrib.auth import hashers
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+from .timing import phase
+
+DEFAULTS = {
+    'WORKERS': 2,  # per web worker process, see above
+    'MAX_PENDING': 64,
+    'TIMEOUT': 10,  # seconds a request waits for its hashing job
+    'START_METHOD': 'spawn',  # forking a threaded web worker is unsafe
+}
+
+
+def get_setting(name):
+    """Read a PASSWORD_HASHING setting, falling back to the module defaults"""
+    return getattr(settings, 'PASSWORD_HASHING', {}).get(name, DEFAULTS[name])
+
+
+class HashingBusy(APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = 'The server is busy processing sign-ins. Please try again in a moment.'
+    default_code = 'hashing_busy'
+    wait = 1  # rendered as Retry-After by DRF's exception handler
+
+
+def init_worker(settings_module):
+    """Pool initializer: configure Django in a freshly started worker process"""
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', settings_module)
+    import django
+    django.setup()
+
+
+def _timed(func, *args):
+    """Run ``func`` in the worker, reporting when it started and how long it ran"""
+    started = time.time()
+    result = func(*args)
+    return started, time.time() - started, result
+
+
+def _verify(password, encoded):
+    """Return (matches, needs_rehash) for a raw password against a stored hash"""
+    matches = hashers.check_password(password, encoded)
+    return matches, matches and hashers.identify_hasher(encoded).must_update(encoded)
+
+
+class HashingExecutor:
+    """Process pool with a cap on outstanding jobs and queueing metrics"""
+
+    def __init__(self, workers, max_pending, timeout, start_method='spawn'):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self.start_method = start_method
+        self._pool = None
+        self._pool_lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._metrics_lock = threading.Lock()
+        self._metrics = {
+            'submitted': 0,
+            'completed': 0,  # jobs that returned; the averages are over these
+            'failed': 0,     # jobs that raised or were cancelled
+            'rejected': 0,
+            'in_flight': 0,
+            'queue_wait_seconds': 0.0,
+            'run_seconds': 0.0,
+        }
+
+    def _get_pool(self):
+        with self._pool_lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context(self.start_method),
+                    initializer=init_worker,
+                    initargs=(os.environ.get('DJANGO_SETTINGS_MODULE', 'config.settings'),),
+                )
+            return self._pool
+
+    def submit(self, func, *args):
+        """Queue ``func(*args)``; raises HashingBusy when MAX_PENDING jobs are outstanding"""
+        if not self._slots.acquire(blocking=False):
+            self._record(rejected=1)
+            raise HashingBusy()
+        self._record(submitted=1, in_flight=1)
+        submitted_at = time.time()
+        try:
+            future = self._get_pool().submit(_timed, func, *args)
+        except Exception:
+            self._slots.release()
+            self._record(in_flight=-1)
+            raise
+
+        def done(future):
+            self._slots.release()
+            if not future.cancelled() and future.exception() is None:
+                started, ran, _ = future.result()
+                self._record(completed=1, in_flight=-1,
+                             queue_wait_seconds=max(0.0, started - submitted_at), run_seconds=ran)
+            else:
+                self._record(failed=1, in_flight=-1)
+
+        future.add_done_callback(done)
+        return future
+
+    def run(self, func, *args):
+        """Run ``func(*args)`` in the pool and block until it finishes"""
+        if self.workers <= 0:
+            return func(*args)
+        try:
+            return self.submit(func, *args).result(timeout=self.timeout)[2]
+        except FutureTimeoutError:
+            raise HashingBusy()
+
+    async def arun(self, func, *args):
+        """Run ``func(*args)`` in the pool without blocking the event loop"""
+        if self.workers <= 0:
+            return func(*args)
+        future = asyncio.wrap_future(self.submit(func, *args))
+        try:
+            return (await asyncio.wait_for(future, self.timeout))[2]
+        except asyncio.TimeoutError:
+            raise HashingBusy()
+
+    def _record(self, **deltas):
+        with self._metrics_lock:
+            for name, delta in deltas.items():
+                self._metrics[name] += delta
+
+    def metrics(self):
+        """Snapshot of queueing metrics for logging or health checks"""
+        with self._metrics_lock:
+            snapshot = dict(self._metrics)
+        completed = snapshot['completed'] or 1
+        snapshot.update({
+            'workers': self.workers,
+            'max_pending': self.max_pending,
+            'avg_queue_wait_ms': snapshot['queue_wait_seconds'] / completed * 1000,
+            'avg_run_ms': snapshot['run_seconds'] / completed * 1000,
+        })
+        return snapshot
+
+    def shutdown(self):
+        with self._pool_lock:
+            if self._pool is not None:
+                self._pool.shutdown()
+                self._pool = None
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    """Return the process-wide hashing executor, creating it on first use"""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = HashingExecutor(
+                workers=get_setting('WORKERS'),
+                max_pending=get_setting('MAX_PENDING'),
+                timeout=get_setting('TIMEOUT'),
+                start_method=get_setting('START_METHOD'),
+            )
+        return _executor
+
+
+def make_password(password):
+    """Hash a raw password in the pool"""
+    with phase('hash'):
+        return get_executor().run(hashers.make_password, password)
+
+
+def set_password(user, password):
+    """Equivalent of ``user.set_password()`` with the hashing done in the pool"""
+    user.password = make_password(password)
+    # Lets password validators' password_changed() hooks run on save, as set_password() does
+    user._password = password
+
+
+def check_password(user, password):
+    """
+    Equivalent of ``user.check_password()`` with verification done in the
+    pool. Upgrades the stored hash when the hasher settings have changed.
+    """
+    with phase('hash'):
+        matches, needs_rehash = get_executor().run(_verify, password, user.password)
+    if needs_rehash:
+        set_password(user, password)
+        user._password = None
+        user.save(update_fields=['password'])
+    return matches
+
+
+async def amake_password(password):
+    """Async variant of make_password()"""
+    with phase('hash'):
+        return await get_executor().arun(hashers.make_password, password)
+
+
+async def aset_password(user, password):
+    """Async variant of set_password()"""
+    user.password = await amake_password(password)
+    user._password = password
+
+
+async def acheck_password(user, password):
+    """Async variant of check_password()"""
+    with phase('hash'):
+        matches, needs_rehash = await get_executor().arun(_verify, password, user.password)
+    if needs_rehash:
+        await aset_password(user, password)
+        user._password = None
+        await user.asave(update_fields=['password'])
+    return matches
@@ -0,0 +1,204 @@
+import csv
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import IntegrityError, transaction
+
+from users.hashing import init_worker
+from users.serializers import UserImportSerializer
+from users.usernames import MAX_ATTEMPTS, assign_username, highest_username_suffix, retry_suffix, username_base
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        "Bulk import users from a CSV or NDJSON file. Rows are validated with the "
+        "registration rules, passwords are hashed in a process pool (or taken "
+        "pre-hashed from password_hash) and users are inserted in chunks."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='CSV or NDJSON file to import, or - for stdin')
+        parser.add_argument('--format', choices=['csv', 'ndjson'], help='input format (default: from the file extension)')
+        parser.add_argument('--batch-size', type=int, default=1000, help='rows validated and inserted per chunk')
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                            help='password hashing processes; 0 hashes in this process')
+        parser.add_argument('--checkpoint', help='file recording rows done; an existing checkpoint is resumed from')
+        parser.add_argument('--errors', help='CSV report of rejected rows (default: stderr)')
+
+    def handle(self, *args, **options):
+        fmt = options['format'] or ('ndjson' if options['path'].endswith(('.ndjson', '.jsonl')) else 'csv')
+        batch_size = options['batch_size']
+        if batch_size < 1:
+            raise CommandError('--batch-size must be at least 1')
+
+        checkpoint = Path(options['checkpoint']) if options['checkpoint'] else None
+        skip = self._read_checkpoint(checkpoint)
+        if skip:
+            self.stdout.write(f'Resuming after row {skip}')
+
+        self.error_file = open(options['errors'], 'a', newline='') if options['errors'] else None
+        self.error_writer = csv.writer(self.error_file or sys.stderr)
+        if self.error_file is not None and self.error_file.tell() == 0:
+            self.error_writer.writerow(['row', 'email', 'errors'])
+
+        # Highest username suffix seen per base, so each base hits the database once per run
+        self.suffixes = {}
+        self.imported = self.failed = 0
+        self.workers = options['workers']
+        pool = None
+        if self.workers > 0:
+            pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                initializer=init_worker,
+                initargs=(os.environ.get('DJANGO_SETTINGS_MODULE', 'config.settings'),),
+            )
+
+        source = sys.stdin if options['path'] == '-' else open(options['path'], newline='', encoding='utf-8')
+        try:
+            chunk = []
+            last_row = skip
+            for row_number, row in self._read_rows(source, fmt):
+                if row_number <= skip:
+                    continue
+                chunk.append((row_number, row))
+                last_row = row_number
+                if len(chunk) >= batch_size:
+                    self._import_chunk(chunk, pool)
+                    self._write_checkpoint(checkpoint, last_row)
+                    chunk = []
+            if chunk:
+                self._import_chunk(chunk, pool)
+                self._write_checkpoint(checkpoint, last_row)
+        finally:
+            if source is not sys.stdin:
+                source.close()
+            if pool is not None:
+                pool.shutdown()
+            if self.error_file is not None:
+                self.error_file.close()
+
+        self.stdout.write(self.style.SUCCESS(f'Imported {self.imported} users, rejected {self.failed} rows'))
+
+    def _read_rows(self, source, fmt):
+        """Yield (row_number, row) pairs; row is an error message for unparseable lines"""
+        if fmt == 'csv':
+            for row_number, row in enumerate(csv.DictReader(source), start=1):
+                yield row_number, row
+            return
+        for row_number, line in enumerate(source, start=1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError as e:
+                row = f'Invalid JSON: {e}'
+            if not isinstance(row, (dict, str)):
+                row = 'Each line must be a JSON object.'
+            yield row_number, row
+
+    def _import_chunk(self, chunk, pool):
+        valid = []
+        seen = set()
+        for row_number, row in chunk:
+            if isinstance(row, str):
+                self._reject(row_number, '', {'non_field_errors': [row]})
+                continue
+            data = {key: value for key, value in row.items() if value not in (None, '')}
+            serializer = UserImportSerializer(data=data)
+            if not serializer.is_valid():
+                self._reject(row_number, row.get('email', ''), serializer.errors)
+                continue
+            attrs = serializer.validated_data
+            if attrs['email'] in seen:
+                self._reject(row_number, attrs['email'], {'email': ['Duplicate email earlier in this chunk.']})
+                continue
+            seen.add(attrs['email'])
+            valid.append((row_number, attrs))
+
+        # One query for the whole chunk instead of a uniqueness check per row
+        existing = set(User.objects.filter(email__in=seen).values_list('email', flat=True))
+        rows = []
+        for row_number, attrs in valid:
+            if attrs['email'] in existing:
+                self._reject(row_number, attrs['email'], {'email': [
+                    'This email address is already registered. Please use a different email address.'
+                ]})
+            else:
+                rows.append((row_number, attrs))
+
+        raw = [attrs['password'] for _, attrs in rows if not attrs.get('password_hash')]
+        if pool is not None and raw:
+            hashes = iter(pool.map(make_password, raw, chunksize=max(1, len(raw) // (self.workers * 4))))
+        else:
+            hashes = (make_password(password) for password in raw)
+
+        users = []
+        for row_number, attrs in rows:
+            users.append((row_number, self._allocate_username(User(
+                email=attrs['email'],
+                password=attrs.get('password_hash') or next(hashes),
+                first_name=attrs.get('first_name', ''),
+                last_name=attrs.get('last_name', ''),
+            ))))
+
+        try:
+            with transaction.atomic():
+                User.objects.bulk_create([user for _, user in users])
+            self.imported += len(users)
+        except IntegrityError:
+            # A concurrent registration took an email or username; insert row by row
+            self.suffixes.clear()
+            for row_number, user in users:
+                self._insert_one(row_number, user)
+
+    def _insert_one(self, row_number, user):
+        for _ in range(MAX_ATTEMPTS):
+            try:
+                with transaction.atomic():
+                    user.save(force_insert=True)
+                self.imported += 1
+                return
+            except IntegrityError:
+                if User.objects.filter(email=user.email).exists():
+                    break
+                base = user.username_stem
+                assign_username(user, base, retry_suffix(user.username_suffix, highest_username_suffix(base) + 1))
+        self._reject(row_number, user.email, {'email': [
+            'This email address is already registered. Please use a different email address.'
+        ]})
+
+    def _allocate_username(self, user):
+        base = username_base(user.email)
+        if base not in self.suffixes:
+            self.suffixes[base] = highest_username_suffix(base)
+        self.suffixes[base] += 1
+        assign_username(user, base, self.suffixes[base])
+        return user
+
+    def _reject(self, row_number, email, errors):
+        self.failed += 1
+        self.error_writer.writerow([row_number, email, json.dumps(errors, default=str)])
+
+    def _read_checkpoint(self, checkpoint):
+        if checkpoint is None or not checkpoint.exists():
+            return 0
+        try:
+            return int(json.loads(checkpoint.read_text())['rows_done'])
+        except (ValueError, KeyError, TypeError) as e:
+            raise CommandError(f'Unreadable checkpoint file {checkpoint}: {e}')
+
+    def _write_checkpoint(self, checkpoint, rows_done):
+        if checkpoint is None:
+            return
+        # Write then rename so an interrupted run never leaves a truncated checkpoint
+        tmp = checkpoint.with_suffix(checkpoint.suffix + '.tmp')
+        tmp.write_text(json.dumps({'rows_done': rows_done}))
+        os.replace(tmp, checkpoint)
@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from users.deletion import get_setting, purge_deleted_accounts
+
+
+class Command(BaseCommand):
+    help = (
+        "Remove accounts deleted through the API: their tokens, admin log "
+        "entries, notification events, directory entries, last-seen times and "
+        "group/permission links in small batches, each in its own short "
+        "transaction, then the user rows themselves."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=get_setting('BATCH_SIZE'), help='rows deleted per transaction')
+        parser.add_argument('--pause', type=float, default=get_setting('PAUSE'), help='seconds to sleep between batches')
+        parser.add_argument('--max-batches', type=int, help='stop after this many batches (default: until done)')
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be at least 1')
+
+        def progress(metrics):
+            if options['verbosity'] >= 2:
+                self.stdout.write(
+                    f"batch {metrics['batches']}: {metrics['users_deleted']} accounts, "
+                    f"{metrics['tokens_deleted']} tokens deleted ({metrics['seconds']:.1f}s)"
+                )
+
+        metrics = purge_deleted_accounts(
+            batch_size=options['batch_size'],
+            pause=options['pause'],
+            max_batches=options['max_batches'],
+            on_batch=progress,
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"Deleted {metrics['users_deleted']} accounts, {metrics['tokens_deleted']} tokens, "
+            f"{metrics['log_entries_deleted']} admin log entries, "
+            f"{metrics['notification_events_deleted']} notification events and "
+            f"{metrics['groups_deleted'] + metrics['permissions_deleted']} group/permission links "
+            f"in {metrics['batches']} batches ({metrics['seconds']:.1f}s)"
+        ))
@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from users.purge import get_setting, purge_expired_tokens
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete expired outstanding and blacklisted refresh tokens in small "
+        "batches, each in its own short transaction. Unlike simplejwt's "
+        "flushexpiredtokens it never holds a lock over the whole table."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=get_setting('BATCH_SIZE'), help='rows deleted per transaction')
+        parser.add_argument('--pause', type=float, default=get_setting('PAUSE'), help='seconds to sleep between batches')
+        parser.add_argument('--max-batches', type=int, help='stop after this many batches (default: until done)')
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be at least 1')
+
+        def progress(metrics):
+            if options['verbosity'] >= 2:
+                self.stdout.write(
+                    f"batch {metrics['batches']}: {metrics['outstanding_deleted']} outstanding, "
+                    f"{metrics['blacklisted_deleted']} blacklisted deleted ({metrics['seconds']:.1f}s)"
+                )
+
+        metrics = purge_expired_tokens(
+            batch_size=options['batch_size'],
+            pause=options['pause'],
+            max_batches=options['max_batches'],
+            on_batch=progress,
+        )
+        rate = metrics['outstanding_deleted'] / metrics['seconds'] if metrics['seconds'] else 0
+        self.stdout.write(self.style.SUCCESS(
+            f"Deleted {metrics['outstanding_deleted']} outstanding and {metrics['blacklisted_deleted']} "
+            f"blacklisted tokens in {metrics['batches']} batches ({metrics['seconds']:.1f}s, {rate:.0f} rows/s)"
+        ))
@@ -0,0 +1,21 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from users.directory import index_users
+
+
+class Command(BaseCommand):
+    help = (
+        "Rewrite the directory search entries of every user (users/directory.py). "
+        "Saves keep the entries current; run this after changing users with "
+        "QuerySet.update() or bulk_create(), which skip save()."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=2000, help='users per transaction')
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be at least 1')
+        listed = index_users(get_user_model().objects.all(), batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Indexed {listed} searchable users'))
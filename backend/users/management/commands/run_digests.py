@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from users.digests import DigestScheduler, get_setting
+
+
+class Command(BaseCommand):
+    help = (
+        "Send notification digests as each user's digest_frequency window "
+        "closes, outside their quiet hours. Ticks every --interval seconds "
+        "until stopped; --once ticks a single time."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--interval', type=float, default=get_setting('INTERVAL'), help='seconds between ticks')
+        parser.add_argument('--once', action='store_true', help='tick once and exit')
+        parser.add_argument('--batch-size', type=int, default=get_setting('BATCH_SIZE'), help='users sent per batch')
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be at least 1')
+
+        def report(metrics):
+            if metrics['digests'] or options['verbosity'] >= 2:
+                self.stdout.write(
+                    f"Sent {metrics['digests']} digests ({metrics['events']} events); "
+                    f"{metrics['deferred']} users deferred; {metrics['discarded']} events of inactive users discarded"
+                )
+
+        scheduler = DigestScheduler(batch_size=options['batch_size'])
+        scheduler.run(interval=options['interval'], max_ticks=1 if options['once'] else None, on_tick=report)
@@ -0,0 +1,32 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from users.routers import get_setting, sync_replicas
+
+
+class Command(BaseCommand):
+    help = (
+        "Copy the primary SQLite database over the configured replicas "
+        "(DATABASE_ROUTING['REPLICAS']). Stands in for replication when "
+        "testing read/write routing locally with SQLITE_REPLICA=1; with "
+        "--interval it keeps copying, so replicas lag the primary by up to "
+        "that many seconds."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--interval', type=float, default=0, help='seconds between copies (default: copy once)')
+
+    def handle(self, *args, **options):
+        if not get_setting('REPLICAS'):
+            raise CommandError('No replicas configured; set SQLITE_REPLICA=1 or DATABASE_ROUTING["REPLICAS"]')
+
+        while True:
+            try:
+                replicas = sync_replicas()
+            except ValueError as e:
+                raise CommandError(str(e))
+            self.stdout.write(self.style.SUCCESS(f"Copied the primary to {', '.join(replicas)}"))
+            if not options['interval']:
+                return
+            time.sleep(options['interval'])
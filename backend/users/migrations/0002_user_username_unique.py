@@ -0,0 +1,41 @@
+# Generated by Django 6.0 on 2026-10-17 00:00
+
+from django.db import migrations, models
+
+
+def dedupe_usernames(apps, schema_editor):
+    """Rename any pre-existing duplicate usernames so the unique constraint can be created"""
+    User = apps.get_model('users', 'User')
+    duplicates = (
+        User.objects.filter(username__gt='')
+        .values('username')
+        .annotate(count=models.Count('id'))
+        .filter(count__gt=1)
+        .values_list('username', flat=True)
+    )
+    taken = set(User.objects.filter(username__gt='').values_list('username', flat=True))
+    for username in list(duplicates):
+        # Keep the oldest account's username, renumber the rest
+        for user in User.objects.filter(username=username).order_by('id')[1:]:
+            counter = 1
+            while f'{username}{counter}' in taken:
+                counter += 1
+            user.username = f'{username}{counter}'
+            taken.add(user.username)
+            user.save(update_fields=['username'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('users', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(dedupe_usernames, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='user',
+            constraint=models.UniqueConstraint(condition=models.Q(('username__gt', '')), fields=('username',), name='users_user_username_unique'),
+        ),
+    ]
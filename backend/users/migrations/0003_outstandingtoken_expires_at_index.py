@@ -0,0 +1,27 @@
+# Generated by Django 6.0 on 2026-10-17 00:00
+
+from django.db import migrations, models
+
+# simplejwt's OutstandingToken has no index on expires_at; the token purge
+# (users/purge.py) walks it to delete expired rows in small batches
+EXPIRES_AT_INDEX = models.Index(fields=['expires_at'], name='users_outtoken_expires_idx')
+
+
+def add_index(apps, schema_editor):
+    schema_editor.add_index(apps.get_model('token_blacklist', 'OutstandingToken'), EXPIRES_AT_INDEX)
+
+
+def remove_index(apps, schema_editor):
+    schema_editor.remove_index(apps.get_model('token_blacklist', 'OutstandingToken'), EXPIRES_AT_INDEX)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0002_user_username_unique'),
+        ('token_blacklist', '0013_alter_blacklistedtoken_options_and_more'),
+    ]
+
+    operations = [
+        migrations.RunPython(add_index, remove_index),
+    ]
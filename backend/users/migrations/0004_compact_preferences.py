@@ -0,0 +1,61 @@
+# Generated by Django 6.0 on 2026-10-17 00:00
+
+from django.db import migrations, models
+
+import users.fields
+import users.models
+
+
+class Migration(migrations.Migration):
+    """
+    Step 1 of 3 of the compact preference storage: add the compact columns
+    next to the old ones. 0005 copies the data across, 0006 drops the old
+    columns and gives the new ones their names.
+    """
+
+    dependencies = [
+        ('users', '0003_outstandingtoken_expires_at_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='preference_flags',
+            field=models.PositiveIntegerField(default=users.models.default_preference_flags),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='theme_mode_code',
+            field=users.fields.ChoiceCodeField(choices=[('system', 'System'), ('light', 'Light'), ('dark', 'Dark')], default='system'),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='accent_color_code',
+            field=users.fields.ChoiceCodeField(choices=[('blue', 'Blue'), ('emerald', 'Emerald'), ('amber', 'Amber'), ('indigo', 'Indigo')], default='blue'),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='font_family_code',
+            field=users.fields.ChoiceCodeField(choices=[('inter', 'Inter'), ('manrope', 'Manrope'), ('roboto', 'Roboto'), ('workSans', 'Work Sans')], default='inter'),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='font_size_code',
+            field=users.fields.ChoiceCodeField(choices=[('small', 'Small'), ('medium', 'Medium'), ('large', 'Large')], default='medium'),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='digest_frequency_code',
+            field=users.fields.ChoiceCodeField(choices=[('instant', 'Instant'), ('hourly', 'Hourly'), ('daily', 'Daily'), ('weekly', 'Weekly')], default='daily'),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='dnd_start_minutes',
+            field=users.fields.MinutesField(default='21:00'),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='dnd_end_minutes',
+            field=users.fields.MinutesField(default='07:00'),
+        ),
+    ]
@@ -0,0 +1,127 @@
+# Generated by Django 6.0 on 2026-10-17 00:00
+
+import logging
+import re
+
+from django.db import migrations, transaction
+
+logger = logging.getLogger(__name__)
+
+# Frozen copy of the bit positions in users/models.py at the time of this migration
+FLAG_BITS = {
+    'compact_mode': 0,
+    'show_tooltips': 1,
+    'animations': 2,
+    'email_alerts': 3,
+    'push_notifications': 4,
+    'sms_alerts': 5,
+    'security_alerts': 6,
+    'mentions': 7,
+    'weekly_summary': 8,
+    'product_updates': 9,
+    'dnd_enabled': 10,
+    'profile_searchable': 11,
+    'messages_from_anyone': 12,
+    'show_online_status': 13,
+    'two_factor_enabled': 14,
+    'login_alerts': 15,
+    'analytics_enabled': 16,
+    'personalized_ads': 17,
+}
+CHOICE_FIELDS = ['theme_mode', 'accent_color', 'font_family', 'font_size', 'digest_frequency']
+TIME_FIELDS = {'dnd_start_time': 'dnd_start_minutes', 'dnd_end_time': 'dnd_end_minutes'}
+CHUNK_SIZE = 2000
+
+# 'H:MM' or 'HH:MM'; the old CharField took anything up to 5 characters
+LOOSE_TIME_RE = re.compile(r'^\s*([01]?\d|2[0-3]):([0-5]\d)\s*$')
+
+
+def _valid_or_default(model, name, value):
+    """Old columns had no database-level validation; fall back to the default for bad values"""
+    field = model._meta.get_field(name)
+    try:
+        field.get_prep_value(value)
+    except (TypeError, ValueError):
+        return field.get_default()
+    return value
+
+
+def _normalized_time(model, name, value):
+    """
+    (value, fell_back) for an old DND time: 'H:MM' and 'HH:MM' are
+    normalized to 'HH:MM', anything else becomes the field default.
+    """
+    match = LOOSE_TIME_RE.match(value) if isinstance(value, str) else None
+    if match is None:
+        return model._meta.get_field(name).get_default(), True
+    return '%02d:%s' % (int(match[1]), match[2]), False
+
+
+def copy_preferences(apps, schema_editor):
+    """Fill the compact columns from the old ones, one chunk of users per transaction"""
+    User = apps.get_model('users', 'User')
+    old_fields = [*FLAG_BITS, *CHOICE_FIELDS, *TIME_FIELDS]
+    new_fields = [
+        'preference_flags',
+        *(f'{name}_code' for name in CHOICE_FIELDS),
+        *TIME_FIELDS.values(),
+    ]
+
+    last_pk = 0
+    fallbacks = 0
+    while True:
+        with transaction.atomic():
+            users = list(User.objects.filter(pk__gt=last_pk).order_by('pk').only(*old_fields)[:CHUNK_SIZE])
+            if not users:
+                break
+            for user in users:
+                user.preference_flags = sum(1 << bit for name, bit in FLAG_BITS.items() if getattr(user, name))
+                for name in CHOICE_FIELDS:
+                    setattr(user, f'{name}_code', _valid_or_default(User, f'{name}_code', getattr(user, name)))
+                fell_back = False
+                for old, new in TIME_FIELDS.items():
+                    value, invalid = _normalized_time(User, new, getattr(user, old))
+                    setattr(user, new, value)
+                    fell_back |= invalid
+                fallbacks += fell_back
+            User.objects.bulk_update(users, new_fields)
+        last_pk = users[-1].pk
+    if fallbacks:
+        logger.warning('%d users had unparseable do-not-disturb times replaced with the defaults', fallbacks)
+
+
+def copy_preferences_back(apps, schema_editor):
+    """Reverse: restore the old columns from the compact ones"""
+    User = apps.get_model('users', 'User')
+    old_fields = [*FLAG_BITS, *CHOICE_FIELDS, *TIME_FIELDS]
+
+    last_pk = 0
+    while True:
+        with transaction.atomic():
+            users = list(User.objects.filter(pk__gt=last_pk).order_by('pk')[:CHUNK_SIZE])
+            if not users:
+                break
+            for user in users:
+                for name, bit in FLAG_BITS.items():
+                    setattr(user, name, bool(user.preference_flags & (1 << bit)))
+                for name in CHOICE_FIELDS:
+                    setattr(user, name, getattr(user, f'{name}_code'))
+                for old, new in TIME_FIELDS.items():
+                    setattr(user, old, getattr(user, new))
+            User.objects.bulk_update(users, old_fields)
+        last_pk = users[-1].pk
+
+
+class Migration(migrations.Migration):
+    """Step 2 of 3: copy preferences into the compact columns in chunks"""
+
+    # Each chunk commits on its own, so large tables are never locked for the whole copy
+    atomic = False
+
+    dependencies = [
+        ('users', '0004_compact_preferences'),
+    ]
+
+    operations = [
+        migrations.RunPython(copy_preferences, copy_preferences_back),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 6.0 on 2026-10-17 00:00
+
+from django.db import migrations
+
+FLAG_FIELDS = [
+    'compact_mode', 'show_tooltips', 'animations',
+    'email_alerts', 'push_notifications', 'sms_alerts',
+    'security_alerts', 'mentions', 'weekly_summary', 'product_updates', 'dnd_enabled',
+    'profile_searchable', 'messages_from_anyone', 'show_online_status',
+    'two_factor_enabled', 'login_alerts', 'analytics_enabled', 'personalized_ads',
+]
+CHOICE_FIELDS = ['theme_mode', 'accent_color', 'font_family', 'font_size', 'digest_frequency']
+
+
+class Migration(migrations.Migration):
+    """Step 3 of 3: drop the old preference columns and rename the compact ones into place"""
+
+    dependencies = [
+        ('users', '0005_copy_compact_preferences'),
+    ]
+
+    operations = [
+        *(migrations.RemoveField(model_name='user', name=name) for name in FLAG_FIELDS),
+        *(migrations.RemoveField(model_name='user', name=name) for name in CHOICE_FIELDS),
+        migrations.RemoveField(model_name='user', name='dnd_start_time'),
+        migrations.RemoveField(model_name='user', name='dnd_end_time'),
+        *(migrations.RenameField(model_name='user', old_name=f'{name}_code', new_name=name) for name in CHOICE_FIELDS),
+        migrations.RenameField(model_name='user', old_name='dnd_start_minutes', new_name='dnd_start_time'),
+        migrations.RenameField(model_name='user', old_name='dnd_end_minutes', new_name='dnd_end_time'),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 6.0 on 2026-10-17 00:00
+
+from django.db import migrations, models
+
+
+def create_search_index(apps, schema_editor):
+    # FTS5 table and triggers behind admin search (users/search.py); SQLite only
+    from users import search
+    search.install(schema_editor.connection)
+
+
+def drop_search_index(apps, schema_editor):
+    from users import search
+    search.uninstall(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0006_drop_wide_preferences'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['date_joined', 'id'], name='users_user_joined_idx'),
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 6.0 on 2026-10-17 00:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0008_user_deletion_requested_at'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['preference_flags', 'dnd_start_time', 'dnd_end_time', 'is_active'], name='users_user_audience_idx'),
+        ),
+    ]
@@ -0,0 +1,67 @@
+# Generated by Django 6.0 on 2026-10-17 00:00
+
+import re
+import unicodedata
+from itertools import islice
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+# Frozen copy of the profile_searchable bit in users/models.py at the time of this migration
+PROFILE_SEARCHABLE_MASK = 1 << 11
+KEY_MAX_LENGTH = 150
+WORD_RE = re.compile(r'[^\W_]+')
+
+
+def _normalize_words(text):
+    # Frozen copy of users/directory.py normalize_words()
+    decomposed = unicodedata.normalize('NFKD', text or '')
+    stripped = ''.join(char for char in decomposed if not unicodedata.combining(char))
+    return WORD_RE.findall(stripped.casefold())
+
+
+def _entry_keys(first_name, last_name, email):
+    # Frozen copy of users/directory.py entry_keys()
+    local_part = (email or '').split('@', 1)[0]
+    words = _normalize_words(first_name) + _normalize_words(last_name) + _normalize_words(local_part)
+    return list(dict.fromkeys(word[:KEY_MAX_LENGTH] for word in words))
+
+
+def index_listed_users(apps, schema_editor):
+    # Directory entries for users already searchable (users/directory.py)
+    User = apps.get_model('users', 'User')
+    DirectoryEntry = apps.get_model('users', 'DirectoryEntry')
+    rows = (
+        User.objects.filter(is_active=True).order_by('pk')
+        .values_list('pk', 'first_name', 'last_name', 'email', 'preference_flags').iterator(chunk_size=2000)
+    )
+    entries = (
+        DirectoryEntry(user_id=pk, key=key)
+        for pk, first_name, last_name, email, flags in rows if flags & PROFILE_SEARCHABLE_MASK
+        for key in _entry_keys(first_name, last_name, email)
+    )
+    while batch := list(islice(entries, 2000)):
+        DirectoryEntry.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0010_notificationevent'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DirectoryEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=150)),
+                ('user', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='directory_entries', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['key', 'user'], name='users_directory_key_idx'), models.Index(fields=['user', 'key'], name='users_directory_user_idx')],
+            },
+        ),
+        migrations.RunPython(index_listed_users, migrations.RunPython.noop),
+    ]
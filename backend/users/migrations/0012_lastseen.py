@@ -0,0 +1,22 @@
+# Generated by Django 6.0 on 2026-10-17 00:00
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0011_directoryentry'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LastSeen',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='last_seen', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('seen_at', models.DateTimeField()),
+            ],
+        ),
+    ]
@@ -0,0 +1,63 @@
+# Generated by Django 6.0 on 2026-10-17 00:00
+
+import re
+import unicodedata
+
+from django.db import migrations, models, transaction
+
+CHUNK_SIZE = 2000
+SUFFIX_RE = re.compile(r'[1-9][0-9]*')
+
+
+def _stem_and_suffix(email, username):
+    """(stem, suffix) if ``username`` is the allocator's output for ``email``, else (None, None)"""
+    # Frozen copy of users/usernames.py username_base()
+    base = unicodedata.normalize('NFKC', email.split('@')[0])
+    if username == base:
+        return base, 0
+    if username.startswith(base) and SUFFIX_RE.fullmatch(username[len(base):]):
+        return base, int(username[len(base):])
+    return None, None
+
+
+def record_username_suffixes(apps, schema_editor):
+    """Fill username_stem/username_suffix for usernames allocated before they existed"""
+    User = apps.get_model('users', 'User')
+    last_pk = 0
+    while True:
+        with transaction.atomic():
+            users = list(
+                User.objects.filter(pk__gt=last_pk, username__gt='').order_by('pk')
+                .only('email', 'username')[:CHUNK_SIZE]
+            )
+            if not users:
+                break
+            for user in users:
+                user.username_stem, user.username_suffix = _stem_and_suffix(user.email, user.username)
+            User.objects.bulk_update(users, ['username_stem', 'username_suffix'])
+        last_pk = users[-1].pk
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0012_lastseen'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='username_stem',
+            field=models.CharField(blank=True, editable=False, max_length=150, null=True),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='username_suffix',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['username_stem', 'username_suffix'], name='users_user_username_seq_idx'),
+        ),
+        migrations.RunPython(record_username_suffixes, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 6.0 on 2026-10-18 00:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0013_username_suffix'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='user',
+            name='users_user_audience_idx',
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['preference_flags', 'dnd_start_time', 'dnd_end_time', 'phone', 'is_active'], name='users_user_audience_idx'),
+        ),
+    ]
@@ -1,5 +1,14 @@
 from django.contrib.auth.models import AbstractUser
 from django.db import models
+from django.utils import timezone
+
+from .fields import BitFlag, ChoiceCodeField, MinutesField, default_flags, storage_fields
+
+
+def default_preference_flags():
+    """preference_flags with every preference at its default"""
+    return default_flags(User)
+
 
 class User(AbstractUser):
     """
@@ -20,8 +29,13 @@ class User(AbstractUser):
         }
     )
     
-    # Make username non-unique and optional, auto-generate from email
+    # Unique when set (users_user_username_unique below) and allocated from
+    # the email's local part plus a numeric suffix (users/usernames.py)
     username = models.CharField(max_length=150, blank=True, null=True)
+    # How username allocation (users/usernames.py) built ``username``: the
+    # email-derived stem and the numeric suffix appended to it (0 for none)
+    username_stem = models.CharField(max_length=150, blank=True, null=True, editable=False)
+    username_suffix = models.PositiveIntegerField(null=True, blank=True, editable=False)
     
     # Use email as the username field for authentication
     USERNAME_FIELD = 'email'
@@ -44,6 +58,9 @@ class User(AbstractUser):
     gender = models.CharField(max_length=20, choices=GENDER_CHOICES, blank=True)
 
     # --- Settings Fields ---
+    # Stored compactly (see users/fields.py): choices as small integer codes,
+    # quiet hours as minutes since midnight and the booleans as bits of
+    # preference_flags. Append new choices and flags; never reorder them.
 
     # Theme Settings
     THEME_MODE_CHOICES = [
@@ -51,7 +68,7 @@ class User(AbstractUser):
         ('light', 'Light'),
         ('dark', 'Dark'),
     ]
-    theme_mode = models.CharField(max_length=10, choices=THEME_MODE_CHOICES, default='system')
+    theme_mode = ChoiceCodeField(choices=THEME_MODE_CHOICES, default='system')
     
     ACCENT_COLOR_CHOICES = [
         ('blue', 'Blue'),
@@ -59,7 +76,7 @@ class User(AbstractUser):
         ('amber', 'Amber'),
         ('indigo', 'Indigo'),
     ]
-    accent_color = models.CharField(max_length=20, choices=ACCENT_COLOR_CHOICES, default='blue')
+    accent_color = ChoiceCodeField(choices=ACCENT_COLOR_CHOICES, default='blue')
     
     FONT_FAMILY_CHOICES = [
         ('inter', 'Inter'),
@@ -67,24 +84,24 @@ class User(AbstractUser):
         ('roboto', 'Roboto'),
         ('workSans', 'Work Sans'),
     ]
-    font_family = models.CharField(max_length=20, choices=FONT_FAMILY_CHOICES, default='inter')
+    font_family = ChoiceCodeField(choices=FONT_FAMILY_CHOICES, default='inter')
     
     FONT_SIZE_CHOICES = [
         ('small', 'Small'),
         ('medium', 'Medium'),
         ('large', 'Large'),
     ]
-    font_size = models.CharField(max_length=10, choices=FONT_SIZE_CHOICES, default='medium')
+    font_size = ChoiceCodeField(choices=FONT_SIZE_CHOICES, default='medium')
     
     # Layout preferences
-    compact_mode = models.BooleanField(default=False)
-    show_tooltips = models.BooleanField(default=True)
-    animations = models.BooleanField(default=True)
+    compact_mode = BitFlag(0, default=False)
+    show_tooltips = BitFlag(1, default=True)
+    animations = BitFlag(2, default=True)
     
     # Notification Settings
-    email_alerts = models.BooleanField(default=True)
-    push_notifications = models.BooleanField(default=True)
-    sms_alerts = models.BooleanField(default=False)
+    email_alerts = BitFlag(3, default=True)
+    push_notifications = BitFlag(4, default=True)
+    sms_alerts = BitFlag(5, default=False)
     
     DIGEST_FREQUENCY_CHOICES = [
         ('instant', 'Instant'),
@@ -92,31 +109,128 @@ class User(AbstractUser):
         ('daily', 'Daily'),
         ('weekly', 'Weekly'),
     ]
-    digest_frequency = models.CharField(max_length=20, choices=DIGEST_FREQUENCY_CHOICES, default='daily')
+    digest_frequency = ChoiceCodeField(choices=DIGEST_FREQUENCY_CHOICES, default='daily')
     
-    security_alerts = models.BooleanField(default=True)
-    mentions = models.BooleanField(default=True)
-    weekly_summary = models.BooleanField(default=True)
-    product_updates = models.BooleanField(default=False)
+    security_alerts = BitFlag(6, default=True)
+    mentions = BitFlag(7, default=True)
+    weekly_summary = BitFlag(8, default=True)
+    product_updates = BitFlag(9, default=False)
     
-    dnd_enabled = models.BooleanField(default=False)
-    dnd_start_time = models.CharField(max_length=5, default='21:00') # HH:MM
-    dnd_end_time = models.CharField(max_length=5, default='07:00')   # HH:MM
+    dnd_enabled = BitFlag(10, default=False)
+    dnd_start_time = MinutesField(default='21:00')  # HH:MM
+    dnd_end_time = MinutesField(default='07:00')    # HH:MM
 
     # Privacy Settings
-    profile_searchable = models.BooleanField(default=False)
-    messages_from_anyone = models.BooleanField(default=False)
-    show_online_status = models.BooleanField(default=True)
+    profile_searchable = BitFlag(11, default=False)
+    messages_from_anyone = BitFlag(12, default=False)
+    show_online_status = BitFlag(13, default=True)
     
-    two_factor_enabled = models.BooleanField(default=True)
-    login_alerts = models.BooleanField(default=True)
+    two_factor_enabled = BitFlag(14, default=True)
+    login_alerts = BitFlag(15, default=True)
     
-    analytics_enabled = models.BooleanField(default=True)
-    personalized_ads = models.BooleanField(default=False)
+    analytics_enabled = BitFlag(16, default=True)
+    personalized_ads = BitFlag(17, default=False)
+
+    # Backing storage for the BitFlag preferences above
+    preference_flags = models.PositiveIntegerField(default=default_preference_flags)
+
+    # Set when the user deletes their account; the row and its dependents
+    # are removed later by the background purge (see users/deletion.py)
+    deletion_requested_at = models.DateTimeField(null=True, blank=True, editable=False)
     
     class Meta:
         verbose_name = 'User'
         verbose_name_plural = 'Users'
+        constraints = [
+            # Auto-generated usernames must be unique; blank/NULL ones (admin-created users) are exempt.
+            models.UniqueConstraint(
+                fields=['username'],
+                condition=models.Q(username__gt=''),
+                name='users_user_username_unique',
+            ),
+        ]
+        indexes = [
+            # Highest allocated suffix per stem in one seek (users/usernames.py)
+            models.Index(fields=['username_stem', 'username_suffix'], name='users_user_username_seq_idx'),
+            # Newest-first admin changelist and its keyset pagination (users/admin.py)
+            models.Index(fields=['date_joined', 'id'], name='users_user_joined_idx'),
+            # Notification audience selection (users/audience.py). Holds the
+            # preference bits, DND window and phone (for SMS) of active users;
+            # is_active is repeated as a column so queries are answered from
+            # the index alone
+            models.Index(
+                fields=['preference_flags', 'dnd_start_time', 'dnd_end_time', 'phone', 'is_active'],
+                condition=models.Q(is_active=True),
+                name='users_user_audience_idx',
+            ),
+            # Queue of accounts awaiting the deletion purge; partial, so it stays tiny
+            models.Index(
+                fields=['deletion_requested_at'],
+                condition=models.Q(deletion_requested_at__isnull=False),
+                name='users_user_deletion_idx',
+            ),
+        ]
+    
+    def __str__(self):
+        return self.email
     
+    @classmethod
+    def storage_fields(cls, names):
+        """Model fields that store the given attributes, for save(update_fields=...) and only()"""
+        return storage_fields(cls, names)
+
+
+class NotificationEvent(models.Model):
+    """
+    A notification waiting to go out in its user's next digest. The digest
+    scheduler (users/digests.py) deletes events once they have been sent.
+    """
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='notification_events')
+    kind = models.CharField(max_length=50)  # e.g. mentions, product_updates
+    payload = models.JSONField(default=dict, blank=True)
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            # Due-digest lookups and per-user reads, oldest first
+            models.Index(fields=['user', 'created_at'], name='users_event_user_created_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.kind} for {self.user_id}'
+
+
+class DirectoryEntry(models.Model):
+    """
+    One normalized search word of a user listed in the directory
+    (profile_searchable and active). Maintained by users/directory.py.
+    """
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='directory_entries', db_index=False)
+    key = models.CharField(max_length=150)
+
+    class Meta:
+        indexes = [
+            # Prefix range scans in (key, user) order: the typeahead and its keyset cursor
+            models.Index(fields=['key', 'user'], name='users_directory_key_idx'),
+            # Per-user lookups: the other words of a query, reindexing on save
+            models.Index(fields=['user', 'key'], name='users_directory_user_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.key} -> {self.user_id}'
+
+
+class LastSeen(models.Model):
+    """
+    When a user was last active. Written in coalesced batches by
+    users/presence.py, never on the request path, so request traffic does
+    not rewrite users_user rows.
+    """
+
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name='last_seen')
+    seen_at = models.DateTimeField()
+
     def __str__(self):
-        return self.email
\ No newline at end of file
+        return f'{self.user_id} at {self.seen_at}'
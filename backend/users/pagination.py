@@ -0,0 +1,67 @@
+"""
+Row counts that stay cheap on very large tables.
+
+An exact COUNT(*) reads every row (or every entry of the smallest index).
+EstimatedCountPaginator avoids that:
+
+- unfiltered querysets use the planner statistics of the database
+  (sqlite_stat1 after ANALYZE, pg_class.reltuples on PostgreSQL), or an
+  exact count cached for COUNT_CACHE_TIMEOUT seconds when there are none
+- filtered querysets are counted exactly up to COUNT_LIMIT rows and
+  reported as COUNT_LIMIT beyond that
+
+``count_is_estimate`` tells templates to present the number as approximate.
+"""
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+
+COUNT_LIMIT = 10000
+COUNT_CACHE_TIMEOUT = 300
+
+
+def table_row_estimate(model, using='default'):
+    """Row count of ``model``'s table from planner statistics, or None if there are none"""
+    connection = connections[using]
+    table = model._meta.db_table
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute('SELECT reltuples FROM pg_class WHERE oid = %s::regclass', [table])
+            row = cursor.fetchone()
+            return int(row[0]) if row and row[0] >= 0 else None
+        if connection.vendor == 'sqlite':
+            cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'sqlite_stat1'")
+            if cursor.fetchone() is None:
+                return None
+            # The first number of each stat row is the number of rows in the table
+            cursor.execute('SELECT stat FROM sqlite_stat1 WHERE tbl = %s LIMIT 1', [table])
+            row = cursor.fetchone()
+            return int(row[0].split()[0]) if row else None
+    return None
+
+
+class EstimatedCountPaginator(Paginator):
+    """Paginator whose count never scans the whole table; see the module docstring"""
+
+    count_is_estimate = False
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if queryset.query.where:
+            count = queryset[:COUNT_LIMIT].count()
+            self.count_is_estimate = count >= COUNT_LIMIT
+            return count
+
+        model = queryset.model
+        self.count_is_estimate = True
+        estimate = table_row_estimate(model, queryset.db)
+        if estimate is not None:
+            return estimate
+        key = f'users:row_count:{queryset.db}:{model._meta.db_table}'
+        count = cache.get(key)
+        if count is None:
+            count = queryset.count()
+            cache.set(key, count, COUNT_CACHE_TIMEOUT)
+        return count
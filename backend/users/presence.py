@@ -0,0 +1,204 @@
+"""
+Online presence.
+
+Every authenticated request is a heartbeat (see users/authentication.py).
+A heartbeat of a user with ``show_online_status`` on sets
+``users:presence:<id>`` in the shared cache with a TTL, so a user counts as
+online until TTL seconds after their last request and nothing has to clean
+up after them. Users who opted out, or are inactive, are never written,
+and turning the flag off deletes the key (refresh(), called from
+users/signals.py), so online() answers "which of these users are online"
+with a single get_many() round trip and no preference lookups.
+
+Heartbeats are rate limited per process: a user heard from in the last
+HEARTBEAT_INTERVAL seconds is skipped without touching the cache. The
+last-seen time is persisted to LastSeen rather than the users table,
+coalesced in memory to one row per user and written by a background
+PresenceFlusher every FLUSH_INTERVAL seconds as one bulk upsert, so request
+traffic never writes to the database for presence.
+"""
+import logging
+import threading
+import time
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.core.cache import caches
+from django.contrib.auth import get_user_model
+from django.db import IntegrityError, close_old_connections
+
+from .cache import LRUCache
+from .models import LastSeen
+
+logger = logging.getLogger(__name__)
+
+User = get_user_model()
+
+DEFAULTS = {
+    'ENABLED': True,
+    'CACHE_ALIAS': 'default',
+    'TTL': 120,                 # seconds a user stays online after their last heartbeat
+    'HEARTBEAT_INTERVAL': 30,   # seconds between cache writes for one user per process
+    'LOCAL_KEYS': 10000,        # users whose last heartbeat this process remembers
+    'FLUSH_INTERVAL': 60,       # seconds between LastSeen writes; 0 = only on flush()
+    'MAX_IDS': 1000,            # user ids per online() request through the API
+}
+
+# User ids per existence check, under SQLite's bound parameter limit
+CHECK_CHUNK = 500
+
+
+def get_setting(name):
+    """Read a PRESENCE setting, falling back to the module defaults"""
+    return getattr(settings, 'PRESENCE', {}).get(name, DEFAULTS[name])
+
+
+def _shared_cache():
+    return caches[get_setting('CACHE_ALIAS')]
+
+
+def _key(user_id):
+    return f'users:presence:{user_id}'
+
+
+def is_visible(user):
+    return user.is_active and user.show_online_status
+
+
+# Last heartbeat time per user id written by this process
+_heartbeats = LRUCache(get_setting('LOCAL_KEYS'))
+
+# Last-seen times not yet persisted, one per user id
+_pending = {}
+_pending_lock = threading.Lock()
+
+
+def heartbeat(user, now=None):
+    """
+    Record that ``user`` is active now. Returns True if the heartbeat was
+    written, False if it was skipped by the rate limit or settings.
+    """
+    if not get_setting('ENABLED') or not user.is_active:
+        return False
+    now = time.time() if now is None else now
+    last = _heartbeats.get(user.pk)
+    if last is not None and now - last < get_setting('HEARTBEAT_INTERVAL'):
+        return False
+    _heartbeats.set(user.pk, now)
+
+    if user.show_online_status:
+        _shared_cache().set(_key(user.pk), now, timeout=get_setting('TTL'))
+    with _pending_lock:
+        _pending[user.pk] = now
+    return True
+
+
+def refresh(user):
+    """
+    Apply a change to ``user``'s visibility: hidden or deactivated users go
+    offline at once, and the next request of a visible one is written
+    without waiting for the rate limit.
+    """
+    _heartbeats.pop(user.pk)
+    if not is_visible(user):
+        _shared_cache().delete(_key(user.pk))
+
+
+def online(user_ids):
+    """
+    Map each online, visible user among ``user_ids`` to their last
+    heartbeat as an aware datetime. One cache round trip.
+    """
+    keys = {_key(user_id): user_id for user_id in user_ids}
+    found = _shared_cache().get_many(keys)
+    return {
+        keys[key]: datetime.fromtimestamp(seen, tz=dt_timezone.utc)
+        for key, seen in found.items()
+    }
+
+
+def flush():
+    """
+    Persist pending last-seen times in one bulk upsert; returns the number
+    of users written. Times of users deleted since are skipped.
+    """
+    global _pending
+    with _pending_lock:
+        pending, _pending = _pending, {}
+    if not pending:
+        return 0
+    try:
+        # Users deleted since their heartbeat would fail the whole upsert on
+        # the foreign key
+        ids = list(pending)
+        existing = set()
+        for start in range(0, len(ids), CHECK_CHUNK):
+            existing.update(User.objects.filter(pk__in=ids[start:start + CHECK_CHUNK]).values_list('pk', flat=True))
+        rows = [
+            LastSeen(user_id=user_id, seen_at=datetime.fromtimestamp(seen, tz=dt_timezone.utc))
+            for user_id, seen in pending.items() if user_id in existing
+        ]
+        LastSeen.objects.bulk_create(
+            rows, update_conflicts=True, unique_fields=['user'], update_fields=['seen_at'],
+        )
+    except IntegrityError:
+        # A user deleted between the check and the write: retrying the same
+        # batch would fail forever, so these times are dropped
+        logger.warning('Dropped %d last-seen times after a constraint error', len(pending))
+        return 0
+    except Exception:
+        # Keep the times for the next flush unless a newer heartbeat replaced them
+        with _pending_lock:
+            for user_id, seen in pending.items():
+                _pending.setdefault(user_id, seen)
+        raise
+    return len(rows)
+
+
+def reset():
+    """Forget this process's heartbeats and pending writes (used by tests)"""
+    _heartbeats.clear()
+    with _pending_lock:
+        _pending.clear()
+
+
+class PresenceFlusher(threading.Thread):
+    """
+    Daemon thread that persists this process's pending last-seen times every
+    FLUSH_INTERVAL seconds. Every process flushes its own heartbeats, so
+    unlike the purge threads it takes no shared lock.
+    """
+
+    def __init__(self, interval):
+        super().__init__(name='presence-flush', daemon=True)
+        self.interval = interval
+        self.stopped = threading.Event()
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            try:
+                flush()
+            except Exception:
+                logger.exception('%s failed', self.name)
+            finally:
+                close_old_connections()
+
+    def stop(self):
+        self.stopped.set()
+
+
+_flusher = None
+_flusher_lock = threading.Lock()
+
+
+def start_flusher():
+    """Start the in-process flush thread if PRESENCE FLUSH_INTERVAL is set; returns it or None"""
+    global _flusher
+    interval = get_setting('FLUSH_INTERVAL')
+    if not interval or not get_setting('ENABLED'):
+        return None
+    with _flusher_lock:
+        if _flusher is None:
+            _flusher = PresenceFlusher(interval)
+            _flusher.start()
+    return _flusher
@@ -0,0 +1,137 @@
+"""
+Batched deletion of expired refresh tokens.
+
+simplejwt records every issued refresh token in OutstandingToken (and
+every logout or rotation in BlacklistedToken) and never deletes them, so
+both tables grow forever. Once a token has expired it can no longer be
+used, blacklisted or not, so its rows can go.
+
+purge_expired_tokens() deletes them in small batches driven by the
+expires_at index (added in migration 0003), each in its own short
+transaction with an optional pause in between, so a large backlog never
+holds long locks or starves request traffic. It runs from the purge_tokens
+management command, or periodically in-process when TOKEN_PURGE INTERVAL
+is set.
+"""
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'BATCH_SIZE': 1000,       # rows deleted per transaction
+    'PAUSE': 0.1,             # seconds slept between batches
+    'INTERVAL': 0,            # seconds between in-process runs; 0 disables them
+    'CACHE_ALIAS': 'default',
+}
+
+LOCK_KEY = 'users:purge:lock'
+
+
+def get_setting(name):
+    """Read a TOKEN_PURGE setting, falling back to the module defaults"""
+    return getattr(settings, 'TOKEN_PURGE', {}).get(name, DEFAULTS[name])
+
+
+def purge_expired_tokens(batch_size=None, pause=None, max_batches=None, now=None, on_batch=None):
+    """
+    Delete outstanding and blacklisted tokens that expired before ``now``.
+
+    Returns metrics for the run. ``on_batch(metrics)`` is called after each
+    batch for progress reporting.
+    """
+    batch_size = batch_size or get_setting('BATCH_SIZE')
+    pause = get_setting('PAUSE') if pause is None else pause
+    now = now or timezone.now()
+    expired = OutstandingToken.objects.filter(expires_at__lt=now).order_by('expires_at')
+
+    metrics = {
+        'batches': 0,
+        'outstanding_deleted': 0,
+        'blacklisted_deleted': 0,
+        'seconds': 0.0,
+    }
+    started = time.monotonic()
+    while max_batches is None or metrics['batches'] < max_batches:
+        if metrics['batches'] and pause:
+            time.sleep(pause)
+        with transaction.atomic():
+            ids = list(expired.values_list('pk', flat=True)[:batch_size])
+            if not ids:
+                break
+            blacklisted, _ = BlacklistedToken.objects.filter(token_id__in=ids).delete()
+            outstanding, _ = OutstandingToken.objects.filter(pk__in=ids).delete()
+
+        metrics['batches'] += 1
+        metrics['blacklisted_deleted'] += blacklisted
+        metrics['outstanding_deleted'] += outstanding
+        metrics['seconds'] = time.monotonic() - started
+        if on_batch is not None:
+            on_batch(metrics)
+        if len(ids) < batch_size:
+            break
+
+    metrics['seconds'] = time.monotonic() - started
+    return metrics
+
+
+class PeriodicPurge(threading.Thread):
+    """
+    Daemon thread that purges expired tokens every INTERVAL seconds. A
+    lock in the shared cache lets only one process per interval do the
+    work when several run the thread. Subclasses override ``purge()`` (and
+    ``lock_key``/``lock_cache()``) to run other periodic cleanups.
+    """
+    thread_name = 'token-purge'
+    lock_key = LOCK_KEY
+
+    def __init__(self, interval):
+        super().__init__(name=self.thread_name, daemon=True)
+        self.interval = interval
+        self.stopped = threading.Event()
+
+    def lock_cache(self):
+        return caches[get_setting('CACHE_ALIAS')]
+
+    def purge(self):
+        metrics = purge_expired_tokens()
+        logger.info('Purged %(outstanding_deleted)d outstanding and %(blacklisted_deleted)d '
+                    'blacklisted tokens in %(batches)d batches (%(seconds).1fs)', metrics)
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            if not self.lock_cache().add(self.lock_key, 1, timeout=self.interval):
+                continue
+            try:
+                self.purge()
+            except Exception:
+                logger.exception('%s failed', self.name)
+            finally:
+                close_old_connections()
+
+    def stop(self):
+        self.stopped.set()
+
+
+_periodic = None
+_periodic_lock = threading.Lock()
+
+
+def start_periodic_purge():
+    """Start the in-process purge thread if TOKEN_PURGE INTERVAL is set; returns it or None"""
+    global _periodic
+    interval = get_setting('INTERVAL')
+    if not interval:
+        return None
+    with _periodic_lock:
+        if _periodic is None:
+            _periodic = PeriodicPurge(interval)
+            _periodic.start()
+    return _periodic
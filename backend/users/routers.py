@@ -0,0 +1,193 @@
+"""
+Read/write splitting between the primary database and read replicas.
+
+Writes always go to the primary (``default``). So do reads, except on
+the read-only paths: profile GET (``@read_replica`` on the views), the
+login user lookup and the admin user changelist (``.using(read_alias())``).
+Each picks one of DATABASE_ROUTING['REPLICAS'] at random; with no replicas
+configured everything stays on the primary.
+
+Replicas lag, so a user who just wrote must not read an older copy of
+their row back. Saving or deleting a user pins them (by id and email, in
+the shared cache so every process sees it) for PIN_SECONDS, and reads for
+a pinned user go to the primary even on replica paths. The user cache is
+filled through ``unless_pinned()`` for the same reason: a stale row read
+from a replica would otherwise be cached under the new version.
+
+For local testing, SQLITE_REPLICA=1 adds a second SQLite file as replica
+``replica``; ``manage.py sync_replica`` copies the primary into it (once,
+or every --interval seconds to mimic replication lag).
+"""
+import random
+from contextlib import asynccontextmanager, contextmanager, nullcontext
+from contextvars import ContextVar
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS, connections
+
+DEFAULTS = {
+    'REPLICAS': [],
+    'PIN_SECONDS': 5,
+    'CACHE_ALIAS': 'default',
+}
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+# Database alias for reads in the current context; None means the primary
+_read_alias = ContextVar('users_read_alias', default=None)
+
+
+def get_setting(name):
+    """Read a DATABASE_ROUTING setting, falling back to the module defaults"""
+    return getattr(settings, 'DATABASE_ROUTING', {}).get(name, DEFAULTS[name])
+
+
+def _cache():
+    return caches[get_setting('CACHE_ALIAS')]
+
+
+def _pin_keys(user_id=None, email=None):
+    keys = []
+    if user_id is not None:
+        keys.append(f'users:db_pin:{user_id}')
+    if email:
+        keys.append(f'users:db_pin:email:{email.lower()}')
+    return keys
+
+
+def pin(user):
+    """Send reads for ``user`` to the primary for PIN_SECONDS"""
+    if get_setting('REPLICAS'):
+        _cache().set_many(dict.fromkeys(_pin_keys(user.pk, user.email), True), get_setting('PIN_SECONDS'))
+
+
+def is_pinned(user_id=None, email=None):
+    """True if the user wrote within the last PIN_SECONDS; free when no replica is in use"""
+    if not get_setting('REPLICAS'):
+        return False
+    return bool(_cache().get_many(_pin_keys(user_id, email)))
+
+
+async def ais_pinned(user_id=None, email=None):
+    """Async variant of is_pinned()"""
+    if not get_setting('REPLICAS'):
+        return False
+    return bool(await _cache().aget_many(_pin_keys(user_id, email)))
+
+
+def choose_replica():
+    """A replica alias to read from, or None when there are none"""
+    replicas = get_setting('REPLICAS')
+    return random.choice(replicas) if replicas else None
+
+
+def current_read_alias():
+    """Where reads in this context go; None for the primary"""
+    return _read_alias.get()
+
+
+@contextmanager
+def _reading_from(alias):
+    token = _read_alias.set(alias)
+    try:
+        yield alias
+    finally:
+        _read_alias.reset(token)
+
+
+def read_alias(user_id=None, email=None):
+    """A replica to serve reads for the given user, or None for the primary while they are pinned"""
+    return None if is_pinned(user_id, email) else choose_replica()
+
+
+async def aread_alias(user_id=None, email=None):
+    """Async variant of read_alias()"""
+    return None if await ais_pinned(user_id, email) else choose_replica()
+
+
+def replica_reads(user_id=None, email=None):
+    """
+    Context manager sending ORM reads in the block to ``read_alias()``.
+    Yields the alias in use (None for the primary).
+    """
+    return _reading_from(read_alias(user_id, email))
+
+
+def unless_pinned(user_id):
+    """Keep the current read routing, switching to the primary while ``user_id`` is pinned"""
+    if current_read_alias() is not None and is_pinned(user_id):
+        return _reading_from(None)
+    return nullcontext()
+
+
+@asynccontextmanager
+async def aunless_pinned(user_id):
+    """Async variant of unless_pinned()"""
+    if current_read_alias() is not None and await ais_pinned(user_id):
+        with _reading_from(None):
+            yield
+    else:
+        yield
+
+
+def read_replica(view):
+    """View decorator serving the reads of GET/HEAD/OPTIONS requests from a replica"""
+    if iscoroutinefunction(view):
+        async def wrapper(request, *args, **kwargs):
+            if request.method not in SAFE_METHODS:
+                return await view(request, *args, **kwargs)
+            with replica_reads():
+                return await view(request, *args, **kwargs)
+
+        markcoroutinefunction(wrapper)
+    else:
+        def wrapper(request, *args, **kwargs):
+            if request.method not in SAFE_METHODS:
+                return view(request, *args, **kwargs)
+            with replica_reads():
+                return view(request, *args, **kwargs)
+
+    return wraps(view)(wrapper)
+
+
+def sync_replicas(replicas=None):
+    """
+    Copy the primary over each replica with SQLite's online backup API;
+    stands in for replication in local testing. Returns the aliases copied.
+    """
+    replicas = get_setting('REPLICAS') if replicas is None else replicas
+    source = connections[DEFAULT_DB_ALIAS]
+    for alias in [DEFAULT_DB_ALIAS, *replicas]:
+        if connections[alias].vendor != 'sqlite':
+            raise ValueError(f'Database {alias!r} is not SQLite; use real replication')
+    source.ensure_connection()
+    for alias in replicas:
+        target = connections[alias]
+        target.ensure_connection()
+        source.connection.backup(target.connection)
+    return list(replicas)
+
+
+class ReplicaRouter:
+    """Database router for the scheme in the module docstring (DATABASE_ROUTERS)"""
+
+    def db_for_read(self, model, **hints):
+        # Explicit, or related lookups would follow instances read from a replica back to it
+        return _read_alias.get() or DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        # Explicit, or Django would write instances read from a replica back to it
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same rows as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas get their schema by replication (sync_replicas() locally)
+        if db in get_setting('REPLICAS'):
+            return False
+        return None
@@ -0,0 +1,124 @@
+"""
+Indexed user search by email, name and phone.
+
+On SQLite, searches go through an FTS5 index (``users_user_fts``) kept in
+step with ``users_user`` by triggers, so they read a few index pages
+instead of scanning every row with LIKE '%...%'. Each search word must be
+a prefix of a word in one of the indexed columns: "jo smi" finds
+"John Smith", "example.com" finds any address at that domain.
+
+Other databases fall back to prefix matching on the columns themselves
+(``istartswith``), which scans the table: PostgreSQL compiles it to
+``UPPER(column) LIKE UPPER(...)``, which the plain B-tree indexes on these
+columns cannot serve. An expression index such as
+``UPPER(email) varchar_pattern_ops`` would; none is created here.
+
+Migration 0007 creates the index. Django rebuilds a SQLite table (dropping
+its triggers) on some schema changes, so ``repair()`` runs after every
+migrate and recreates anything missing.
+"""
+import re
+
+from django.contrib.auth import get_user_model
+from django.db import connection, connections
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+
+User = get_user_model()
+
+SEARCH_COLUMNS = ['email', 'first_name', 'last_name', 'phone']
+
+FTS_TABLE = 'users_user_fts'
+USER_TABLE = User._meta.db_table
+
+_COLUMNS = ', '.join(SEARCH_COLUMNS)
+_NEW_VALUES = ', '.join(f'new.{column}' for column in SEARCH_COLUMNS)
+_OLD_VALUES = ', '.join(f'old.{column}' for column in SEARCH_COLUMNS)
+
+CREATE_TABLE = (
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+    f"{_COLUMNS}, content='{USER_TABLE}', content_rowid='id', prefix='2 3')"
+)
+TRIGGERS = {
+    f'{FTS_TABLE}_insert': (
+        f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_insert AFTER INSERT ON {USER_TABLE} BEGIN "
+        f"INSERT INTO {FTS_TABLE}(rowid, {_COLUMNS}) VALUES (new.id, {_NEW_VALUES}); END"
+    ),
+    f'{FTS_TABLE}_delete': (
+        f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_delete AFTER DELETE ON {USER_TABLE} BEGIN "
+        f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {_COLUMNS}) VALUES ('delete', old.id, {_OLD_VALUES}); END"
+    ),
+    f'{FTS_TABLE}_update': (
+        f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_update AFTER UPDATE OF {_COLUMNS} ON {USER_TABLE} BEGIN "
+        f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {_COLUMNS}) VALUES ('delete', old.id, {_OLD_VALUES}); "
+        f"INSERT INTO {FTS_TABLE}(rowid, {_COLUMNS}) VALUES (new.id, {_NEW_VALUES}); END"
+    ),
+}
+
+# Runs of non-space characters with at least one letter or digit; pure punctuation matches nothing
+_WORD_RE = re.compile(r'\S*\w\S*')
+
+
+def uses_fts(using=connection):
+    """True when searches on this connection go through the FTS5 index"""
+    return using.vendor == 'sqlite'
+
+
+def install(using=connection):
+    """
+    Create the FTS5 table and its triggers if missing, and rebuild the index
+    when any trigger had to be recreated (rows may have changed without it).
+    """
+    if not uses_fts(using):
+        return
+    with using.cursor() as cursor:
+        cursor.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'trigger' AND name IN (%s, %s, %s)", list(TRIGGERS)
+        )
+        existing = {name for name, in cursor.fetchall()}
+        cursor.execute(CREATE_TABLE)
+        for name, sql in TRIGGERS.items():
+            cursor.execute(sql)
+        if existing != set(TRIGGERS):
+            cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+
+
+def repair(using=connection):
+    """Reinstall missing triggers once the index exists; see the module docstring"""
+    if not uses_fts(using):
+        return
+    with using.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s", [FTS_TABLE])
+        if cursor.fetchone() is None:
+            return
+    install(using)
+
+
+def uninstall(using=connection):
+    """Drop the FTS5 table and triggers"""
+    if not uses_fts(using):
+        return
+    with using.cursor() as cursor:
+        for name in TRIGGERS:
+            cursor.execute(f'DROP TRIGGER IF EXISTS {name}')
+        cursor.execute(f'DROP TABLE IF EXISTS {FTS_TABLE}')
+
+
+def fts_query(term):
+    """FTS5 MATCH expression requiring every word of ``term`` as a prefix, or None if there are no words"""
+    words = _WORD_RE.findall(term)
+    if not words:
+        return None
+    return ' '.join('"%s"*' % word.replace('"', '""') for word in words)
+
+
+def search_users(queryset, term):
+    """Filter ``queryset`` to users matching every word of ``term`` (see module docstring)"""
+    query = fts_query(term)
+    if query is None:
+        return queryset
+    if uses_fts(connections[queryset.db]):
+        return queryset.filter(pk__in=RawSQL(f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s', [query]))
+    for word in _WORD_RE.findall(term):
+        queryset = queryset.filter(Q.create([(f'{column}__istartswith', word) for column in SEARCH_COLUMNS], Q.OR))
+    return queryset
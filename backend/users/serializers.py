@@ -1,11 +1,68 @@
+from functools import cache, lru_cache
+
 from rest_framework import serializers
+from rest_framework.utils import html
 from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import identify_hasher
 from django.contrib.auth.password_validation import validate_password
+from rest_framework_simplejwt.serializers import TokenRefreshSerializer as BaseTokenRefreshSerializer
+
+from . import directory, hashing, presence
+from .fields import MinutesField, bit_flags, parse_time_of_day
+from .timing import phase
+from .tokens import FilteredRefreshToken
+from .usernames import create_user
 
 User = get_user_model()
 
+EMAIL_REGISTERED_MESSAGE = "This email address is already registered. Please use a different email address."
+EMAIL_TAKEN_MESSAGE = "This email address is already taken by another profile. Please choose a different email address."
+OLD_PASSWORD_INCORRECT_MESSAGE = "The current password you entered is incorrect. Please enter your correct current password to continue."
+
+
+class TimeOfDayField(serializers.CharField):
+    """'HH:MM' time of day, as stored by MinutesField"""
+    
+    def to_internal_value(self, data):
+        value = super().to_internal_value(data)
+        try:
+            parse_time_of_day(value)
+        except ValueError:
+            raise serializers.ValidationError(
+                "Invalid time format. Please enter the time as HH:MM using the 24-hour clock. Example: 21:00"
+            )
+        return value
+
+
+class TimedSerializerMixin:
+    """Reports is_valid() and save() as the validate and save request timing phases (users/timing.py)"""
+    
+    def is_valid(self, *, raise_exception=False):
+        with phase('validate'):
+            return super().is_valid(raise_exception=raise_exception)
+    
+    def save(self, **kwargs):
+        with phase('save'):
+            return super().save(**kwargs)
+
 
-class UserSerializer(serializers.ModelSerializer):
+class PreferenceFieldsMixin:
+    """
+    Exposes the compact preference storage on User (see users/fields.py)
+    as the plain booleans, choice strings and HH:MM times of the JSON API.
+    """
+    serializer_field_mapping = {
+        **serializers.ModelSerializer.serializer_field_mapping,
+        MinutesField: TimeOfDayField,
+    }
+    
+    def build_field(self, field_name, info, model_class, nested_depth):
+        if field_name in bit_flags(model_class):
+            return serializers.BooleanField, {'required': False}
+        return super().build_field(field_name, info, model_class, nested_depth)
+
+
+class UserSerializer(PreferenceFieldsMixin, serializers.ModelSerializer):
     """Serializer for User model - converts between User objects and JSON"""
     
     class Meta:
@@ -25,7 +82,139 @@ class UserSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'date_joined']
 
 
-class UserRegistrationSerializer(serializers.ModelSerializer):
+# Named slices of the profile for ?fields=, one per settings page of the frontend
+PROFILE_FIELD_GROUPS = {
+    'account': [
+        'email', 'first_name', 'last_name', 'country', 'country_code', 'phone', 'date_of_birth', 'gender',
+        'date_joined',
+    ],
+    'theme': [
+        'theme_mode', 'accent_color', 'font_family', 'font_size', 'compact_mode', 'show_tooltips', 'animations',
+    ],
+    'notifications': [
+        'email_alerts', 'push_notifications', 'sms_alerts', 'digest_frequency',
+        'security_alerts', 'mentions', 'weekly_summary', 'product_updates',
+        'dnd_enabled', 'dnd_start_time', 'dnd_end_time',
+    ],
+    'privacy': [
+        'profile_searchable', 'messages_from_anyone', 'show_online_status',
+        'two_factor_enabled', 'login_alerts',
+        'analytics_enabled', 'personalized_ads',
+    ],
+}
+
+
+def parse_profile_fields(value):
+    """
+    Resolve a ``?fields=`` value of comma separated field and group names to
+    a tuple of UserSerializer field names in payload order, always including
+    ``id``. Raises ValidationError naming any unknown entries.
+    """
+    available = UserSerializer.Meta.fields
+    requested = {'id'}
+    unknown = []
+    for name in filter(None, (part.strip() for part in value.split(','))):
+        if name in PROFILE_FIELD_GROUPS:
+            requested.update(PROFILE_FIELD_GROUPS[name])
+        elif name in available:
+            requested.add(name)
+        else:
+            unknown.append(name)
+    if unknown:
+        raise serializers.ValidationError(
+            f"Unknown fields: {', '.join(unknown)}. Use profile field names or the groups "
+            f"{', '.join(PROFILE_FIELD_GROUPS)}."
+        )
+    return tuple(name for name in available if name in requested)
+
+
+class FastUserSerializer:
+    """
+    Read-only stand-in for UserSerializer on hot response paths.
+
+    Builds the same payload directly from model attributes (or from a
+    ``values()`` row, see ``from_row()``) using a conversion plan derived
+    once from UserSerializer's own fields, skipping DRF's per-field
+    get_attribute / to_representation dispatch. UserSerializer remains the
+    definition of the payload; test_fast_serializer.py checks the two
+    render to identical JSON.
+    
+    ``fields`` limits the payload to a subset of field names, as returned by
+    parse_profile_fields().
+    """
+    
+    def __init__(self, instance, fields=None):
+        self.instance = instance
+        self.fields = fields
+    
+    @property
+    def data(self):
+        user = self.instance
+        with phase('serialize'):
+            return {
+                name: None if (value := getattr(user, source)) is None else convert(value)
+                for name, source, _, convert in _fast_user_plan(self.fields)
+            }
+    
+    @staticmethod
+    def row_fields(fields=None):
+        """Columns to select with values() or only() for from_row()"""
+        return User.storage_fields([source for _, source, _, _ in _fast_user_plan(fields)])
+    
+    @staticmethod
+    def from_row(row, fields=None):
+        """Payload for a dict from ``User.objects.values(*FastUserSerializer.row_fields(fields))``"""
+        return {
+            name: None if (value := read(row)) is None else convert(value)
+            for name, _, read, convert in _fast_user_plan(fields)
+        }
+
+
+def _converter(field):
+    """Cheapest callable equivalent to ``field.to_representation`` for non-None values"""
+    representation = type(field).to_representation
+    if representation is serializers.CharField.to_representation:
+        return str
+    if representation is serializers.IntegerField.to_representation:
+        return int
+    if representation is serializers.BooleanField.to_representation:
+        return lambda value: value if value is True or value is False else field.to_representation(value)
+    if representation is serializers.ChoiceField.to_representation:
+        lookup = field.choice_strings_to_values
+        return lambda value: value if value == '' else lookup.get(str(value), value)
+    return field.to_representation
+
+
+def _row_reader(source):
+    flag = bit_flags(User).get(source)
+    if flag is not None:
+        storage, mask = flag.storage, flag.mask
+        return lambda row: bool(row[storage] & mask)
+    return lambda row: row[source]
+
+
+@cache
+def _full_user_plan():
+    """(name, source, row reader, converter) for each readable UserSerializer field, in output order"""
+    return tuple(
+        (name, field.source, _row_reader(field.source), _converter(field))
+        for name, field in UserSerializer().fields.items()
+        if not field.write_only
+    )
+
+
+# ``fields`` comes from the client's ?fields=, so only the most recent
+# selections are kept rather than one plan per combination ever requested
+@lru_cache(maxsize=32)
+def _fast_user_plan(fields=None):
+    """The entries of _full_user_plan() for the names in ``fields`` (all of them for None)"""
+    plan = _full_user_plan()
+    if fields is None:
+        return plan
+    return tuple(entry for entry in plan if entry[0] in fields)
+
+
+class UserRegistrationSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """Serializer for user registration"""
     password = serializers.CharField(write_only=True, required=True, validators=[validate_password])
     password2 = serializers.CharField(write_only=True, required=True, label="Confirm Password")
@@ -42,9 +231,7 @@ class UserRegistrationSerializer(serializers.ModelSerializer):
     def validate_email(self, value):
         """Validate that email is unique in the database"""
         if User.objects.filter(email=value).exists():
-            raise serializers.ValidationError(
-                "This email address is already registered. Please use a different email address."
-            )
+            raise serializers.ValidationError(EMAIL_REGISTERED_MESSAGE)
         return value
     
     def validate(self, attrs):
@@ -59,20 +246,9 @@ class UserRegistrationSerializer(serializers.ModelSerializer):
         """Create and return a new user"""
         validated_data.pop('password2')  # Remove password2 as it's not needed
         
-        # Auto-generate unique username from email (required by Django internally)
-        email = validated_data['email']
-        base_username = email.split('@')[0]
-        username = base_username
-        
-        # Handle duplicate usernames by appending a number
-        counter = 1
-        while User.objects.filter(username=username).exists():
-            username = f"{base_username}{counter}"
-            counter += 1
-        
-        user = User.objects.create_user(
-            username=username,
-            email=email,
+        # Username is auto-generated from the email (required by Django internally)
+        user = create_user(
+            email=validated_data['email'],
             password=validated_data['password'],
             first_name=validated_data.get('first_name', ''),
             last_name=validated_data.get('last_name', '')
@@ -80,7 +256,101 @@ class UserRegistrationSerializer(serializers.ModelSerializer):
         return user
 
 
-class UserProfileUpdateSerializer(serializers.ModelSerializer):
+class UserImportSerializer(UserRegistrationSerializer):
+    """
+    Validates one row of a bulk import with the registration rules.
+
+    Email uniqueness is checked per chunk by the import command rather than
+    with a query per row, and a pre-hashed ``password_hash`` may be supplied
+    instead of a raw password.
+    """
+    password = serializers.CharField(write_only=True, required=False, validators=[validate_password])
+    password2 = serializers.CharField(write_only=True, required=False, label="Confirm Password")
+    password_hash = serializers.CharField(write_only=True, required=False)
+    
+    class Meta(UserRegistrationSerializer.Meta):
+        fields = UserRegistrationSerializer.Meta.fields + ['password_hash']
+        extra_kwargs = {
+            **UserRegistrationSerializer.Meta.extra_kwargs,
+            'email': {'required': True, 'validators': []},
+        }
+    
+    def validate_email(self, value):
+        """Normalize the email; uniqueness is checked in bulk by the caller"""
+        return User.objects.normalize_email(value)
+    
+    def validate_password_hash(self, value):
+        """Validate that the hash was produced by a configured password hasher"""
+        try:
+            identify_hasher(value)
+        except ValueError:
+            raise serializers.ValidationError(
+                "Unrecognized password hash format. Use a hash produced by one of the configured PASSWORD_HASHERS."
+            )
+        return value
+    
+    def validate(self, attrs):
+        """Require exactly one of password or password_hash"""
+        if bool(attrs.get('password')) == bool(attrs.get('password_hash')):
+            raise serializers.ValidationError({
+                "password": "Provide either a password or a password_hash for each row, but not both."
+            })
+        if attrs.get('password') and attrs.get('password2', attrs['password']) != attrs['password']:
+            raise serializers.ValidationError({
+                "password": "The passwords you entered do not match. Please make sure both password fields are identical."
+            })
+        return attrs
+
+
+class UserExportSerializer(serializers.Serializer):
+    """
+    Options of a user export (users/export.py): ``fields`` as for profile
+    reads, plus filters. Pass a plain dict, not a QueryDict, so that absent
+    booleans stay absent instead of reading as False.
+    """
+    fields = serializers.CharField(required=False)
+    q = serializers.CharField(required=False, help_text="Search words matched like the admin user search")
+    is_active = serializers.BooleanField(required=False)
+    is_staff = serializers.BooleanField(required=False)
+    country = serializers.CharField(required=False)
+    joined_after = serializers.DateTimeField(required=False)
+    joined_before = serializers.DateTimeField(required=False)
+
+    def validate_fields(self, value):
+        return parse_profile_fields(value)
+
+
+class DirectorySearchSerializer(serializers.Serializer):
+    """Query parameters of a directory search (users/directory.py)"""
+    q = serializers.CharField(max_length=100, help_text="Words matched as prefixes of names and email usernames")
+    limit = serializers.IntegerField(required=False, min_value=1, max_value=directory.MAX_LIMIT,
+                                     default=directory.DEFAULT_LIMIT)
+    cursor = serializers.CharField(required=False)
+
+    def validate_cursor(self, value):
+        try:
+            directory.decode_cursor(value)
+        except ValueError:
+            raise serializers.ValidationError('Invalid cursor.')
+        return value
+
+
+class DirectoryUserSerializer(serializers.ModelSerializer):
+    """A directory search result: only what a listed user shows to others"""
+
+    class Meta:
+        model = User
+        fields = ['id', 'first_name', 'last_name']
+
+
+class PresenceQuerySerializer(serializers.Serializer):
+    """User ids whose online status is asked for (users/presence.py)"""
+    ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1), allow_empty=False, max_length=presence.get_setting('MAX_IDS'),
+    )
+
+
+class UserProfileUpdateSerializer(TimedSerializerMixin, PreferenceFieldsMixin, serializers.ModelSerializer):
     """Serializer for updating user profile"""
     
     class Meta:
@@ -96,14 +366,57 @@ class UserProfileUpdateSerializer(serializers.ModelSerializer):
             'two_factor_enabled', 'login_alerts',
             'analytics_enabled', 'personalized_ads'
         ]
+        extra_kwargs = {
+            # validate_email already checks uniqueness; skip the duplicate UniqueValidator query
+            'email': {'validators': []},
+        }
+    
+    def to_internal_value(self, data):
+        """Drop fields whose incoming value matches the instance, so their validators never run"""
+        if self.instance is not None and not html.is_html_input(data):
+            data = {
+                name: value for name, value in data.items()
+                if not self._is_unchanged(name, value)
+            }
+        return super().to_internal_value(data)
+    
+    def _is_unchanged(self, name, value):
+        field = self.fields.get(name)
+        if field is None or field.read_only or value is None:
+            return False
+        try:
+            parsed = field.to_internal_value(value)
+        except (serializers.ValidationError, TypeError, ValueError):
+            # Let the normal validation path report the error
+            return False
+        return parsed == getattr(self.instance, field.source)
+    
+    def update(self, instance, validated_data):
+        """Write only the columns that changed, and nothing at all if none did"""
+        changed = self._apply_changes(instance, validated_data)
+        if changed:
+            instance.save(update_fields=User.storage_fields(changed))
+        return instance
+    
+    def apply(self):
+        """Set the validated changes on the instance without saving; returns the changed field names"""
+        return self._apply_changes(self.instance, self.validated_data)
+    
+    def _apply_changes(self, instance, validated_data):
+        """Set changed values on the instance and return the changed field names"""
+        changed = [
+            name for name, value in validated_data.items()
+            if getattr(instance, name) != value
+        ]
+        for name in changed:
+            setattr(instance, name, validated_data[name])
+        return changed
     
     def validate_email(self, value):
         """Validate that email is unique (excluding current user)"""
         user = self.instance
         if User.objects.filter(email=value).exclude(pk=user.pk).exists():
-            raise serializers.ValidationError(
-                "This email address is already taken by another profile. Please choose a different email address."
-            )
+            raise serializers.ValidationError(EMAIL_TAKEN_MESSAGE)
         return value
     
     def validate_phone(self, value):
@@ -115,7 +428,7 @@ class UserProfileUpdateSerializer(serializers.ModelSerializer):
         return value
 
 
-class ChangePasswordSerializer(serializers.Serializer):
+class ChangePasswordSerializer(TimedSerializerMixin, serializers.Serializer):
     """Serializer for password change"""
     old_password = serializers.CharField(required=True, write_only=True)
     new_password = serializers.CharField(required=True, write_only=True, validators=[validate_password])
@@ -132,15 +445,58 @@ class ChangePasswordSerializer(serializers.Serializer):
     def validate_old_password(self, value):
         """Validate that old password is correct"""
         user = self.context['request'].user
-        if not user.check_password(value):
-            raise serializers.ValidationError(
-                "The current password you entered is incorrect. Please enter your correct current password to continue."
-            )
+        if not hashing.check_password(user, value):
+            raise serializers.ValidationError(OLD_PASSWORD_INCORRECT_MESSAGE)
         return value
     
     def save(self, **kwargs):
         """Update user password"""
         user = self.context['request'].user
-        user.set_password(self.validated_data['new_password'])
-        user.save()
+        with phase('save'):
+            hashing.set_password(user, self.validated_data['new_password'])
+            user.save()
         return user
+
+
+class TokenRefreshSerializer(TimedSerializerMixin, BaseTokenRefreshSerializer):
+    """Token refresh whose blacklist check goes through the Bloom filter"""
+    token_class = FilteredRefreshToken
+
+
+class DeferredEmailUniquenessMixin:
+    """
+    Skips the email uniqueness query during validation. Async views run that
+    check themselves with aexists(), so is_valid() never touches the database.
+    """
+    
+    def validate_email(self, value):
+        return value
+
+
+class AsyncUserRegistrationSerializer(DeferredEmailUniquenessMixin, UserRegistrationSerializer):
+    """Registration validation for async views; see DeferredEmailUniquenessMixin"""
+    
+    class Meta(UserRegistrationSerializer.Meta):
+        extra_kwargs = {
+            **UserRegistrationSerializer.Meta.extra_kwargs,
+            'email': {'required': True, 'validators': []},
+        }
+
+
+class AsyncUserProfileUpdateSerializer(DeferredEmailUniquenessMixin, UserProfileUpdateSerializer):
+    """Profile update for async views; see DeferredEmailUniquenessMixin"""
+    
+    async def asave(self):
+        """Async counterpart of save(): write only the changed columns"""
+        with phase('save'):
+            changed = self._apply_changes(self.instance, self.validated_data)
+            if changed:
+                await self.instance.asave(update_fields=User.storage_fields(changed))
+        return self.instance
+
+
+class AsyncChangePasswordSerializer(ChangePasswordSerializer):
+    """Password change validation for async views, which verify the old password with acheck_password()"""
+    
+    def validate_old_password(self, value):
+        return value
@@ -0,0 +1,55 @@
+from django.contrib.auth import get_user_model
+from django.db import connections, transaction
+from django.db.models.signals import post_delete, post_migrate, post_save
+from django.dispatch import receiver
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+
+from . import blacklist, directory, presence, routers, search
+from .cache import invalidate_user
+
+User = get_user_model()
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_cached_user(sender, instance, **kwargs):
+    """Drop cached copies of a user, and pin it to the primary, whenever its row changes"""
+    # The saved instance follows the version bumps, including the one at
+    # commit, so ETags computed from it afterwards describe what was written
+    invalidate_user(instance.pk, instance)
+    # Replicas may not have this change yet; read this user from the primary for a while
+    routers.pin(instance)
+
+
+@receiver(post_save, sender=User)
+def update_directory(sender, instance, update_fields=None, raw=False, **kwargs):
+    """Rewrite a user's directory entries when a save touches their names, email or listing"""
+    if raw or (update_fields is not None and not directory.INDEXED_FIELDS.intersection(update_fields)):
+        return
+    directory.index_user(instance)
+
+
+@receiver(post_save, sender=User)
+def update_presence(sender, instance, update_fields=None, raw=False, **kwargs):
+    """Take a user offline as soon as they hide their online status or are deactivated"""
+    if raw or (update_fields is not None and not {'is_active', 'preference_flags'}.intersection(update_fields)):
+        return
+    presence.refresh(instance)
+
+
+@receiver(post_save, sender=BlacklistedToken)
+def record_blacklisted_token(sender, instance, created, **kwargs):
+    """Keep the blacklist Bloom filters in step with blacklist writes"""
+    if not created:
+        return
+    jti = instance.token.jti
+    # This process learns at once; other processes once the row is visible to them
+    blacklist.record_local(jti)
+    transaction.on_commit(lambda: blacklist.publish(jti))
+
+
+@receiver(post_migrate)
+def repair_search_index(sender, using, **kwargs):
+    """Recreate search triggers dropped when a migration rebuilt the users table"""
+    if sender.name == 'users':
+        search.repair(connections[using])
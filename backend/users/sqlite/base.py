@@ -0,0 +1,165 @@
+"""
+SQLite backend for serving concurrent requests (ENGINE 'users.sqlite').
+
+The stock sqlite3 backend keeps SQLite's defaults: a rollback journal, so a
+writer blocks every reader while it commits, and deferred transactions,
+which fail at once with "database is locked" when two of them try to
+upgrade from reading to writing. This backend:
+
+- applies PRAGMAS on every new connection: WAL journaling (readers never
+  wait for the writer), synchronous=NORMAL (fsync at checkpoints only,
+  still crash-safe under WAL), a larger page cache, memory-mapped reads
+  and a busy timeout for writers in other processes
+- begins transactions IMMEDIATE, taking the write lock up front where
+  waiting for it is safe
+- queues writers of the same process on a per-database lock (the write
+  queue), so threads wait their turn in Python instead of polling the
+  busy handler, which sleeps in growing steps; atomic blocks hold it until
+  commit or rollback, autocommit INSERT/UPDATE/DELETE for one statement
+- runs PRAGMA optimize when a connection closes, keeping the planner
+  statistics behind EstimatedCountPaginator current
+
+OPTIONS accepts ``pragmas`` (merged over PRAGMAS) and ``write_queue``
+(False turns the queue off) on top of the stock sqlite3 options; set
+CONN_MAX_AGE so connections and their page cache outlive a request.
+"""
+import threading
+
+from django.db import OperationalError
+from django.db.backends.sqlite3 import base
+from django.db.backends.sqlite3.base import Database
+
+PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'cache_size': -65536,      # negative = KiB, i.e. 64 MiB per connection
+    'mmap_size': 268435456,    # bytes
+    'busy_timeout': 5000,      # ms; also how long a writer waits in the write queue
+    'temp_store': 'MEMORY',
+    'analysis_limit': 400,     # bounds the ANALYZE work of PRAGMA optimize
+}
+
+# Statements that write outside a transaction and so queue on their own
+WRITE_STATEMENTS = ('INSERT', 'UPDATE', 'DELETE', 'REPLACE')
+
+_write_locks = {}
+_write_locks_guard = threading.Lock()
+
+
+def write_lock(name):
+    """The process-wide lock that writers to database ``name`` queue on"""
+    with _write_locks_guard:
+        return _write_locks.setdefault(str(name), threading.Lock())
+
+
+class SQLiteCursorWrapper(base.SQLiteCursorWrapper):
+    """Holds the write queue for single write statements run in autocommit mode"""
+
+    db = None
+
+    def execute(self, query, params=None):
+        if self.db.queue_autocommit_write(query):
+            try:
+                return super().execute(query, params)
+            finally:
+                self.db.release_write_lock()
+        return super().execute(query, params)
+
+    def executemany(self, query, param_list):
+        if self.db.queue_autocommit_write(query):
+            try:
+                return super().executemany(query, param_list)
+            finally:
+                self.db.release_write_lock()
+        return super().executemany(query, param_list)
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    def __init__(self, settings_dict, *args, **kwargs):
+        super().__init__(settings_dict, *args, **kwargs)
+        options = self.settings_dict['OPTIONS']
+        self.pragmas = {**PRAGMAS, **options.get('pragmas', {})}
+        self.write_queue = options.get('write_queue', True)
+        self.held_write_lock = None
+
+    def get_connection_params(self):
+        kwargs = super().get_connection_params()
+        kwargs.pop('pragmas', None)
+        kwargs.pop('write_queue', None)
+        if 'transaction_mode' not in self.settings_dict['OPTIONS']:
+            self.transaction_mode = 'IMMEDIATE'
+        return kwargs
+
+    def get_new_connection(self, conn_params):
+        conn = super().get_new_connection(conn_params)
+        for name, value in self.pragmas.items():
+            conn.execute(f'PRAGMA {name} = {value}')
+        return conn
+
+    def create_cursor(self, name=None):
+        cursor = self.connection.cursor(factory=SQLiteCursorWrapper)
+        cursor.db = self
+        return cursor
+
+    def acquire_write_lock(self):
+        """
+        Wait for this process's turn to write. Returns False when the queue
+        is off or this connection already holds it; raises "database is
+        locked" after busy_timeout like SQLite itself would.
+        """
+        if not self.write_queue or self.held_write_lock is not None:
+            return False
+        lock = write_lock(self.settings_dict['NAME'])
+        if not lock.acquire(timeout=self.pragmas['busy_timeout'] / 1000):
+            raise OperationalError('database is locked (timed out in the write queue)')
+        self.held_write_lock = lock
+        return True
+
+    def release_write_lock(self):
+        lock, self.held_write_lock = self.held_write_lock, None
+        if lock is not None:
+            lock.release()
+
+    def queue_autocommit_write(self, query):
+        """Take the write queue for ``query`` if it writes outside an atomic block"""
+        return (
+            not self.in_atomic_block
+            and query.lstrip()[:7].upper().startswith(WRITE_STATEMENTS)
+            and self.acquire_write_lock()
+        )
+
+    def _start_transaction_under_autocommit(self):
+        self.acquire_write_lock()
+        try:
+            super()._start_transaction_under_autocommit()
+        except BaseException:
+            self.release_write_lock()
+            raise
+
+    def _commit(self):
+        try:
+            return super()._commit()
+        finally:
+            self.release_write_lock()
+
+    def _rollback(self):
+        try:
+            return super()._rollback()
+        finally:
+            self.release_write_lock()
+
+    def _set_autocommit(self, autocommit):
+        super()._set_autocommit(autocommit)
+        if autocommit:
+            self.release_write_lock()
+
+    def _close(self):
+        try:
+            if self.connection is not None and not self.is_in_memory_db():
+                try:
+                    self.connection.execute('PRAGMA optimize')
+                except Database.Error:
+                    pass
+            return super()._close()
+        finally:
+            self.release_write_lock()
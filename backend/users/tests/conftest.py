@@ -50,3 +50,19 @@ def authenticated_client(api_client, create_user):
     user = create_user()
     api_client.force_authenticate(user=user)
     return api_client, user
+
+
+@pytest.fixture(autouse=True)
+def clear_user_cache():
+    """Start every test with empty user caches, login throttle buckets, blacklist filter and presence state"""
+    from django.core.cache import cache
+    from users import blacklist, presence
+    from users.cache import clear_local_cache
+    from users.throttling import clear_local_buckets
+    cache.clear()
+    clear_local_cache()
+    clear_local_buckets()
+    blacklist.reset()
+    presence.reset()
+    yield
+    clear_local_cache()
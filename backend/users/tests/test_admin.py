@@ -0,0 +1,155 @@
+import pytest
+from datetime import datetime, timedelta, timezone
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.urls import reverse
+
+from users import pagination, search
+from users.admin import UserAdmin
+from users.pagination import EstimatedCountPaginator
+
+User = get_user_model()
+
+CHANGELIST = reverse('admin:users_user_changelist')
+
+
+@pytest.fixture
+def admin_client(client, create_user):
+    """Client logged in as a superuser"""
+    client.force_login(create_user(email='admin@example.com', is_staff=True, is_superuser=True))
+    return client
+
+
+@pytest.fixture
+def many_users(db):
+    """25 users joined a minute apart, plus two sharing a timestamp"""
+    start = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    users = [
+        User(email=f'member{i}@example.com', username=f'member{i}', first_name=f'First{i}', last_name='Member',
+             date_joined=start + timedelta(minutes=i))
+        for i in range(25)
+    ]
+    users += [
+        User(email=f'twin{i}@example.com', username=f'twin{i}', date_joined=start + timedelta(minutes=10))
+        for i in range(2)
+    ]
+    return User.objects.bulk_create(users)
+
+
+def listed_emails(response):
+    return [user.email for user in response.context['cl'].result_list]
+
+
+@pytest.mark.django_db
+class TestUserChangelist:
+    """Tests for the keyset-paginated user changelist"""
+
+    def test_keyset_pages(self, admin_client, many_users, monkeypatch):
+        """Test following the next-page cursor walks every user once, newest first"""
+        monkeypatch.setattr(UserAdmin, 'list_per_page', 10)
+        expected = list(User.objects.order_by('-date_joined', '-pk').values_list('email', flat=True))
+
+        seen, url = [], CHANGELIST
+        while url:
+            response = admin_client.get(url)
+            assert response.status_code == 200
+            seen += listed_emails(response)
+            cl = response.context['cl']
+            url = CHANGELIST + cl.next_page_url() if cl.next_cursor else None
+
+        assert seen == expected
+
+    def test_no_full_count(self, admin_client, many_users, django_assert_max_num_queries):
+        """Test the unfiltered list never runs an exact COUNT(*) once the count is cached"""
+        admin_client.get(CHANGELIST)
+        with django_assert_max_num_queries(20) as queries:
+            admin_client.get(CHANGELIST)
+
+        assert not [query for query in queries.captured_queries if 'COUNT(' in query['sql']]
+
+    def test_numbered_pages_still_work(self, admin_client, many_users, monkeypatch):
+        """Test ?p= and other orderings fall back to numbered pages"""
+        monkeypatch.setattr(UserAdmin, 'list_per_page', 10)
+
+        response = admin_client.get(CHANGELIST, {'o': '1', 'p': '2'})
+
+        assert response.status_code == 200
+        assert len(listed_emails(response)) == 10
+
+    def test_invalid_cursor(self, admin_client, many_users):
+        """Test a malformed cursor is rejected like other bad lookups"""
+        response = admin_client.get(CHANGELIST, {'after': 'garbage'})
+
+        assert response.status_code == 302
+        assert response.url.endswith('?e=1')
+
+    def test_search(self, admin_client, many_users):
+        """Test search matches word prefixes across email and name columns"""
+        response = admin_client.get(CHANGELIST, {'q': 'first1 memb'})
+
+        assert sorted(listed_emails(response)) == sorted(
+            f'member{i}@example.com' for i in [1] + list(range(10, 20))
+        )
+
+
+@pytest.mark.django_db
+class TestUserSearch:
+    """Tests for the FTS5 user search index"""
+
+    def test_follows_writes(self, create_user):
+        """Test inserts, updates and deletes keep the index in step"""
+        user = create_user(email='alice@example.com', first_name='Alice', phone='+1-555-123-4567')
+        users = User.objects.all()
+
+        assert list(search.search_users(users, 'ali')) == [user]
+        assert list(search.search_users(users, '555-12')) == [user]
+
+        User.objects.filter(pk=user.pk).update(first_name='Beatrice')
+        assert not search.search_users(users, 'alice').exclude(email='alice@example.com').exists()
+        assert list(search.search_users(users, 'bea')) == [user]
+
+        user.delete()
+        assert not search.search_users(users, 'bea').exists()
+
+    def test_punctuation_and_quotes(self, create_user):
+        """Test search terms cannot break the MATCH syntax"""
+        create_user(email='quote@example.com')
+
+        assert search.search_users(User.objects.all(), '" * -').count() == 1  # no words: unfiltered
+        assert search.search_users(User.objects.all(), 'quo" NEAR(').count() == 0
+
+    def test_repair_recreates_triggers(self):
+        """Test repair() restores dropped triggers and reindexes rows written meanwhile"""
+        with connection.cursor() as cursor:
+            cursor.execute(f'DROP TRIGGER {search.FTS_TABLE}_insert')
+        [user] = User.objects.bulk_create([User(email='late@example.com', username='late')])
+        assert not search.search_users(User.objects.all(), 'late').exists()
+
+        search.repair()
+
+        assert list(search.search_users(User.objects.all(), 'late')) == [user]
+
+
+@pytest.mark.django_db
+class TestEstimatedCountPaginator:
+    """Tests for cheap admin counts"""
+
+    def test_uses_table_statistics(self, many_users):
+        """Test unfiltered counts come from sqlite_stat1 once ANALYZE has run"""
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+        User.objects.bulk_create([User(email='after@example.com', username='after')])
+
+        paginator = EstimatedCountPaginator(User.objects.order_by('pk'), 10)
+        assert paginator.count == 27
+        assert paginator.count_is_estimate
+
+    def test_filtered_count_is_bounded(self, many_users, monkeypatch):
+        """Test filtered counts stop at COUNT_LIMIT"""
+        monkeypatch.setattr(pagination, 'COUNT_LIMIT', 5)
+
+        paginator = EstimatedCountPaginator(User.objects.filter(last_name='Member').order_by('pk'), 10)
+        assert (paginator.count, paginator.count_is_estimate) == (5, True)
+
+        paginator = EstimatedCountPaginator(User.objects.filter(email__startswith='twin').order_by('pk'), 10)
+        assert (paginator.count, paginator.count_is_estimate) == (2, False)
@@ -2,6 +2,7 @@ import pytest
 from django.urls import reverse
 from rest_framework import status
 from django.contrib.auth import get_user_model
+from rest_framework_simplejwt.tokens import RefreshToken
 
 User = get_user_model()
 
@@ -167,6 +168,169 @@ class TestUserProfile:
         assert response.status_code == status.HTTP_200_OK
         assert response.data['user']['first_name'] == 'NewFirst'
         assert response.data['user']['last_name'] == 'NewLast'
+    
+    def test_get_profile_not_modified(self, authenticated_client):
+        """Test a matching If-None-Match returns 304 without a body"""
+        client, user = authenticated_client
+        
+        url = reverse('profile')
+        etag = client.get(url)['ETag']
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+        assert response['ETag'] == etag
+        assert not response.content
+    
+    def test_get_profile_etag_changes_after_update(self, authenticated_client):
+        """Test an update invalidates the previous ETag"""
+        client, user = authenticated_client
+        
+        url = reverse('profile')
+        etag = client.get(url)['ETag']
+        put_response = client.put(url, {'first_name': 'Changed'}, format='json')
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        
+        assert response.status_code == status.HTTP_200_OK
+        assert response['ETag'] != etag
+        assert response['ETag'] == put_response['ETag']
+        assert response.data['user']['first_name'] == 'Changed'
+    
+    @pytest.mark.django_db(transaction=True)
+    def test_write_etag_matches_next_get_after_commit(self, api_client, create_user):
+        """Test PUT and batch ETags name the committed version, so the next GET revalidates to 304"""
+        client = api_client
+        # A real token, so each request resolves the user through the cache
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(create_user()).access_token}')
+        url = reverse('profile')
+        
+        put_response = client.put(url, {'first_name': 'Changed'}, format='json')
+        response = client.get(url, HTTP_IF_NONE_MATCH=put_response['ETag'])
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+        
+        batch_response = client.post(reverse('profile_batch'), {'patches': [{'last_name': 'Again'}]}, format='json')
+        response = client.get(url, HTTP_IF_NONE_MATCH=batch_response['ETag'])
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+    
+    def test_get_profile_fields(self, authenticated_client):
+        """Test ?fields= returns only the named fields and groups, plus id"""
+        client, user = authenticated_client
+        
+        response = client.get(reverse('profile'), {'fields': 'theme,email'})
+        
+        assert response.status_code == status.HTTP_200_OK
+        assert list(response.data['user']) == [
+            'id', 'email', 'theme_mode', 'accent_color', 'font_family', 'font_size',
+            'compact_mode', 'show_tooltips', 'animations',
+        ]
+        assert response.data['user']['email'] == user.email
+    
+    def test_get_profile_unknown_fields(self, authenticated_client):
+        """Test unknown field names are rejected"""
+        client, user = authenticated_client
+        
+        response = client.get(reverse('profile'), {'fields': 'privacy,password,bogus'})
+        
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert 'password, bogus' in response.data['details']['fields'][0]
+    
+    def test_get_profile_fields_etag(self, authenticated_client):
+        """Test each field set has its own ETag, and revalidates with it"""
+        client, user = authenticated_client
+        url = reverse('profile')
+        
+        full_etag = client.get(url)['ETag']
+        theme_etag = client.get(url, {'fields': 'theme'})['ETag']
+        
+        assert theme_etag != full_etag
+        assert client.get(url, {'fields': 'theme'}, HTTP_IF_NONE_MATCH=theme_etag).status_code == status.HTTP_304_NOT_MODIFIED
+        assert client.get(url, {'fields': 'privacy'}, HTTP_IF_NONE_MATCH=theme_etag).status_code == status.HTTP_200_OK
+
+
+@pytest.mark.django_db
+class TestProfileBatch:
+    """Tests for the batch profile update endpoint"""
+    
+    def test_batch_update_applies_patches_in_order(self, authenticated_client):
+        """Test later patches override earlier ones and the profile is returned"""
+        client, user = authenticated_client
+        
+        url = reverse('profile_batch')
+        response = client.post(url, {'patches': [
+            {'theme_mode': 'dark', 'accent_color': 'amber'},
+            {'font_family': 'roboto'},
+            {'accent_color': 'emerald', 'font_size': 'large'},
+        ]}, format='json')
+        
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['user']['theme_mode'] == 'dark'
+        assert response.data['user']['accent_color'] == 'emerald'
+        assert 'ETag' in response
+        
+        user.refresh_from_db()
+        assert (user.theme_mode, user.accent_color, user.font_family, user.font_size) == (
+            'dark', 'emerald', 'roboto', 'large'
+        )
+    
+    def test_batch_update_single_write(self, authenticated_client, django_assert_num_queries):
+        """Test the whole batch costs one UPDATE inside its transaction"""
+        client, user = authenticated_client
+        
+        url = reverse('profile_batch')
+        # SAVEPOINT, UPDATE, RELEASE SAVEPOINT (the test runs inside a transaction)
+        with django_assert_num_queries(3):
+            response = client.post(url, {'patches': [
+                {'theme_mode': 'dark'}, {'font_size': 'small'},
+            ]}, format='json')
+        
+        assert response.status_code == status.HTTP_200_OK
+    
+    def test_batch_update_invalid_patch_writes_nothing(self, authenticated_client):
+        """Test one invalid patch rejects the whole batch"""
+        client, user = authenticated_client
+        
+        url = reverse('profile_batch')
+        response = client.post(url, {'patches': [
+            {'theme_mode': 'dark'}, {'font_size': 'enormous'},
+        ]}, format='json')
+        
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert response.data['details']['patches'][0] == {}
+        assert 'font_size' in response.data['details']['patches'][1]
+        user.refresh_from_db()
+        assert user.theme_mode == 'system'
+    
+    def test_batch_update_overridden_invalid_value_rejected(self, authenticated_client):
+        """Test an invalid value is reported even when a later patch overrides it"""
+        client, user = authenticated_client
+        
+        response = client.post(reverse('profile_batch'), {'patches': [
+            {'font_size': 'enormous'}, {'font_size': 'large'},
+        ]}, format='json')
+        
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert 'font_size' in response.data['details']['patches'][0]
+        assert response.data['details']['patches'][1] == {}
+    
+    def test_batch_update_reverting_patch(self, authenticated_client):
+        """Test a later patch can set a field back to its stored value"""
+        client, user = authenticated_client
+        
+        response = client.post(reverse('profile_batch'), {'patches': [
+            {'theme_mode': 'dark'}, {'theme_mode': 'system'},
+        ]}, format='json')
+        
+        assert response.status_code == status.HTTP_200_OK
+        user.refresh_from_db()
+        assert user.theme_mode == 'system'
+    
+    def test_batch_update_requires_list(self, authenticated_client):
+        """Test a malformed body is rejected"""
+        client, user = authenticated_client
+        
+        url = reverse('profile_batch')
+        response = client.post(url, {'patches': {'theme_mode': 'dark'}}, format='json')
+        
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
 
 
 @pytest.mark.django_db
@@ -231,8 +395,10 @@ class TestAccountDeletion:
         
         assert response.status_code == status.HTTP_200_OK
         
-        # Verify user was deleted
-        assert not User.objects.filter(id=user_id).exists()
+        # Verify user was deactivated and queued for the background purge
+        user = User.objects.get(id=user_id)
+        assert not user.is_active
+        assert user.deletion_requested_at is not None
     
     def test_delete_account_wrong_password(self, authenticated_client):
         """Test account deletion fails with wrong password"""
@@ -0,0 +1,208 @@
+import pytest
+from asgiref.sync import async_to_sync
+from django.contrib.auth import get_user_model
+from django.test import AsyncClient
+from django.urls import include, path, reverse
+from rest_framework import status
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+from rest_framework_simplejwt.tokens import RefreshToken
+
+User = get_user_model()
+
+# Serve /api/auth/ from the async views for every test in this module
+urlpatterns = [
+    path('api/auth/', include('users.async_urls')),
+]
+
+pytestmark = [pytest.mark.django_db, pytest.mark.urls(__name__)]
+
+
+class Client:
+    """AsyncClient driven from synchronous tests"""
+
+    def __init__(self, user=None):
+        self.client = AsyncClient()
+        self.headers = {}
+        if user is not None:
+            self.headers['Authorization'] = f'Bearer {RefreshToken.for_user(user).access_token}'
+
+    def request(self, method, name, data=None, **headers):
+        call = getattr(self.client, method)
+        kwargs = {'headers': {**self.headers, **headers}}
+        if data is not None:
+            kwargs.update(data=data, content_type='application/json')
+        return async_to_sync(call)(reverse(name), **kwargs)
+
+    def get(self, name, query=None, **headers):
+        return async_to_sync(self.client.get)(reverse(name), query, headers={**self.headers, **headers})
+
+    def post(self, name, data=None, **headers):
+        return self.request('post', name, data, **headers)
+
+    def put(self, name, data=None, **headers):
+        return self.request('put', name, data, **headers)
+
+    def delete(self, name, data=None, **headers):
+        return self.request('delete', name, data, **headers)
+
+
+class TestAsyncAuthViews:
+    """Tests for async register, login and logout"""
+
+    def test_register(self, test_user_data):
+        """Test registration creates the user and returns tokens"""
+        response = Client().post('register', test_user_data)
+
+        assert response.status_code == status.HTTP_201_CREATED
+        data = response.json()
+        assert data['user']['email'] == test_user_data['email']
+        assert 'access' in data and 'refresh' in data
+        assert User.objects.get(email=test_user_data['email']).username == 'test'
+
+    def test_register_duplicate_email(self, create_user, test_user_data):
+        """Test registration reports a taken email with the sync view's message"""
+        create_user(email=test_user_data['email'])
+
+        response = Client().post('register', test_user_data)
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert 'already registered' in response.json()['email'][0]
+
+    def test_login_and_logout(self, create_user):
+        """Test login issues tokens and logout blacklists the refresh token"""
+        create_user(email='login@example.com', password='TestPass123!')
+
+        response = Client().post('login', {'email': 'login@example.com', 'password': 'TestPass123!'})
+        assert response.status_code == status.HTTP_200_OK
+        data = response.json()
+
+        client = Client()
+        client.headers['Authorization'] = f"Bearer {data['access']}"
+        response = client.post('logout', {'refresh': data['refresh']})
+        assert response.status_code == status.HTTP_200_OK
+        assert BlacklistedToken.objects.filter(token__token=data['refresh']).exists()
+
+        # A blacklisted token is rejected the second time
+        response = client.post('logout', {'refresh': data['refresh']})
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_login_invalid_credentials(self, create_user):
+        """Test a wrong password is rejected"""
+        create_user(email='login@example.com', password='TestPass123!')
+
+        response = Client().post('login', {'email': 'login@example.com', 'password': 'WrongPass123!'})
+
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+        assert response.json() == {'error': 'Invalid credentials'}
+
+    def test_login_throttled(self, settings):
+        """Test the async login applies the brute-force throttle"""
+        settings.LOGIN_THROTTLE = {'EMAIL_LIMIT': 1}
+        client = Client()
+        credentials = {'email': 'victim@example.com', 'password': 'WrongPass123!'}
+
+        assert client.post('login', credentials).status_code == status.HTTP_401_UNAUTHORIZED
+        response = client.post('login', credentials)
+        assert response.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+        assert 'Retry-After' in response
+
+    def test_wrong_method_and_bad_json(self):
+        """Test unsupported methods and malformed bodies are rejected like DRF does"""
+        client = Client()
+
+        assert client.get('login').status_code == status.HTTP_405_METHOD_NOT_ALLOWED
+        response = async_to_sync(client.client.post)(
+            reverse('login'), data='{not json', content_type='application/json'
+        )
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+class TestAsyncProfileViews:
+    """Tests for async profile, change-password and delete-account"""
+
+    def test_requires_authentication(self):
+        """Test requests without a token get 401"""
+        response = Client().get('profile')
+
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+        assert 'WWW-Authenticate' in response
+
+    def test_get_profile_etag(self, create_user):
+        """Test the profile carries an ETag and revalidates with 304"""
+        user = create_user()
+        client = Client(user)
+
+        response = client.get('profile')
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json()['user']['email'] == user.email
+
+        response = client.get('profile', **{'If-None-Match': response['ETag']})
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+
+    def test_get_profile_fields(self, create_user):
+        """Test ?fields= limits the payload like the sync view"""
+        user = create_user()
+
+        response = Client(user).get('profile', {'fields': 'privacy'})
+        assert response.status_code == status.HTTP_200_OK
+        assert set(response.json()['user']) == {
+            'id', 'profile_searchable', 'messages_from_anyone', 'show_online_status',
+            'two_factor_enabled', 'login_alerts', 'analytics_enabled', 'personalized_ads',
+        }
+
+        response = Client(user).get('profile', {'fields': 'nope'})
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_update_profile(self, create_user):
+        """Test PUT writes the changed fields"""
+        user = create_user()
+
+        response = Client(user).put('profile', {'first_name': 'Async'})
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json()['user']['first_name'] == 'Async'
+        user.refresh_from_db()
+        assert user.first_name == 'Async'
+
+    def test_update_profile_email_taken(self, create_user):
+        """Test PUT rejects an email owned by another user"""
+        create_user(email='other@example.com')
+        user = create_user(email='me@example.com')
+
+        response = Client(user).put('profile', {'email': 'other@example.com'})
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert 'email' in response.json()['details']
+
+    def test_change_password(self, create_user):
+        """Test the password changes only with the correct old password"""
+        user = create_user(password='TestPass123!')
+        client = Client(user)
+
+        response = client.post('change_password', {
+            'old_password': 'WrongPass123!',
+            'new_password': 'NewPass456!',
+            'new_password2': 'NewPass456!'
+        })
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert 'old_password' in response.json()['details']
+
+        response = client.post('change_password', {
+            'old_password': 'TestPass123!',
+            'new_password': 'NewPass456!',
+            'new_password2': 'NewPass456!'
+        })
+        assert response.status_code == status.HTTP_200_OK
+        user.refresh_from_db()
+        assert user.check_password('NewPass456!')
+
+    def test_delete_account(self, create_user):
+        """Test the account is deactivated for deletion with the correct password"""
+        user = create_user(password='TestPass123!')
+        client = Client(user)
+
+        assert client.delete('delete_account', {'password': 'WrongPass123!'}).status_code == status.HTTP_401_UNAUTHORIZED
+
+        response = client.delete('delete_account', {'password': 'TestPass123!'})
+        assert response.status_code == status.HTTP_200_OK
+        assert User.objects.filter(pk=user.pk, is_active=False, deletion_requested_at__isnull=False).exists()
@@ -0,0 +1,94 @@
+import pytest
+from datetime import datetime, timedelta, timezone
+from django.contrib.auth import get_user_model
+from django.db import connection
+
+from users import audience
+from users.audience import deliverable_user_ids, minute_of_day
+
+User = get_user_model()
+
+
+def at(hour, minute=0):
+    return datetime(2026, 3, 1, hour, minute, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+def make_user(db):
+    """Create a user with notification preferences (defaults: mentions by email and push, no DND)"""
+    counter = iter(range(1000))
+
+    def make(**preferences):
+        n = next(counter)
+        return User.objects.create(email=f'person{n}@example.com', username=f'person{n}', **preferences)
+    return make
+
+
+def ids(notification_type, channel, when=None):
+    return sorted(deliverable_user_ids(notification_type, channel, when or at(12)))
+
+
+@pytest.mark.django_db
+class TestAudience:
+    """Tests for users/audience.py"""
+
+    def test_type_and_channel_preferences(self, make_user):
+        """Test both the notification type and the channel must be switched on"""
+        everything = make_user()
+        no_mentions = make_user(mentions=False)
+        no_email = make_user(email_alerts=False)
+        updates = make_user(product_updates=True)
+
+        assert ids('mentions', 'email') == [everything.pk, updates.pk]
+        assert ids('mentions', 'push') == [everything.pk, no_email.pk, updates.pk]
+        assert ids('security', 'push') == [everything.pk, no_mentions.pk, no_email.pk, updates.pk]
+        assert ids('product_updates', 'email') == [updates.pk]
+
+    def test_inactive_and_unreachable_excluded(self, make_user):
+        """Test inactive users never qualify and SMS needs a phone number"""
+        make_user(is_active=False)
+        make_user(sms_alerts=True)
+        with_phone = make_user(sms_alerts=True, phone='0771234567')
+
+        assert ids('security', 'sms') == [with_phone.pk]
+        assert len(ids('security', 'email')) == 2
+
+    def test_quiet_hours(self, make_user):
+        """Test DND windows, including ones wrapping midnight, suppress non-urgent types"""
+        night = make_user(dnd_enabled=True, dnd_start_time='22:00', dnd_end_time='07:00')
+        lunch = make_user(dnd_enabled=True, dnd_start_time='12:00', dnd_end_time='13:00')
+        disabled = make_user(dnd_enabled=False, dnd_start_time='00:00', dnd_end_time='23:59')
+        empty = make_user(dnd_enabled=True, dnd_start_time='09:00', dnd_end_time='09:00')
+
+        assert ids('mentions', 'email', at(23)) == [lunch.pk, disabled.pk, empty.pk]
+        assert ids('mentions', 'email', at(3)) == [lunch.pk, disabled.pk, empty.pk]
+        assert ids('mentions', 'email', at(7)) == [night.pk, lunch.pk, disabled.pk, empty.pk]
+        assert ids('mentions', 'email', at(12, 30)) == [night.pk, disabled.pk, empty.pk]
+        assert ids('mentions', 'email', at(13)) == [night.pk, lunch.pk, disabled.pk, empty.pk]
+        # Security alerts ignore quiet hours
+        assert ids('security', 'email', at(23)) == [night.pk, lunch.pk, disabled.pk, empty.pk]
+
+    def test_instant_is_read_in_utc(self):
+        """Test instants in other time zones, and naive ones, are placed on the UTC clock"""
+        colombo = timezone(timedelta(hours=5, minutes=30))
+
+        assert minute_of_day(datetime(2026, 3, 1, 5, 30, tzinfo=colombo)) == 0
+        assert minute_of_day(datetime(2026, 3, 1, 1, 15)) == 75
+
+    def test_unknown_type_or_channel(self, db):
+        """Test unknown notification types and channels are rejected"""
+        with pytest.raises(ValueError, match='notification type'):
+            audience.audience('birthdays', 'email')
+        with pytest.raises(ValueError, match='channel'):
+            audience.audience('mentions', 'pigeon')
+
+    @pytest.mark.parametrize('channel', ['email', 'sms'])
+    def test_answered_from_index(self, db, channel):
+        """Test the selection, including the SMS phone check, reads only the covering audience index"""
+        sql, params = audience.audience('mentions', channel, at(23)).values_list('pk').query.sql_with_params()
+
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+            plan = ' '.join(row[-1] for row in cursor.fetchall())
+
+        assert 'COVERING INDEX users_user_audience_idx' in plan
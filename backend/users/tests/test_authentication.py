@@ -0,0 +1,69 @@
+import pytest
+from django.urls import reverse
+from rest_framework import status
+from rest_framework_simplejwt.tokens import RefreshToken
+from django.contrib.auth import get_user_model
+
+from users.cache import get_user_version
+
+User = get_user_model()
+
+
+@pytest.mark.django_db
+class TestCachedJWTAuthentication:
+    """Tests for cached user resolution on JWT-authenticated requests"""
+
+    def _auth(self, api_client, user):
+        token = RefreshToken.for_user(user).access_token
+        api_client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+        return api_client
+
+    def test_second_request_skips_user_query(self, api_client, create_user, django_assert_num_queries):
+        """Test the user row is only read once across requests"""
+        user = create_user()
+        client = self._auth(api_client, user)
+        url = reverse('profile')
+
+        assert client.get(url).status_code == status.HTTP_200_OK
+        with django_assert_num_queries(0):
+            response = client.get(url)
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['user']['email'] == user.email
+
+    def test_save_invalidates_cached_user(self, api_client, create_user):
+        """Test a saved change is visible on the next request"""
+        user = create_user()
+        client = self._auth(api_client, user)
+        url = reverse('profile')
+        client.get(url)
+        version = get_user_version(user.pk)
+
+        user.first_name = 'Changed'
+        user.save()
+
+        assert get_user_version(user.pk) != version
+        assert client.get(url).data['user']['first_name'] == 'Changed'
+
+    def test_deleted_user_rejected(self, api_client, create_user):
+        """Test a deleted user cannot authenticate from a cached copy"""
+        user = create_user()
+        client = self._auth(api_client, user)
+        url = reverse('profile')
+        client.get(url)
+
+        user.delete()
+
+        assert client.get(url).status_code == status.HTTP_401_UNAUTHORIZED
+
+    def test_inactive_user_rejected(self, api_client, create_user):
+        """Test deactivating a user takes effect despite the cache"""
+        user = create_user()
+        client = self._auth(api_client, user)
+        url = reverse('profile')
+        client.get(url)
+
+        user.is_active = False
+        user.save()
+
+        assert client.get(url).status_code == status.HTTP_401_UNAUTHORIZED
@@ -0,0 +1,103 @@
+import pytest
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from users import blacklist
+from users.blacklist import BloomFilter
+
+
+def blacklist_queries(queries):
+    return [q for q in queries if 'token_blacklist_blacklistedtoken' in q['sql']]
+
+
+def blacklist_checks(queries):
+    """Membership checks by JTI, as opposed to rotation writes or filter rebuilds"""
+    return [q for q in blacklist_queries(queries) if '"jti" =' in q['sql']]
+
+
+class TestBloomFilter:
+    """Tests for the Bloom filter itself"""
+
+    def test_no_false_negatives(self):
+        """Test every added value is reported as present"""
+        bloom = BloomFilter(capacity=1000, error_rate=0.01)
+        values = [f'jti-{i}' for i in range(1000)]
+        for value in values:
+            bloom.add(value)
+
+        assert all(value in bloom for value in values)
+
+    def test_false_positive_rate(self):
+        """Test the false positive rate at capacity stays near the configured rate"""
+        bloom = BloomFilter(capacity=1000, error_rate=0.01)
+        for i in range(1000):
+            bloom.add(f'jti-{i}')
+
+        false_positives = sum(f'other-{i}' in bloom for i in range(10000))
+        assert false_positives < 300
+
+
+@pytest.mark.django_db
+class TestBlacklistFilter:
+    """Tests for the blacklist fast path on refresh and logout"""
+
+    def test_refresh_skips_blacklist_query(self, api_client, create_user):
+        """Test refreshing a live token does not query the blacklist table once the filter is built"""
+        user = create_user()
+        blacklist.rebuild()
+        refresh = RefreshToken.for_user(user)
+
+        with CaptureQueriesContext(connection) as ctx:
+            response = api_client.post(reverse('token_refresh'), {'refresh': str(refresh)}, format='json')
+
+        assert response.status_code == status.HTTP_200_OK
+        assert blacklist_checks(ctx.captured_queries) == []
+
+    def test_rotated_token_is_rejected(self, api_client, create_user):
+        """Test a refresh token blacklisted by rotation cannot be used again"""
+        user = create_user()
+        refresh = str(RefreshToken.for_user(user))
+
+        assert api_client.post(reverse('token_refresh'), {'refresh': refresh}, format='json').status_code == status.HTTP_200_OK
+        response = api_client.post(reverse('token_refresh'), {'refresh': refresh}, format='json')
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+    def test_logged_out_token_is_rejected(self, api_client, create_user):
+        """Test a refresh token blacklisted by logout cannot be refreshed"""
+        user = create_user()
+        refresh = str(RefreshToken.for_user(user))
+        api_client.force_authenticate(user=user)
+
+        assert api_client.post(reverse('logout'), {'refresh': refresh}, format='json').status_code == status.HTTP_200_OK
+        response = api_client.post(reverse('token_refresh'), {'refresh': refresh}, format='json')
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+    def test_learns_from_other_processes(self):
+        """Test JTIs published to the shared delta log reach this process's filter"""
+        blacklist.rebuild()
+        assert not blacklist.might_be_blacklisted('remote-jti')
+
+        blacklist.publish('remote-jti')
+
+        assert blacklist.might_be_blacklisted('remote-jti')
+
+    def test_missing_log_entry_rebuilds(self, create_user):
+        """Test a delta log gap rebuilds from the database instead of trusting the filter"""
+        user = create_user()
+        blacklist.rebuild()
+        token = RefreshToken.for_user(user)
+        jti = token['jti']
+        token.blacklist()
+        blacklist.reset()  # another process: it never saw the local add
+        blacklist.rebuild()
+        blacklist.publish('evicted-jti')
+        cache.delete(blacklist._entry_key(cache.get(blacklist.SEQ_KEY)))
+
+        with CaptureQueriesContext(connection) as ctx:
+            assert blacklist.might_be_blacklisted(jti)
+
+        assert len(blacklist_queries(ctx.captured_queries)) == 1
@@ -0,0 +1,180 @@
+import pytest
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+from django.contrib.admin.models import ADDITION, LogEntry
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from users import blacklist, deletion
+from users.deletion import deactivate_account, purge_deleted_accounts
+
+User = get_user_model()
+
+
+def issue_tokens(user, count, blacklisted=0, expired=0):
+    """``count`` live refresh tokens for ``user`` (the first ``blacklisted`` revoked) plus ``expired`` dead ones"""
+    tokens = [RefreshToken.for_user(user) for _ in range(count)]
+    for token in tokens[:blacklisted]:
+        token.blacklist()
+    now = timezone.now()
+    OutstandingToken.objects.bulk_create([
+        OutstandingToken(user=user, jti=f'expired-{user.pk}-{i}', token='x', created_at=now,
+                         expires_at=now - timedelta(days=1))
+        for i in range(expired)
+    ])
+    return tokens
+
+
+@pytest.mark.django_db
+class TestDeactivateAccount:
+    """Tests for the soft-delete half of account deletion"""
+
+    def test_marks_user_and_revokes_live_tokens(self, create_user):
+        """Test live tokens are blacklisted with one INSERT ... SELECT, skipping revoked and expired ones"""
+        user = create_user()
+        issue_tokens(user, 5, blacklisted=1, expired=2)
+
+        with CaptureQueriesContext(connection) as ctx:
+            revoked = deactivate_account(user)
+
+        user.refresh_from_db()
+        assert revoked == 4
+        assert not user.is_active and user.deletion_requested_at is not None
+        assert BlacklistedToken.objects.filter(token__user=user).count() == 5
+        inserts = [q for q in ctx.captured_queries if q['sql'].startswith('INSERT INTO "token_blacklist_blacklistedtoken"')]
+        assert len(inserts) == 1
+
+    def test_publishes_revoked_jtis(self, create_user, django_capture_on_commit_callbacks):
+        """Test other processes' Bloom filters learn the revoked JTIs from the delta log"""
+        user = create_user()
+        jtis = {token['jti'] for token in issue_tokens(user, 3)}
+        blacklist.rebuild()
+
+        with django_capture_on_commit_callbacks(execute=True):
+            deactivate_account(user)
+
+        keys = blacklist._filter.missing(cache.get(blacklist.SEQ_KEY))
+        assert set(cache.get_many(keys).values()) == jtis
+
+    def test_email_released_at_once(self, api_client, create_user):
+        """Test the address can register again before the purge runs, and login does not reveal the old account"""
+        user = create_user(email='gone@example.com')
+        api_client.force_authenticate(user=user)
+        api_client.delete(reverse('delete_account'), {'password': 'TestPass123!'}, format='json')
+        api_client.force_authenticate(user=None)
+
+        response = api_client.post(reverse('login'), {'email': 'gone@example.com', 'password': 'TestPass123!'}, format='json')
+        unknown = api_client.post(reverse('login'), {'email': 'nobody@example.com', 'password': 'TestPass123!'}, format='json')
+        assert (response.status_code, response.data) == (unknown.status_code, unknown.data)
+
+        response = api_client.post(reverse('register'), {
+            'email': 'gone@example.com', 'password': 'TestPass123!', 'password2': 'TestPass123!',
+        }, format='json')
+        assert response.status_code == status.HTTP_201_CREATED
+        assert User.objects.get(pk=user.pk).deletion_requested_at is not None
+
+        response = api_client.post(reverse('login'), {'email': 'gone@example.com', 'password': 'TestPass123!'}, format='json')
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['user']['id'] != user.pk
+
+    def test_tokens_stop_working(self, api_client, create_user):
+        """Test the account's refresh tokens are rejected straight after the delete request"""
+        user = create_user()
+        refresh = str(RefreshToken.for_user(user))
+        api_client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(user).access_token}')
+
+        response = api_client.delete(reverse('delete_account'), {'password': 'TestPass123!'}, format='json')
+
+        assert response.status_code == status.HTTP_200_OK
+        assert api_client.get(reverse('profile')).status_code == status.HTTP_401_UNAUTHORIZED
+        api_client.credentials()
+        response = api_client.post(reverse('token_refresh'), {'refresh': refresh}, format='json')
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+
+@pytest.mark.django_db
+class TestPurgeDeletedAccounts:
+    """Tests for the batched purge of deleted accounts"""
+
+    def test_purges_dependents_in_batches(self, create_user):
+        """Test a pending account's rows go in bounded batches and other accounts are untouched"""
+        user = create_user()
+        issue_tokens(user, 3, blacklisted=2, expired=2)
+        LogEntry.objects.bulk_create([
+            LogEntry(user=user, action_flag=ADDITION, object_repr=f'entry {i}') for i in range(3)
+        ])
+        user.groups.add(Group.objects.create(name='editors'))
+        other = create_user(email='other@example.com')
+        issue_tokens(other, 2)
+        deactivate_account(user)
+
+        metrics = purge_deleted_accounts(batch_size=2, pause=0)
+
+        assert not User.objects.filter(pk=user.pk).exists()
+        assert metrics['tokens_deleted'] == 5
+        assert metrics['log_entries_deleted'] == 3
+        assert metrics['groups_deleted'] == 1
+        assert metrics['users_deleted'] == 1
+        # 3 token batches, 2 log entry batches, 1 group batch, then the user
+        assert metrics['batches'] == 7
+        assert not BlacklistedToken.objects.filter(token__user_id=user.pk).exists()
+        assert OutstandingToken.objects.filter(user=other).count() == 2
+
+    def test_max_batches_and_restore(self, create_user):
+        """Test a run can be capped, and an account restored mid-purge is kept"""
+        user = create_user()
+        issue_tokens(user, 4)
+        deactivate_account(user)
+
+        with mock.patch('users.deletion.time.sleep') as sleep:
+            metrics = purge_deleted_accounts(batch_size=2, pause=0.5, max_batches=2)
+
+        assert metrics['tokens_deleted'] == 4
+        sleep.assert_called_once_with(0.5)
+        User.objects.filter(pk=user.pk).update(is_active=True, deletion_requested_at=None)
+        assert purge_deleted_accounts(pause=0)['batches'] == 0
+        assert User.objects.filter(pk=user.pk).exists()
+
+    def test_email_free_after_purge(self, api_client, create_user):
+        """Test the deleted account's email can register again once purged"""
+        user = create_user(email='gone@example.com')
+        api_client.force_authenticate(user=user)
+        api_client.delete(reverse('delete_account'), {'password': 'TestPass123!'}, format='json')
+        api_client.force_authenticate(user=None)
+
+        call_command('purge_deleted_accounts', pause=0, stdout=StringIO())
+
+        response = api_client.post(reverse('register'), {
+            'email': 'gone@example.com', 'password': 'TestPass123!', 'password2': 'TestPass123!',
+        }, format='json')
+        assert response.status_code == status.HTTP_201_CREATED
+
+    def test_command(self, create_user):
+        """Test purge_deleted_accounts reports progress and a summary"""
+        user = create_user()
+        issue_tokens(user, 3)
+        deactivate_account(user)
+        out = StringIO()
+
+        call_command('purge_deleted_accounts', batch_size=2, pause=0, verbosity=2, stdout=out)
+
+        output = out.getvalue()
+        assert 'batch 1: 0 accounts, 2 tokens deleted' in output
+        assert ('Deleted 1 accounts, 3 tokens, 0 admin log entries, 0 notification events and '
+                '0 group/permission links in 3 batches') in output
+
+    def test_periodic_disabled_by_default(self):
+        """Test no purge thread starts unless ACCOUNT_DELETION INTERVAL is set"""
+        with mock.patch.object(deletion, 'PeriodicAccountPurge') as thread:
+            assert deletion.start_periodic_purge() is None
+        thread.assert_not_called()
@@ -0,0 +1,172 @@
+import pytest
+from datetime import datetime, timedelta, timezone
+from io import StringIO
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import override_settings
+
+from users.digests import DigestScheduler, MemorySender, enqueue, enqueue_many, window_start
+from users.models import NotificationEvent
+
+User = get_user_model()
+
+
+def utc(day, hour, minute=0):
+    return datetime(2026, 3, day, hour, minute, tzinfo=timezone.utc)  # 2026-03-02 is a Monday
+
+
+class FakeClock:
+    """Callable clock the test moves by hand"""
+
+    def __init__(self, now):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+class FailingSender:
+    def send(self, digests):
+        raise ConnectionError('mail server down')
+
+
+@pytest.fixture
+def make_user(db):
+    counter = iter(range(1000))
+
+    def make(**preferences):
+        n = next(counter)
+        return User.objects.create(email=f'reader{n}@example.com', username=f'reader{n}', **preferences)
+    return make
+
+
+@pytest.fixture
+def scheduler():
+    clock = FakeClock(utc(2, 9))
+    return DigestScheduler(sender=MemorySender(), clock=clock)
+
+
+def sent(scheduler):
+    return [(digest.user.email, [event.kind for event in digest.events]) for digest in scheduler.sender.sent]
+
+
+class TestWindows:
+    """Tests for digest window alignment"""
+
+    def test_window_start(self):
+        """Test windows start on the UTC hour, day and Monday"""
+        at = datetime(2026, 3, 5, 14, 45, 10, tzinfo=timezone(timedelta(hours=5, minutes=30)))
+
+        assert window_start(at, 'instant') == utc(5, 9, 15).replace(second=10)
+        assert window_start(at, 'hourly') == utc(5, 9)
+        assert window_start(at, 'daily') == utc(5, 0)
+        assert window_start(at, 'weekly') == utc(2, 0)
+
+
+@pytest.mark.django_db
+class TestDigestScheduler:
+    """Tests for users/digests.py"""
+
+    def test_hourly_waits_for_window_to_close(self, make_user, scheduler):
+        """Test an hourly user's events go out together once their hour has ended"""
+        user = make_user(digest_frequency='hourly')
+        enqueue(user, 'mentions', created_at=utc(2, 10, 15))
+        enqueue(user, 'product_updates', created_at=utc(2, 10, 40))
+
+        scheduler.clock.now = utc(2, 10, 59)
+        assert scheduler.tick()['digests'] == 0
+
+        scheduler.clock.now = utc(2, 11)
+        assert scheduler.tick() == {'digests': 1, 'events': 2, 'deferred': 0, 'discarded': 0}
+        assert sent(scheduler) == [(user.email, ['mentions', 'product_updates'])]
+        digest = scheduler.sender.sent[0]
+        assert (digest.window_start, digest.window_end) == (utc(2, 10), utc(2, 11))
+        assert not NotificationEvent.objects.exists()
+
+    def test_frequencies(self, make_user, scheduler):
+        """Test each user is batched by their own frequency"""
+        instant = make_user(digest_frequency='instant')
+        daily = make_user(digest_frequency='daily')
+        weekly = make_user(digest_frequency='weekly')
+        for user in (instant, daily, weekly):
+            enqueue(user, 'mentions', created_at=utc(2, 8))
+            enqueue(user, 'mentions', created_at=utc(2, 8, 30))
+
+        scheduler.tick()
+        assert sent(scheduler) == [(instant.email, ['mentions', 'mentions'])]
+
+        scheduler.clock.now = utc(3, 0, 5)
+        scheduler.tick()
+        assert sent(scheduler)[1:] == [(daily.email, ['mentions', 'mentions'])]
+
+        scheduler.clock.now = utc(9, 0)
+        scheduler.tick()
+        assert sent(scheduler)[2:] == [(weekly.email, ['mentions', 'mentions'])]
+
+    def test_quiet_hours_defer(self, make_user, scheduler):
+        """Test a digest due during do-not-disturb waits for the window to end"""
+        user = make_user(digest_frequency='daily', dnd_enabled=True, dnd_start_time='22:00', dnd_end_time='07:00')
+        enqueue(user, 'mentions', created_at=utc(2, 15))
+
+        scheduler.clock.now = utc(3, 0, 30)
+        assert scheduler.tick() == {'digests': 0, 'events': 0, 'deferred': 1, 'discarded': 0}
+
+        scheduler.clock.now = utc(3, 7)
+        assert scheduler.tick()['digests'] == 1
+
+    def test_inactive_users_skipped(self, make_user, scheduler):
+        """Test deactivated accounts get no digests and their due events are discarded, not deferred"""
+        user = make_user(digest_frequency='instant', is_active=False)
+        enqueue(user, 'mentions', created_at=utc(2, 8))
+        enqueue(user, 'security', created_at=utc(2, 8, 30))
+        later = enqueue(user, 'mentions', created_at=utc(2, 9, 30))
+
+        assert scheduler.tick() == {'digests': 0, 'events': 0, 'deferred': 0, 'discarded': 2}
+        assert scheduler.sender.sent == []
+        assert list(NotificationEvent.objects.all()) == [later]
+
+    def test_quiet_and_inactive_in_one_batch(self, make_user, scheduler):
+        """Test only users in quiet hours are deferred and the next tick no longer finds the inactive one"""
+        quiet = make_user(digest_frequency='instant', dnd_enabled=True, dnd_start_time='08:00', dnd_end_time='10:00')
+        inactive = make_user(digest_frequency='instant', is_active=False)
+        for user in (quiet, inactive):
+            enqueue(user, 'mentions', created_at=utc(2, 8))
+
+        assert scheduler.tick() == {'digests': 0, 'events': 0, 'deferred': 1, 'discarded': 1}
+        assert list(NotificationEvent.objects.values_list('user_id', flat=True)) == [quiet.pk]
+        assert scheduler.tick() == {'digests': 0, 'events': 0, 'deferred': 1, 'discarded': 0}
+
+    def test_failed_send_is_retried(self, make_user, scheduler):
+        """Test events stay queued when the sender fails and go out on a later tick"""
+        user = make_user(digest_frequency='instant')
+        enqueue(user, 'security', created_at=utc(2, 8))
+        failing = DigestScheduler(sender=FailingSender(), clock=scheduler.clock)
+
+        failing.run(max_ticks=1)
+
+        assert NotificationEvent.objects.count() == 1
+        scheduler.tick()
+        assert sent(scheduler) == [(user.email, ['security'])]
+
+    def test_bulk_queries(self, make_user, scheduler, django_assert_num_queries):
+        """Test a tick's query count does not depend on the number of users in a batch"""
+        enqueue_many([make_user(digest_frequency='instant').pk for _ in range(30)], 'product_updates')
+        scheduler.clock.now = datetime.now(timezone.utc) + timedelta(seconds=1)
+
+        # Per frequency one due-user query; for instant also users, events,
+        # one delete and the query that finds no more due users
+        with django_assert_num_queries(8):
+            metrics = scheduler.tick()
+
+        assert metrics == {'digests': 30, 'events': 30, 'deferred': 0, 'discarded': 0}
+
+    @override_settings(DIGESTS={'SENDER': 'users.digests.MemorySender'})
+    def test_command(self, make_user):
+        """Test run_digests --once sends due digests and reports them"""
+        enqueue(make_user(digest_frequency='instant'), 'mentions', created_at=utc(2, 8))
+        out = StringIO()
+
+        call_command('run_digests', once=True, stdout=out)
+
+        assert 'Sent 1 digests (1 events); 0 users deferred; 0 events of inactive users discarded' in out.getvalue()
+        assert not NotificationEvent.objects.exists()
@@ -0,0 +1,201 @@
+import pytest
+from io import StringIO
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.urls import reverse
+from rest_framework import status
+
+from users import directory
+from users.models import DirectoryEntry
+
+User = get_user_model()
+
+
+@pytest.fixture
+def make_member(db):
+    counter = iter(range(1000))
+
+    def make(first_name='', last_name='', email=None, **fields):
+        n = next(counter)
+        fields.setdefault('profile_searchable', True)
+        return User.objects.create(email=email or f'member{n}@example.com', username=f'member{n}',
+                                   first_name=first_name, last_name=last_name, **fields)
+    return make
+
+
+def names(users):
+    return [f'{user.first_name} {user.last_name}' for user in users]
+
+
+class TestNormalization:
+    """Tests for directory key normalization"""
+
+    def test_entry_keys(self):
+        """Test keys are accent-free, case-folded words of the names and email local part"""
+        assert directory.entry_keys('José', "O'Brien", 'Jose.OB_2@Example.com') == ['jose', 'o', 'brien', 'ob', '2']
+        assert directory.normalize_words('ÅSA-lind') == ['asa', 'lind']
+
+
+@pytest.mark.django_db
+class TestDirectoryIndex:
+    """Tests for keeping directory entries current"""
+
+    def test_only_searchable_active_users_listed(self, make_member):
+        """Test users who opted out or are inactive have no entries"""
+        listed = make_member('Ada', 'Lovelace')
+        make_member('Alan', 'Turing', profile_searchable=False)
+        make_member('Anita', 'Borg', is_active=False)
+
+        assert set(DirectoryEntry.objects.values_list('user_id', flat=True)) == {listed.pk}
+
+    def test_reindexed_on_save(self, make_member):
+        """Test renaming or opting out rewrites the entries on save"""
+        user = make_member('Grace', 'Hopper')
+
+        user.last_name = 'Murray'
+        user.save()
+        assert names(directory.search('murr')[0]) == ['Grace Murray']
+        assert directory.search('hop')[0] == []
+
+        user.profile_searchable = False
+        user.save(update_fields=['preference_flags'])
+        assert directory.search('grace')[0] == []
+
+    def test_unrelated_save_skips_reindex(self, make_member, django_assert_num_queries):
+        """Test a save that touches no indexed field leaves the entries alone"""
+        user = make_member('Grace', 'Hopper')
+
+        with django_assert_num_queries(1):
+            user.save(update_fields=['country'])
+
+    def test_rebuild_command(self, make_member):
+        """Test rebuild_directory indexes rows written without save()"""
+        user = make_member('Ada', 'Lovelace')
+        User.objects.filter(pk=user.pk).update(first_name='Augusta')
+        out = StringIO()
+
+        call_command('rebuild_directory', stdout=out)
+
+        assert 'Indexed 1 searchable users' in out.getvalue()
+        assert names(directory.search('aug')[0]) == ['Augusta Lovelace']
+
+
+@pytest.mark.django_db
+class TestDirectorySearch:
+    """Tests for users/directory.py search()"""
+
+    def test_prefix_and_accents(self, make_member):
+        """Test queries match word prefixes regardless of case and accents"""
+        make_member('José', 'Álvarez')
+        make_member('Josephine', 'Baker')
+        make_member('Jo', 'March', email='xyz@example.com')
+
+        assert names(directory.search('JOS')[0]) == ['José Álvarez', 'Josephine Baker']
+        assert names(directory.search('alv')[0]) == ['José Álvarez']
+
+    def test_every_word_must_match(self, make_member):
+        """Test multi-word queries need each word to prefix one of the user's words"""
+        make_member('Ada', 'Lovelace')
+        make_member('Ada', 'Yonath')
+
+        assert names(directory.search('ada love')[0]) == ['Ada Lovelace']
+        assert names(directory.search('lo ad')[0]) == ['Ada Lovelace']
+
+    def test_user_listed_once(self, make_member):
+        """Test a user with several words matching the query appears once"""
+        make_member('Anna', 'Annable', email='ann@example.com')
+
+        users, cursor = directory.search('ann')
+
+        assert len(users) == 1 and cursor is None
+
+    def test_keyset_pages(self, make_member):
+        """Test cursors walk every match once, in key order"""
+        for i in range(7):
+            make_member(f'Sam{i}', 'Smith', email=f'sam{i}@example.com')
+
+        seen, cursor = [], None
+        while True:
+            users, cursor = directory.search('sam', cursor=cursor, limit=3)
+            seen.extend(user.pk for user in users)
+            if cursor is None:
+                break
+
+        assert len(seen) == 7 and len(set(seen)) == 7
+
+    def test_rows_bypassing_index_hidden(self, make_member):
+        """Test a user opted out with QuerySet.update() is not returned from stale entries"""
+        user = make_member('Ada', 'Lovelace')
+        User.objects.filter(pk=user.pk).update(is_active=False)
+
+        assert directory.search('ada')[0] == []
+
+
+@pytest.mark.django_db
+class TestDirectoryEndpoint:
+    """Tests for GET /api/auth/directory/"""
+
+    def test_search(self, authenticated_client, make_member):
+        """Test results expose only id and names, with a cursor for the next page"""
+        api_client, _ = authenticated_client
+        members = [make_member('Lin', f'Wu{i}') for i in range(3)]
+
+        response = api_client.get(reverse('directory'), {'q': 'lin', 'limit': 2})
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['results'][0] == {'id': members[0].pk, 'first_name': 'Lin', 'last_name': 'Wu0'}
+        response = api_client.get(reverse('directory'), {'q': 'lin', 'limit': 2, 'cursor': response.data['next_cursor']})
+        assert [user['id'] for user in response.data['results']] == [members[2].pk]
+        assert response.data['next_cursor'] is None
+
+    def test_invalid_parameters(self, authenticated_client):
+        """Test a missing query, bad cursor or oversized limit is rejected"""
+        api_client, _ = authenticated_client
+
+        for params in ({}, {'q': 'a', 'cursor': 'not-a-cursor'}, {'q': 'a', 'limit': directory.MAX_LIMIT + 1}):
+            response = api_client.get(reverse('directory'), params)
+            assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_requires_authentication(self, api_client):
+        """Test anonymous requests are rejected"""
+        response = api_client.get(reverse('directory'), {'q': 'a'})
+
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+
+@pytest.mark.django_db(transaction=True)
+class TestDirectoryMigration:
+    """Tests for migration 0011, which indexes the users already searchable"""
+
+    def migrate(self, target):
+        executor = MigrationExecutor(connection)
+        executor.migrate([('users', target)])
+        executor.loader.build_graph()
+        return executor.loader.project_state([('users', target)]).apps
+
+    def test_backfill(self):
+        """Test active searchable users get the entries users/directory.py would build"""
+        searchable = User.profile_searchable.mask
+        apps = self.migrate('0010_notificationevent')
+        try:
+            OldUser = apps.get_model('users', 'User')
+            listed = OldUser.objects.create(
+                email='jose.garcia@example.com', username='jose.garcia', first_name='José', last_name="O'Brien",
+                preference_flags=searchable,
+            )
+            OldUser.objects.create(email='hidden@example.com', username='hidden', first_name='Hidden', preference_flags=0)
+            OldUser.objects.create(
+                email='gone@example.com', username='gone', first_name='Gone', is_active=False,
+                preference_flags=searchable,
+            )
+
+            self.migrate('0011_directoryentry')
+
+            keys = DirectoryEntry.objects.order_by('pk').values_list('user_id', 'key')
+            assert list(keys) == [
+                (listed.pk, key) for key in directory.entry_keys('José', "O'Brien", 'jose.garcia@example.com')
+            ]
+        finally:
+            self.migrate(MigrationExecutor(connection).loader.graph.leaf_nodes('users')[0][1])
@@ -0,0 +1,205 @@
+import csv
+import io
+import json
+import pytest
+from datetime import datetime, timezone
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.http import StreamingHttpResponse
+from django.urls import reverse
+from rest_framework import status
+
+from users import export
+from users.serializers import FastUserSerializer, UserSerializer
+
+User = get_user_model()
+
+
+@pytest.fixture
+def members(db):
+    """Five users across two countries, one inactive, joined a day apart"""
+    return User.objects.bulk_create([
+        User(
+            email=f'member{i}@example.com', username=f'member{i}', first_name=f'Member{i}',
+            country='Sri Lanka' if i % 2 else 'India', is_active=i != 4, theme_mode='dark' if i == 1 else 'light',
+            date_joined=datetime(2025, 1, 1 + i, tzinfo=timezone.utc),
+        )
+        for i in range(5)
+    ])
+
+
+def read_csv(content):
+    return list(csv.DictReader(io.StringIO(content)))
+
+
+def read_ndjson(content):
+    return [json.loads(line) for line in content.splitlines()]
+
+
+def streamed(response):
+    assert isinstance(response, StreamingHttpResponse)
+    return b''.join(response.streaming_content).decode()
+
+
+@pytest.mark.django_db
+class TestExport:
+    """Tests for users/export.py"""
+
+    def test_ndjson_matches_profile_payload(self, members):
+        """Test each NDJSON line is the user's profile payload"""
+        content = ''.join(export.export_chunks(User.objects.all(), 'ndjson'))
+
+        assert read_ndjson(content) == [FastUserSerializer(user).data for user in User.objects.order_by('pk')]
+
+    def test_csv_columns_and_selection(self, members):
+        """Test CSV has a header row and honours field and group selection"""
+        fields = ('id', 'email', 'theme_mode', 'accent_color', 'font_family', 'font_size', 'compact_mode',
+                  'show_tooltips', 'animations')
+        content = ''.join(export.export_chunks(User.objects.all(), 'csv', fields))
+
+        rows = read_csv(content)
+        assert list(rows[0]) == list(fields)
+        assert [(row['email'], row['theme_mode']) for row in rows[:2]] == [
+            ('member0@example.com', 'light'), ('member1@example.com', 'dark'),
+        ]
+
+    def test_csv_escapes_formulas(self, db):
+        """Test CSV text cells that a spreadsheet would evaluate start with a quote, and NDJSON is unchanged"""
+        User.objects.create(
+            email='formula@example.com', username='formula', first_name='=HYPERLINK("http://x")',
+            last_name='@SUM(A1)', phone='+94771234567', country='-2+3',
+        )
+        fields = ('id', 'email', 'first_name', 'last_name', 'country', 'phone')
+
+        row, = read_csv(''.join(export.export_chunks(User.objects.all(), 'csv', fields)))
+        assert (row['email'], row['first_name'], row['last_name'], row['phone'], row['country']) == (
+            'formula@example.com', '\'=HYPERLINK("http://x")', "'@SUM(A1)", "'+94771234567", "'-2+3",
+        )
+        line, = read_ndjson(''.join(export.export_chunks(User.objects.all(), 'ndjson', fields)))
+        assert (line['first_name'], line['phone']) == ('=HYPERLINK("http://x")', '+94771234567')
+
+    def test_empty_csv_has_header(self, db):
+        """Test an export with no users is just the header"""
+        content = ''.join(export.export_chunks(User.objects.none(), 'csv'))
+
+        assert content.strip() == ','.join(UserSerializer.Meta.fields)
+
+    def test_streams_in_chunks(self, members, django_assert_num_queries):
+        """Test output arrives chunk by chunk from a single chunked query"""
+        with django_assert_num_queries(1):
+            chunks = list(export.export_chunks(User.objects.all(), 'ndjson', chunk_size=2))
+
+        assert [chunk.count('\n') for chunk in chunks] == [2, 2, 1]
+
+    def test_filters(self, members):
+        """Test each filter narrows the export"""
+        def emails(**filters):
+            return sorted(user.email for user in export.filter_users(User.objects.all(), **filters))
+
+        assert emails(is_active=False) == ['member4@example.com']
+        assert emails(country='sri lanka') == ['member1@example.com', 'member3@example.com']
+        assert emails(
+            joined_after=datetime(2025, 1, 3, tzinfo=timezone.utc), joined_before=datetime(2025, 1, 5, tzinfo=timezone.utc)
+        ) == ['member2@example.com', 'member3@example.com']
+        assert emails(q='member2') == ['member2@example.com']
+
+
+@pytest.mark.django_db
+class TestExportEndpoint:
+    """Tests for GET /api/auth/users/export.<format>"""
+
+    def url(self, fmt='csv'):
+        return reverse('export_users', kwargs={'export_format': fmt})
+
+    def test_staff_only(self, api_client, create_user):
+        """Test anonymous users get 401 and non-staff users 403"""
+        assert api_client.get(self.url()).status_code == status.HTTP_401_UNAUTHORIZED
+
+        api_client.force_authenticate(user=create_user())
+        assert api_client.get(self.url()).status_code == status.HTTP_403_FORBIDDEN
+
+    def test_streams_filtered_csv(self, api_client, create_user, members):
+        """Test staff get a CSV download with fields and filters applied"""
+        api_client.force_authenticate(user=create_user(email='staff@example.com', is_staff=True))
+
+        response = api_client.get(self.url(), {'fields': 'email', 'is_active': 'true', 'country': 'India'})
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response['Content-Type'] == export.FORMATS['csv']
+        assert response['Content-Disposition'].startswith('attachment; filename="users-')
+        assert read_csv(streamed(response)) == [
+            {'id': str(user.pk), 'email': user.email} for user in (members[0], members[2])
+        ]
+
+    def test_ndjson(self, api_client, create_user, members):
+        """Test the .ndjson endpoint streams one JSON object per user"""
+        api_client.force_authenticate(user=create_user(email='staff@example.com', is_staff=True))
+
+        response = api_client.get(self.url('ndjson'), {'fields': 'theme'})
+
+        assert response['Content-Type'] == export.FORMATS['ndjson']
+        rows = read_ndjson(streamed(response))
+        assert len(rows) == User.objects.count()
+        assert set(rows[0]) == {'id', 'theme_mode', 'accent_color', 'font_family', 'font_size', 'compact_mode',
+                                'show_tooltips', 'animations'}
+
+    def test_invalid_options(self, api_client, create_user):
+        """Test unknown fields and malformed filters are rejected with 400"""
+        api_client.force_authenticate(user=create_user(email='staff@example.com', is_staff=True))
+
+        response = api_client.get(self.url(), {'fields': 'password', 'joined_after': 'yesterday'})
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert set(response.data['details']) == {'fields', 'joined_after'}
+
+    def test_unknown_format(self, api_client, create_user):
+        """Test only csv and ndjson are routed"""
+        api_client.force_authenticate(user=create_user(email='staff@example.com', is_staff=True))
+
+        assert api_client.get('/api/auth/users/export.xml').status_code == status.HTTP_404_NOT_FOUND
+
+
+@pytest.mark.django_db
+class TestExportAdminAction:
+    """Tests for the UserAdmin export actions"""
+
+    def test_exports_selected(self, client, create_user, members):
+        """Test the CSV action downloads just the selected users"""
+        client.force_login(create_user(email='admin@example.com', is_staff=True, is_superuser=True))
+        selected = [members[1].pk, members[3].pk]
+
+        response = client.post(reverse('admin:users_user_changelist'), {
+            'action': 'export_csv', '_selected_action': selected,
+        })
+
+        assert response.status_code == status.HTTP_200_OK
+        assert [int(row['id']) for row in read_csv(streamed(response))] == selected
+
+
+@pytest.mark.django_db
+class TestExportUsersCommand:
+    """Tests for the export_users management command"""
+
+    def test_writes_file(self, tmp_path, members):
+        """Test the command writes NDJSON (from the extension) with filters applied"""
+        output = tmp_path / 'users.ndjson'
+
+        call_command('export_users', output=str(output), is_active='false', fields='email', stderr=io.StringIO())
+
+        assert read_ndjson(output.read_text()) == [{'id': members[4].pk, 'email': 'member4@example.com'}]
+
+    def test_stdout_csv(self, members):
+        """Test CSV goes to stdout by default"""
+        stdout = io.StringIO()
+
+        call_command('export_users', fields='email', country='India', stdout=stdout)
+
+        assert [row['email'] for row in read_csv(stdout.getvalue())] == [
+            'member0@example.com', 'member2@example.com', 'member4@example.com',
+        ]
+
+    def test_invalid_options(self, db):
+        """Test invalid fields are reported as a command error"""
+        with pytest.raises(CommandError, match='fields'):
+            call_command('export_users', fields='nope')
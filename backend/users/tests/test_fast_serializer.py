@@ -0,0 +1,102 @@
+import random
+import pytest
+from datetime import date, datetime, timedelta, timezone
+from django.contrib.auth import get_user_model
+from rest_framework.renderers import JSONRenderer
+
+from users.fields import bit_flags, format_time_of_day
+from users.serializers import (
+    FastUserSerializer, UserSerializer, _fast_user_plan, _full_user_plan, parse_profile_fields,
+)
+
+User = get_user_model()
+
+EXAMPLES = 300
+TEXT = ['', 'a', 'Ünïcödé', '名前', 'O\'Brien "quoted"', 'line\nbreak', 'emoji 🎉', ' padded ', '<script>']
+
+
+def random_user(rng, pk):
+    """A User with every profile attribute drawn at random"""
+    user = User(
+        id=pk,
+        email=f'user{pk}@example.com',
+        first_name=rng.choice(TEXT),
+        last_name=rng.choice(TEXT),
+        country=rng.choice(TEXT),
+        country_code=rng.choice(['', '+1', '+44', '+94']),
+        phone=rng.choice(['', '+1-555-123-4567', '0771234567']),
+        date_of_birth=rng.choice([None, date(1900, 1, 1) + timedelta(days=rng.randrange(45000))]),
+        gender=rng.choice([''] + [value for value, _ in User.GENDER_CHOICES]),
+        date_joined=datetime(2000, 1, 1, tzinfo=timezone.utc) + timedelta(
+            seconds=rng.randrange(10 ** 9), microseconds=rng.choice([0, rng.randrange(10 ** 6)])
+        ),
+        dnd_start_time=format_time_of_day(rng.randrange(24 * 60)),
+        dnd_end_time=format_time_of_day(rng.randrange(24 * 60)),
+    )
+    for name in ['theme_mode', 'accent_color', 'font_family', 'font_size', 'digest_frequency']:
+        setattr(user, name, rng.choice(User._meta.get_field(name).choices)[0])
+    for name in bit_flags(User):
+        setattr(user, name, rng.random() < 0.5)
+    return user
+
+
+def render(data):
+    return JSONRenderer().render(data)
+
+
+class TestFastUserSerializerParity:
+    """Property-style parity checks between FastUserSerializer and UserSerializer"""
+
+    def test_instances(self):
+        """Test randomly generated users render to identical JSON"""
+        rng = random.Random(1234)
+        for pk in range(1, EXAMPLES + 1):
+            user = random_user(rng, pk)
+            assert render(FastUserSerializer(user).data) == render(UserSerializer(user).data), pk
+
+    def test_field_order(self):
+        """Test keys come out in UserSerializer's order"""
+        user = random_user(random.Random(0), 1)
+        assert list(FastUserSerializer(user).data) == list(UserSerializer(user).data)
+
+    def test_sparse_fields(self):
+        """Test a field subset renders the matching slice of the full payload"""
+        user = random_user(random.Random(7), 1)
+        fields = parse_profile_fields('notifications,first_name')
+        full = UserSerializer(user).data
+
+        assert FastUserSerializer(user, fields).data == {name: full[name] for name in fields}
+
+    def test_field_selections_do_not_accumulate(self):
+        """Test many distinct field selections keep a bounded plan cache built from one full plan"""
+        user = random_user(random.Random(3), 1)
+        names = [name for name in UserSerializer.Meta.fields if name != 'id']
+        for i in range(200):
+            FastUserSerializer(user, parse_profile_fields(','.join(random.Random(i).sample(names, 3)))).data
+
+        assert _fast_user_plan.cache_info().currsize <= _fast_user_plan.cache_info().maxsize
+        assert _full_user_plan.cache_info().misses <= 1
+
+
+@pytest.mark.django_db
+class TestFastUserSerializerRows:
+    """Tests for building payloads from values() rows"""
+
+    def test_rows(self):
+        """Test values() rows render like the saved instances"""
+        rng = random.Random(99)
+        User.objects.bulk_create([random_user(rng, pk) for pk in range(1, 51)])
+
+        rows = User.objects.order_by('pk').values(*FastUserSerializer.row_fields())
+        for user, row in zip(User.objects.order_by('pk'), rows):
+            assert render(FastUserSerializer.from_row(row)) == render(UserSerializer(user).data)
+
+    def test_sparse_rows(self):
+        """Test a field subset selects only the columns it needs"""
+        rng = random.Random(5)
+        user = User.objects.bulk_create([random_user(rng, 1)])[0]
+        fields = parse_profile_fields('privacy,email')
+
+        assert FastUserSerializer.row_fields(fields) == ['id', 'email', 'preference_flags']
+        row = User.objects.values(*FastUserSerializer.row_fields(fields)).get()
+        assert FastUserSerializer.from_row(row, fields) == FastUserSerializer(user, fields).data
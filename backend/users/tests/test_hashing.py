@@ -0,0 +1,93 @@
+import os
+import time
+import pytest
+from unittest import mock
+from django.contrib.auth.hashers import PBKDF2PasswordHasher
+from django.urls import reverse
+from rest_framework import status
+
+from users import hashing
+from users.hashing import HashingBusy, HashingExecutor
+
+
+@pytest.fixture
+def executor():
+    executor = HashingExecutor(workers=1, max_pending=1, timeout=30)
+    yield executor
+    executor.shutdown()
+
+
+class TestHashingExecutor:
+    """Tests for the bounded hashing process pool"""
+
+    def test_runs_in_worker_process(self, executor):
+        """Test jobs execute outside the calling process"""
+        assert executor.run(os.getpid) != os.getpid()
+        metrics = executor.metrics()
+        assert metrics['submitted'] == 1
+        assert metrics['completed'] == 1
+        assert metrics['in_flight'] == 0
+
+    def test_failures_counted_apart(self, executor):
+        """Test a job that raises counts as failed and leaves the averages to completed jobs"""
+        executor.run(os.getpid)
+        with pytest.raises(ValueError):
+            executor.run(int, 'not a number')
+
+        metrics = executor.metrics()
+        assert (metrics['completed'], metrics['failed'], metrics['in_flight']) == (1, 1, 0)
+        assert metrics['avg_run_ms'] == metrics['run_seconds'] * 1000
+
+    def test_rejects_when_full(self, executor):
+        """Test back-pressure once MAX_PENDING jobs are outstanding"""
+        executor.run(os.getpid)  # start the worker so the sleep below is the only job
+        future = executor.submit(time.sleep, 0.5)
+
+        with pytest.raises(HashingBusy):
+            executor.submit(time.sleep, 0)
+
+        future.result()
+        assert executor.metrics()['rejected'] == 1
+        # Capacity comes back once the job completes
+        executor.run(os.getpid)
+
+    def test_inline_when_no_workers(self):
+        """Test WORKERS = 0 hashes on the calling thread"""
+        assert HashingExecutor(workers=0, max_pending=1, timeout=1).run(os.getpid) == os.getpid()
+
+
+@pytest.mark.django_db
+class TestPasswordHelpers:
+    """Tests for the pooled password helpers"""
+
+    def test_check_password(self, create_user):
+        """Test verification matches Django's own check_password"""
+        user = create_user(password='TestPass123!')
+
+        assert hashing.check_password(user, 'TestPass123!')
+        assert not hashing.check_password(user, 'WrongPass123!')
+
+    def test_check_password_upgrades_outdated_hash(self, create_user):
+        """Test a hash with outdated parameters is re-hashed on successful login"""
+        user = create_user()
+        user.password = PBKDF2PasswordHasher().encode('OldHash123!', 'salt1234', iterations=1000)
+        user.save()
+
+        assert hashing.check_password(user, 'OldHash123!')
+
+        user.refresh_from_db()
+        assert not user.password.startswith('pbkdf2_sha256$1000$')
+        assert user.check_password('OldHash123!')
+
+    def test_login_busy_returns_503(self, api_client, create_user):
+        """Test a saturated pool answers 503 with Retry-After instead of queueing"""
+        create_user(email='login@example.com', password='TestPass123!')
+
+        with mock.patch.object(hashing.HashingExecutor, 'run', side_effect=HashingBusy()):
+            response = api_client.post(reverse('login'), {
+                'email': 'login@example.com',
+                'password': 'TestPass123!'
+            }, format='json')
+
+        assert response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+        assert response['Retry-After'] == '1'
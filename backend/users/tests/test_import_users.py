@@ -0,0 +1,98 @@
+import csv
+import json
+import pytest
+from io import StringIO
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management import call_command
+
+User = get_user_model()
+
+
+@pytest.fixture(scope='module')
+def password_hash():
+    return make_password('Sup3rSecret!x')
+
+
+def run_import(path, **options):
+    out = StringIO()
+    call_command('import_users', str(path), workers=0, stdout=out, stderr=StringIO(), **options)
+    return out.getvalue()
+
+
+def write_csv(path, rows):
+    with open(path, 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=['email', 'password', 'password_hash', 'first_name', 'last_name'])
+        writer.writeheader()
+        writer.writerows(rows)
+    return path
+
+
+@pytest.mark.django_db
+class TestImportUsers:
+    """Tests for the import_users management command"""
+
+    def test_import_csv(self, tmp_path):
+        """Test valid rows are imported and invalid ones reported"""
+        path = write_csv(tmp_path / 'users.csv', [
+            {'email': 'a@example.com', 'password': 'Sup3rSecret!x', 'first_name': 'Ann'},
+            {'email': 'b@example.com', 'password': 'short'},
+            {'email': 'a@example.com', 'password': 'Sup3rSecret!x'},
+            {'email': 'not-an-email', 'password': 'Sup3rSecret!x'},
+        ])
+        errors = tmp_path / 'errors.csv'
+
+        output = run_import(path, errors=str(errors))
+
+        assert 'Imported 1 users, rejected 3 rows' in output
+        user = User.objects.get(email='a@example.com')
+        assert user.first_name == 'Ann'
+        assert user.username == 'a'
+        assert user.check_password('Sup3rSecret!x')
+        report = list(csv.DictReader(open(errors)))
+        assert [row['row'] for row in report] == ['2', '3', '4']
+        assert 'password' in json.loads(report[0]['errors'])
+
+    def test_import_ndjson_prehashed(self, tmp_path, password_hash):
+        """Test pre-hashed passwords are stored as given"""
+        path = tmp_path / 'users.ndjson'
+        path.write_text('\n'.join([
+            json.dumps({'email': 'hashed@example.com', 'password_hash': password_hash}),
+            json.dumps({'email': 'bad@example.com', 'password_hash': 'not-a-hash'}),
+            '{broken',
+        ]))
+
+        output = run_import(path)
+
+        assert 'Imported 1 users, rejected 2 rows' in output
+        assert User.objects.get(email='hashed@example.com').password == password_hash
+
+    def test_existing_email_and_username_suffixes(self, tmp_path, create_user, password_hash):
+        """Test existing accounts are rejected and usernames continue after existing ones"""
+        create_user(email='john@example.com', username='john')
+        path = write_csv(tmp_path / 'users.csv', [
+            {'email': 'john@example.com', 'password_hash': password_hash},
+            {'email': 'john@other.com', 'password_hash': password_hash},
+            {'email': 'john@third.com', 'password_hash': password_hash},
+        ])
+
+        output = run_import(path, batch_size=2)
+
+        assert 'Imported 2 users, rejected 1 rows' in output
+        assert set(User.objects.filter(email__startswith='john@').values_list('username', flat=True)) == {
+            'john', 'john1', 'john2'
+        }
+
+    def test_resume_from_checkpoint(self, tmp_path, password_hash):
+        """Test an existing checkpoint skips rows already processed"""
+        path = write_csv(tmp_path / 'users.csv', [
+            {'email': f'user{i}@example.com', 'password_hash': password_hash} for i in range(5)
+        ])
+        checkpoint = tmp_path / 'import.checkpoint'
+        checkpoint.write_text(json.dumps({'rows_done': 3}))
+
+        output = run_import(path, checkpoint=str(checkpoint), batch_size=1)
+
+        assert 'Imported 2 users' in output
+        assert sorted(User.objects.values_list('email', flat=True)) == ['user3@example.com', 'user4@example.com']
+        assert json.loads(checkpoint.read_text()) == {'rows_done': 5}
@@ -1,5 +1,7 @@
 import pytest
 from django.contrib.auth import get_user_model
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
 
 User = get_user_model()
 
@@ -65,3 +67,87 @@ class TestUserModel:
         assert user.country_code == '+1'
         assert user.phone == '1234567890'
         assert user.gender == 'male'
+
+
+@pytest.mark.django_db
+class TestCompactPreferences:
+    """Tests for the compact preference storage"""
+    
+    def test_defaults(self, create_user):
+        """Test preferences keep their documented defaults"""
+        user = create_user()
+        user.refresh_from_db()
+        
+        assert (user.theme_mode, user.font_size, user.digest_frequency) == ('system', 'medium', 'daily')
+        assert (user.dnd_start_time, user.dnd_end_time) == ('21:00', '07:00')
+        assert user.show_tooltips and user.two_factor_enabled
+        assert not user.compact_mode and not user.personalized_ads
+    
+    def test_round_trip(self, create_user):
+        """Test values survive a save and reload"""
+        user = create_user(theme_mode='dark', dnd_start_time='22:30', compact_mode=True, show_tooltips=False)
+        user.refresh_from_db()
+        
+        assert user.theme_mode == 'dark'
+        assert user.dnd_start_time == '22:30'
+        assert user.compact_mode and not user.show_tooltips
+    
+    def test_compact_columns(self, create_user):
+        """Test the database stores codes, minutes and a bitmask"""
+        from django.db import connection
+        user = create_user(theme_mode='dark', dnd_start_time='22:30', compact_mode=True, show_tooltips=False)
+        
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT theme_mode, dnd_start_time, preference_flags FROM users_user WHERE id = %s', [user.pk]
+            )
+            theme_mode, dnd_start_time, flags = cursor.fetchone()
+        
+        assert theme_mode == 2
+        assert dnd_start_time == 22 * 60 + 30
+        assert flags & User.compact_mode.mask and not flags & User.show_tooltips.mask
+    
+    def test_query_by_preference(self, create_user):
+        """Test filtering on choice codes and flag bits"""
+        create_user(email='a@example.com', theme_mode='dark', profile_searchable=True)
+        create_user(email='b@example.com', theme_mode='dark')
+        create_user(email='c@example.com', profile_searchable=True)
+        
+        emails = User.objects.filter(User.profile_searchable.lookup(True), theme_mode='dark').values_list('email', flat=True)
+        assert list(emails) == ['a@example.com']
+        assert User.objects.filter(User.profile_searchable.lookup(False)).count() == 1
+    
+    def test_storage_fields(self):
+        """Test flag names map to their storage column for update_fields"""
+        assert User.storage_fields(['theme_mode', 'compact_mode', 'mentions']) == ['theme_mode', 'preference_flags']
+
+
+
+@pytest.mark.django_db(transaction=True)
+class TestCopyPreferencesMigration:
+    """Tests for migration 0005, which fills the compact preference columns"""
+    
+    def migrate(self, target):
+        executor = MigrationExecutor(connection)
+        executor.migrate([('users', target)])
+        executor.loader.build_graph()
+        return executor.loader.project_state([('users', target)]).apps
+    
+    def test_loose_dnd_times_normalized(self, caplog):
+        """Test 'H:MM' times are kept as 'HH:MM' and only unparseable ones fall back, with a count"""
+        apps = self.migrate('0004_compact_preferences')
+        try:
+            OldUser = apps.get_model('users', 'User')
+            for n, (start, end) in enumerate([('9:00', '7:30'), (' 21:15 ', '06:45'), ('late', '25:00')]):
+                OldUser.objects.create(email=f'old{n}@example.com', dnd_start_time=start, dnd_end_time=end)
+            
+            with caplog.at_level('WARNING'):
+                self.migrate('0005_copy_compact_preferences')
+            
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT dnd_start_minutes, dnd_end_minutes FROM users_user ORDER BY email')
+                rows = cursor.fetchall()
+            assert rows == [(9 * 60, 7 * 60 + 30), (21 * 60 + 15, 6 * 60 + 45), (21 * 60, 7 * 60)]
+            assert '1 users had unparseable do-not-disturb times' in caplog.text
+        finally:
+            self.migrate(MigrationExecutor(connection).loader.graph.leaf_nodes('users')[0][1])
@@ -0,0 +1,192 @@
+import pytest
+from unittest import mock
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from users import presence
+from users.models import LastSeen
+
+User = get_user_model()
+
+
+@pytest.fixture
+def make_user(db):
+    counter = iter(range(2000))
+
+    def make(**fields):
+        n = next(counter)
+        return User.objects.create(email=f'peer{n}@example.com', username=f'peer{n}', **fields)
+    return make
+
+
+@pytest.mark.django_db
+class TestHeartbeat:
+    """Tests for users/presence.py heartbeats and online()"""
+
+    def test_online_until_ttl(self, make_user):
+        """Test a heartbeat makes a user online with the heartbeat time"""
+        user = make_user()
+
+        assert presence.heartbeat(user, now=1000.0)
+
+        online = presence.online([user.pk, user.pk + 1])
+        assert list(online) == [user.pk]
+        assert online[user.pk].timestamp() == 1000.0
+
+    def test_expires_after_ttl(self, make_user):
+        """Test the presence key is written with the TTL, so silent users drop off"""
+        user = make_user()
+
+        with mock.patch.object(cache, 'set') as cache_set:
+            presence.heartbeat(user, now=1000.0)
+
+        cache_set.assert_called_once_with(presence._key(user.pk), 1000.0, timeout=presence.get_setting('TTL'))
+
+    def test_rate_limited(self, make_user):
+        """Test repeated heartbeats within HEARTBEAT_INTERVAL skip the cache"""
+        user = make_user()
+        presence.heartbeat(user, now=1000.0)
+
+        with mock.patch.object(presence, '_shared_cache') as shared:
+            assert not presence.heartbeat(user, now=1010.0)
+        shared.assert_not_called()
+        assert presence.heartbeat(user, now=1000.0 + presence.get_setting('HEARTBEAT_INTERVAL'))
+
+    def test_hidden_users_never_online(self, make_user):
+        """Test users who hide their status are not written, and hiding it takes effect at once"""
+        hidden = make_user(show_online_status=False)
+        visible = make_user()
+        presence.heartbeat(hidden, now=1000.0)
+        presence.heartbeat(visible, now=1000.0)
+        assert list(presence.online([hidden.pk, visible.pk])) == [visible.pk]
+
+        visible.show_online_status = False
+        visible.save(update_fields=['preference_flags'])
+
+        assert presence.online([hidden.pk, visible.pk]) == {}
+
+    def test_reappears_after_showing_status(self, make_user):
+        """Test turning the status back on publishes the next heartbeat without waiting"""
+        user = make_user()
+        presence.heartbeat(user, now=1000.0)
+        user.show_online_status = False
+        user.save()
+        user.show_online_status = True
+        user.save()
+
+        assert presence.heartbeat(user, now=1001.0)
+        assert list(presence.online([user.pk])) == [user.pk]
+
+    def test_single_round_trip(self, make_user):
+        """Test a 1,000-id query is one get_many() call: one round trip on a networked cache"""
+        user = make_user()
+        presence.heartbeat(user)
+        ids = list(range(user.pk, user.pk + 1000))
+
+        with mock.patch.object(cache, 'get_many', wraps=cache.get_many) as get_many:
+            online = presence.online(ids)
+
+        assert list(online) == [user.pk]
+        get_many.assert_called_once()
+
+
+@pytest.mark.django_db
+class TestLastSeen:
+    """Tests for coalesced last-seen persistence"""
+
+    def test_flush_coalesces(self, make_user):
+        """Test heartbeats reach the database only on flush, one row per user, in one upsert"""
+        users = [make_user() for _ in range(3)]
+        for user in users:
+            presence.heartbeat(user, now=1000.0)
+            presence.heartbeat(user, now=2000.0)
+        assert not LastSeen.objects.exists()
+
+        with CaptureQueriesContext(connection) as ctx:
+            assert presence.flush() == 3
+        # The existence check and the upsert
+        assert len(ctx.captured_queries) == 2
+        assert {row.seen_at.timestamp() for row in LastSeen.objects.all()} == {2000.0}
+
+        presence.heartbeat(users[0], now=3000.0)
+        assert presence.flush() == 1
+        assert LastSeen.objects.get(user=users[0]).seen_at.timestamp() == 3000.0
+        assert presence.flush() == 0
+
+    def test_hidden_users_still_persisted(self, make_user):
+        """Test last-seen is kept for users who hide their status, but not published"""
+        user = make_user(show_online_status=False)
+        presence.heartbeat(user, now=1000.0)
+
+        presence.flush()
+
+        assert LastSeen.objects.filter(user=user).exists()
+
+    def test_failed_flush_keeps_times(self, make_user):
+        """Test pending times survive a failed write"""
+        user = make_user()
+        presence.heartbeat(user, now=1000.0)
+
+        with mock.patch.object(LastSeen.objects, 'bulk_create', side_effect=RuntimeError):
+            with pytest.raises(RuntimeError):
+                presence.flush()
+
+        assert presence.flush() == 1
+
+    @pytest.mark.django_db(transaction=True)
+    def test_deleted_user_does_not_block_flush(self, make_user):
+        """Test a user deleted before the flush is skipped instead of failing every later flush"""
+        kept, deleted = make_user(), make_user()
+        presence.heartbeat(kept, now=1000.0)
+        presence.heartbeat(deleted, now=1000.0)
+        deleted.delete()
+
+        assert presence.flush() == 1
+        assert list(LastSeen.objects.values_list('user_id', flat=True)) == [kept.pk]
+        presence.heartbeat(kept, now=2000.0)
+        assert presence.flush() == 1
+
+    def test_flusher_disabled_without_interval(self, settings):
+        """Test no flush thread starts when FLUSH_INTERVAL is 0"""
+        settings.PRESENCE = {'FLUSH_INTERVAL': 0}
+        with mock.patch.object(presence, 'PresenceFlusher') as thread:
+            assert presence.start_flusher() is None
+        thread.assert_not_called()
+
+
+@pytest.mark.django_db
+class TestPresenceEndpoint:
+    """Tests for POST /api/auth/presence/"""
+
+    def test_requests_are_heartbeats(self, api_client, create_user, make_user):
+        """Test an authenticated request marks its user online without writing the users table"""
+        viewer = create_user()
+        api_client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(viewer).access_token}')
+        absent = make_user()
+
+        with CaptureQueriesContext(connection) as ctx:
+            response = api_client.post(reverse('presence'), {'ids': [viewer.pk, absent.pk]}, format='json')
+
+        assert response.status_code == status.HTTP_200_OK
+        assert [entry['id'] for entry in response.data['online']] == [viewer.pk]
+        assert not any(q['sql'].startswith('UPDATE') for q in ctx.captured_queries)
+
+    def test_invalid_ids(self, authenticated_client):
+        """Test empty, non-numeric and oversized id lists are rejected"""
+        api_client, _ = authenticated_client
+        too_many = list(range(1, presence.get_setting('MAX_IDS') + 2))
+
+        for ids in ([], ['x'], too_many):
+            response = api_client.post(reverse('presence'), {'ids': ids}, format='json')
+            assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_requires_authentication(self, api_client):
+        """Test anonymous requests are rejected"""
+        response = api_client.post(reverse('presence'), {'ids': [1]}, format='json')
+
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
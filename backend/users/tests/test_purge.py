@@ -0,0 +1,67 @@
+import pytest
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+from django.core.management import call_command
+from django.utils import timezone
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+
+from users import purge
+from users.purge import purge_expired_tokens
+
+
+def make_tokens(count, expires_in, blacklisted=0, prefix='t'):
+    now = timezone.now()
+    tokens = OutstandingToken.objects.bulk_create([
+        OutstandingToken(jti=f'{prefix}{i}', token='x', created_at=now, expires_at=now + expires_in)
+        for i in range(count)
+    ])
+    BlacklistedToken.objects.bulk_create([BlacklistedToken(token=token) for token in tokens[:blacklisted]])
+    return tokens
+
+
+@pytest.mark.django_db
+class TestPurgeExpiredTokens:
+    """Tests for the batched token purge"""
+
+    def test_deletes_only_expired(self):
+        """Test expired outstanding and blacklisted rows go and live ones stay"""
+        make_tokens(25, timedelta(days=-1), blacklisted=10, prefix='old')
+        make_tokens(5, timedelta(days=1), blacklisted=2, prefix='live')
+
+        metrics = purge_expired_tokens(batch_size=10, pause=0)
+
+        assert metrics['outstanding_deleted'] == 25
+        assert metrics['blacklisted_deleted'] == 10
+        assert metrics['batches'] == 3
+        assert set(OutstandingToken.objects.values_list('jti', flat=True)) == {f'live{i}' for i in range(5)}
+        assert BlacklistedToken.objects.count() == 2
+
+    def test_max_batches_and_pause(self):
+        """Test a run can be capped and sleeps between batches"""
+        make_tokens(30, timedelta(days=-1))
+
+        with mock.patch('users.purge.time.sleep') as sleep:
+            metrics = purge_expired_tokens(batch_size=10, pause=0.5, max_batches=2)
+
+        assert metrics['outstanding_deleted'] == 20
+        assert OutstandingToken.objects.count() == 10
+        sleep.assert_called_once_with(0.5)
+
+    def test_command(self):
+        """Test purge_tokens reports progress and a summary"""
+        make_tokens(3, timedelta(days=-1), blacklisted=1)
+        out = StringIO()
+
+        call_command('purge_tokens', batch_size=2, pause=0, verbosity=2, stdout=out)
+
+        output = out.getvalue()
+        assert 'batch 1: 2 outstanding' in output
+        assert 'Deleted 3 outstanding and 1 blacklisted tokens in 2 batches' in output
+        assert not OutstandingToken.objects.exists()
+
+    def test_periodic_disabled_by_default(self):
+        """Test no purge thread starts unless TOKEN_PURGE INTERVAL is set"""
+        with mock.patch.object(purge, 'PeriodicPurge') as thread:
+            assert purge.start_periodic_purge() is None
+        thread.assert_not_called()
@@ -0,0 +1,162 @@
+import pytest
+from io import StringIO
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connections, router
+from django.db.utils import ConnectionHandler
+from django.urls import reverse
+from rest_framework import status
+from rest_framework_simplejwt.tokens import AccessToken
+
+from users import routers
+from users.cache import clear_local_cache
+
+User = get_user_model()
+
+REPLICA = 'replica'
+PASSWORD = 'TestPass123!'
+
+
+@pytest.fixture
+def replica(tmp_path, settings, transactional_db):
+    """
+    A second SQLite file registered as replica 'replica'. Calling the fixture
+    value replicates: it copies the primary over the replica, and lets pins
+    and cached users expire as if the replication lag had passed.
+    """
+    settings.DATABASE_ROUTING = {'REPLICAS': [REPLICA], 'PIN_SECONDS': 5}
+    handler = ConnectionHandler({
+        'default': {'ENGINE': 'django.db.backends.dummy'},
+        REPLICA: {'ENGINE': 'django.db.backends.sqlite3', 'NAME': str(tmp_path / 'replica.sqlite3')},
+    })
+    connections[REPLICA] = handler[REPLICA]
+
+    def replicate():
+        routers.sync_replicas()
+        cache.clear()
+        clear_local_cache()
+
+    yield replicate
+    connections[REPLICA].close()
+    del connections[REPLICA]
+
+
+def authenticate(api_client, user):
+    """Send a real access token, so request.user is resolved through the user cache and database"""
+    api_client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(user)}')
+
+
+class TestReplicaRouting:
+    """Tests for read/write routing between primary and replica"""
+
+    def test_profile_get_reads_replica(self, api_client, create_user, replica):
+        """Test profile GETs load the user from the replica"""
+        user = create_user(email='reader@example.com', first_name='Old')
+        replica()
+        User.objects.filter(pk=user.pk).update(first_name='New')  # primary only, no pin
+        authenticate(api_client, user)
+
+        response = api_client.get(reverse('profile'))
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['user']['first_name'] == 'Old'
+
+    def test_own_write_pins_primary(self, api_client, create_user, replica):
+        """Test a user reads their own PUT back until the pin expires, then the replica again"""
+        user = create_user(email='writer@example.com', first_name='Old')
+        replica()
+        authenticate(api_client, user)
+
+        response = api_client.put(reverse('profile'), {'first_name': 'New'}, format='json')
+        assert response.status_code == status.HTTP_200_OK
+        assert User.objects.using(REPLICA).get(pk=user.pk).first_name == 'Old'
+
+        assert api_client.get(reverse('profile')).data['user']['first_name'] == 'New'
+
+        # Pin expired and cached copies evicted, but the replica still lags
+        cache.clear()
+        clear_local_cache()
+        assert api_client.get(reverse('profile')).data['user']['first_name'] == 'Old'
+
+        replica()
+        assert api_client.get(reverse('profile')).data['user']['first_name'] == 'New'
+
+    def test_login_right_after_register(self, api_client, replica):
+        """Test a new account can log in before it reaches the replica"""
+        replica()
+        api_client.post(reverse('register'), {
+            'email': 'new@example.com', 'password': PASSWORD, 'password2': PASSWORD
+        }, format='json')
+
+        response = api_client.post(reverse('login'), {'email': 'new@example.com', 'password': PASSWORD}, format='json')
+
+        assert response.status_code == status.HTTP_200_OK
+        assert not User.objects.using(REPLICA).filter(email='new@example.com').exists()
+
+    def test_login_lookup_reads_replica(self, api_client, create_user, replica):
+        """Test the login lookup reads the replica once the user is no longer pinned"""
+        user = create_user(email='login@example.com')
+        replica()
+        User.objects.filter(pk=user.pk).update(email='renamed@example.com')  # primary only, no pin
+
+        response = api_client.post(reverse('login'), {'email': 'login@example.com', 'password': PASSWORD}, format='json')
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['user']['email'] == 'login@example.com'
+
+    def test_writes_and_other_reads_use_primary(self, create_user, replica):
+        """Test writes of replica-read instances, and reads off the replica paths, go to the primary"""
+        user = create_user(email='save@example.com', first_name='Old')
+        replica()
+        stale = User.objects.using(REPLICA).get(pk=user.pk)
+
+        stale.first_name = 'New'
+        stale.save()
+
+        assert router.db_for_read(User, instance=stale) == 'default'
+        assert User.objects.get(pk=user.pk).first_name == 'New'
+        assert User.objects.using(REPLICA).get(pk=user.pk).first_name == 'Old'
+
+    def test_admin_changelist(self, client, create_user, replica):
+        """Test the admin list reads the replica until the admin writes something"""
+        admin = create_user(email='admin@example.com', is_staff=True, is_superuser=True)
+        client.force_login(admin)
+        replica()
+        create_user(email='late@example.com')
+
+        def listed():
+            response = client.get(reverse('admin:users_user_changelist'))
+            return {user.email for user in response.context['cl'].result_list}
+
+        assert 'late@example.com' not in listed()
+
+        routers.pin(admin)
+        assert 'late@example.com' in listed()
+
+    def test_without_replicas(self, create_user):
+        """Test everything stays on the primary when no replica is configured"""
+        user = create_user()
+        routers.pin(user)
+
+        assert routers.read_alias(user_id=user.pk) is None
+        assert not routers.is_pinned(user_id=user.pk)
+        assert router.db_for_read(User) == 'default'
+
+
+class TestSyncReplicaCommand:
+    """Tests for the sync_replica management command"""
+
+    def test_copies_primary(self, create_user, replica):
+        """Test the command copies the primary's rows into the replica"""
+        create_user(email='copied@example.com')
+
+        call_command('sync_replica', stdout=StringIO())
+
+        assert User.objects.using(REPLICA).filter(email='copied@example.com').exists()
+
+    def test_requires_replicas(self, db):
+        """Test the command refuses to run without configured replicas"""
+        with pytest.raises(CommandError):
+            call_command('sync_replica')
@@ -144,6 +144,59 @@ class TestUserProfileUpdateSerializer:
         assert serializer.is_valid()
         updated_user = serializer.save()
         assert updated_user.email == 'new@example.com'
+    
+    def test_profile_update_unchanged_is_noop(self, create_user, django_assert_num_queries):
+        """Test resubmitting current values runs no validation queries and no write"""
+        user = create_user(email='user@example.com', first_name='Same')
+        
+        data = {'email': 'user@example.com', 'first_name': 'Same', 'theme_mode': 'system'}
+        serializer = UserProfileUpdateSerializer(user, data=data, partial=True)
+        
+        with django_assert_num_queries(0):
+            assert serializer.is_valid()
+            serializer.save()
+    
+    def test_profile_update_writes_changed_columns_only(self, create_user):
+        """Test only the changed columns appear in the UPDATE statement"""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        
+        user = create_user(email='user@example.com')
+        
+        data = {'email': 'user@example.com', 'theme_mode': 'dark'}
+        serializer = UserProfileUpdateSerializer(user, data=data, partial=True)
+        
+        with CaptureQueriesContext(connection) as ctx:
+            assert serializer.is_valid()
+            serializer.save()
+        
+        assert len(ctx.captured_queries) == 1
+        sql = ctx.captured_queries[0]['sql']
+        assert sql.startswith('UPDATE') and '"theme_mode"' in sql
+        assert '"email"' not in sql and '"first_name"' not in sql
+        user.refresh_from_db()
+        assert user.theme_mode == 'dark'
+    
+    def test_profile_update_preference_flags(self, create_user):
+        """Test boolean preferences update through their packed column"""
+        user = create_user()
+        
+        serializer = UserProfileUpdateSerializer(user, data={'compact_mode': True, 'mentions': False}, partial=True)
+        assert serializer.is_valid()
+        serializer.save()
+        
+        user.refresh_from_db()
+        assert user.compact_mode and not user.mentions
+        assert UserSerializer(user).data['compact_mode'] is True
+    
+    def test_profile_update_invalid_time(self, create_user):
+        """Test quiet hours must be HH:MM"""
+        user = create_user()
+        
+        serializer = UserProfileUpdateSerializer(user, data={'dnd_start_time': '25:00'}, partial=True)
+        
+        assert not serializer.is_valid()
+        assert 'dnd_start_time' in serializer.errors
 
 
 @pytest.mark.django_db
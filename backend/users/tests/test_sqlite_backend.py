@@ -0,0 +1,153 @@
+import pytest
+import threading
+from django.db import OperationalError, connections, transaction
+from django.db.utils import ConnectionHandler
+
+from users.sqlite import base
+
+ALIAS = 'tuned'
+
+
+def tuned_handler(name, **options):
+    """Connections to SQLite file ``name`` on the tuned backend under ALIAS"""
+    return ConnectionHandler({
+        'default': {'ENGINE': 'django.db.backends.dummy'},
+        ALIAS: {'ENGINE': 'users.sqlite', 'NAME': str(name), 'OPTIONS': options},
+    })
+
+
+@pytest.fixture
+def tuned_db(tmp_path, django_db_blocker):
+    """
+    Throwaway file database on the tuned backend. Calling the fixture value
+    opens the calling thread's connection and registers it as the 'tuned'
+    alias, so transaction.atomic(using='tuned') works in any thread.
+    """
+    handler = tuned_handler(tmp_path / 'tuned.sqlite3')
+
+    def connect():
+        connections[ALIAS] = handler[ALIAS]
+        return connections[ALIAS]
+
+    with django_db_blocker.unblock():
+        with connect().cursor() as cursor:
+            cursor.execute('CREATE TABLE counter (id INTEGER PRIMARY KEY, value INTEGER NOT NULL)')
+            cursor.execute('INSERT INTO counter (id, value) VALUES (1, 0)')
+        yield connect
+        connections[ALIAS].close()
+        del connections[ALIAS]
+
+
+def run_threads(*targets):
+    """Run each target in its own thread, closing the thread's connection afterwards"""
+    errors = []
+
+    def run(target):
+        try:
+            target()
+        except Exception as exc:
+            errors.append(exc)
+        finally:
+            connections[ALIAS].close()
+
+    threads = [threading.Thread(target=run, args=(target,)) for target in targets]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(30)
+    return errors
+
+
+def counter_value(connection):
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT value FROM counter WHERE id = 1')
+        return cursor.fetchone()[0]
+
+
+class TestTunedSQLiteBackend:
+    """Tests for the production SQLite backend (users/sqlite/base.py)"""
+
+    def test_pragmas(self, tmp_path, django_db_blocker):
+        """Test new connections get WAL and the tuned pragmas, with OPTIONS overrides applied"""
+        connection = tuned_handler(tmp_path / 'pragmas.sqlite3', pragmas={'busy_timeout': 1234})[ALIAS]
+        with django_db_blocker.unblock(), connection.cursor() as cursor:
+            values = {
+                name: cursor.execute(f'PRAGMA {name}').fetchone()[0]
+                for name in ['journal_mode', 'synchronous', 'cache_size', 'mmap_size', 'busy_timeout']
+            }
+        connection.close()
+
+        assert values == {
+            'journal_mode': 'wal',
+            'synchronous': 1,  # NORMAL
+            'cache_size': base.PRAGMAS['cache_size'],
+            'mmap_size': base.PRAGMAS['mmap_size'],
+            'busy_timeout': 1234,
+        }
+        assert connection.transaction_mode == 'IMMEDIATE'
+
+    def test_writes_wait_for_open_transaction(self, tuned_db):
+        """Test an autocommit write from another thread queues until the open transaction commits"""
+        order = []
+        in_transaction = threading.Event()
+
+        def holder():
+            tuned_db()
+            with transaction.atomic(using=ALIAS):
+                with connections[ALIAS].cursor() as cursor:
+                    cursor.execute('UPDATE counter SET value = value + 1')
+                in_transaction.set()
+                threading.Event().wait(0.3)  # give the writer time to reach the queue
+                order.append('holder commits')
+
+        def writer():
+            tuned_db()
+            in_transaction.wait(5)
+            with connections[ALIAS].cursor() as cursor:
+                cursor.execute('UPDATE counter SET value = value * 10')
+            order.append('writer wrote')
+
+        assert run_threads(holder, writer) == []
+        assert order == ['holder commits', 'writer wrote']
+        assert counter_value(tuned_db()) == 10
+
+    def test_read_then_write_transactions(self, tuned_db):
+        """Test concurrent read-modify-write transactions neither fail with "database is locked" nor lose updates"""
+        def increment():
+            tuned_db()
+            for _ in range(25):
+                with transaction.atomic(using=ALIAS):
+                    value = counter_value(connections[ALIAS])
+                    with connections[ALIAS].cursor() as cursor:
+                        cursor.execute('UPDATE counter SET value = %s WHERE id = 1', [value + 1])
+
+        assert run_threads(*[increment] * 4) == []
+        assert counter_value(tuned_db()) == 100
+
+    def test_write_queue_timeout(self, tuned_db):
+        """Test a writer gives up with "database is locked" after busy_timeout in the queue"""
+        in_transaction, done = threading.Event(), threading.Event()
+        errors = []
+
+        def holder():
+            tuned_db()
+            with transaction.atomic(using=ALIAS):
+                in_transaction.set()
+                done.wait(5)
+
+        def writer():
+            connection = tuned_db()
+            connection.pragmas['busy_timeout'] = 50
+            in_transaction.wait(5)
+            try:
+                with transaction.atomic(using=ALIAS):
+                    pass
+            except OperationalError as exc:
+                errors.append(exc)
+            finally:
+                done.set()
+
+        assert run_threads(holder, writer) == []
+        assert len(errors) == 1
+        assert 'database is locked' in str(errors[0])
+        assert not tuned_db().held_write_lock
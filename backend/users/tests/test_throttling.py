@@ -0,0 +1,92 @@
+import pytest
+from unittest import mock
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework import status
+
+from users import throttling
+from users.throttling import TokenBucket
+
+
+def login(api_client, email='victim@example.com', password='WrongPass123!', ip='10.0.0.1'):
+    return api_client.post(reverse('login'), {
+        'email': email,
+        'password': password
+    }, format='json', REMOTE_ADDR=ip)
+
+
+class TestTokenBucket:
+    """Tests for the in-process token bucket"""
+
+    def test_burst_then_refill(self):
+        """Test a key gets BURST tokens, then one per refill interval"""
+        bucket = TokenBucket(capacity=3, refill_per_second=1, maxsize=10)
+
+        assert [bucket.take('ip', now=0) for _ in range(3)] == [0, 0, 0]
+        assert bucket.take('ip', now=0) == pytest.approx(1)
+        assert bucket.take('ip', now=1) == 0
+        # Other keys have their own bucket
+        assert bucket.take('other', now=1) == 0
+
+
+@pytest.mark.django_db
+class TestLoginThrottle:
+    """Tests for the login brute-force throttle"""
+
+    @override_settings(LOGIN_THROTTLE={'EMAIL_LIMIT': 3})
+    def test_email_limit_across_ips(self, api_client, create_user):
+        """Test attempts against one email are limited even from rotating IPs"""
+        create_user(email='victim@example.com')
+
+        for i in range(3):
+            assert login(api_client, ip=f'10.0.0.{i}').status_code == status.HTTP_401_UNAUTHORIZED
+
+        response = login(api_client, email=' Victim@Example.com', ip='10.0.0.99')
+        assert response.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+        assert int(response['Retry-After']) >= 1
+
+        # Other accounts are unaffected
+        assert login(api_client, email='other@example.com', ip='10.0.0.99').status_code == status.HTTP_401_UNAUTHORIZED
+
+    @override_settings(LOGIN_THROTTLE={'IP_LIMIT': 3})
+    def test_ip_limit_across_emails(self, api_client):
+        """Test one client IP cannot spray attempts over many emails"""
+        for i in range(3):
+            assert login(api_client, email=f'user{i}@example.com').status_code == status.HTTP_401_UNAUTHORIZED
+
+        assert login(api_client, email='user9@example.com').status_code == status.HTTP_429_TOO_MANY_REQUESTS
+
+    def test_burst_limit(self, api_client):
+        """Test the in-process bucket rejects a burst from one IP"""
+        statuses = [login(api_client, email=f'user{i}@example.com').status_code for i in range(12)]
+
+        assert statuses[:10] == [status.HTTP_401_UNAUTHORIZED] * 10
+        assert statuses[10:] == [status.HTTP_429_TOO_MANY_REQUESTS] * 2
+
+    @override_settings(LOGIN_THROTTLE={'EMAIL_LIMIT': 1})
+    def test_rejects_before_lookup_and_hashing(self, api_client, create_user, django_assert_num_queries):
+        """Test a throttled attempt runs no query and no password check"""
+        create_user(email='victim@example.com')
+        login(api_client)
+
+        with mock.patch('users.hashing.check_password') as check_password:
+            with django_assert_num_queries(0):
+                response = login(api_client)
+
+        assert response.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+        check_password.assert_not_called()
+
+    @override_settings(LOGIN_THROTTLE={'ENABLED': False})
+    def test_disabled(self, api_client):
+        """Test ENABLED = False turns the throttle off"""
+        statuses = {login(api_client).status_code for _ in range(12)}
+
+        assert statuses == {status.HTTP_401_UNAUTHORIZED}
+
+    def test_shared_counters_span_processes(self, api_client):
+        """Test the shared counters still apply after the local buckets reset (another worker)"""
+        with override_settings(LOGIN_THROTTLE={'EMAIL_LIMIT': 2}):
+            for _ in range(2):
+                login(api_client)
+            throttling.clear_local_buckets()
+            assert login(api_client).status_code == status.HTTP_429_TOO_MANY_REQUESTS
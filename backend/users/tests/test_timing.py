@@ -0,0 +1,138 @@
+import logging
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from users.tests.test_async_views import Client as AsyncViewsClient
+
+
+def server_timing(response):
+    """Parse a Server-Timing header into {name: (milliseconds, description)}"""
+    entries = {}
+    for entry in response['Server-Timing'].split(', '):
+        name, *params = entry.split(';')
+        params = dict(param.split('=', 1) for param in params)
+        entries[name] = (float(params['dur']), params.get('desc', '').strip('"'))
+    return entries
+
+
+@pytest.fixture
+def timed_client(api_client, create_user):
+    """Staff API client authenticated with a real JWT, so auth runs on every request"""
+    user = create_user(is_staff=True)
+    api_client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(user).access_token}')
+    return api_client, user
+
+
+@pytest.fixture(autouse=True)
+def sample_every_request(settings):
+    """Time every request unless a test says otherwise"""
+    settings.REQUEST_TIMING = {'SAMPLE_RATE': 1.0}
+
+
+@pytest.fixture
+def timing_logs(caplog):
+    """Capture users.timing records, which do not propagate to the root logger"""
+    logger = logging.getLogger('users.timing')
+    logger.addHandler(caplog.handler)
+    yield caplog
+    logger.removeHandler(caplog.handler)
+
+
+@pytest.mark.django_db
+class TestRequestTiming:
+    """Tests for the request timing middleware"""
+
+    def test_profile_put_phases(self, timed_client):
+        """Test a profile update reports every phase it went through"""
+        client, _ = timed_client
+        response = client.put(reverse('profile'), {'email': 'new@example.com'}, format='json')
+
+        assert response.status_code == status.HTTP_200_OK
+        entries = server_timing(response)
+        assert {'auth', 'validate', 'save', 'serialize', 'render', 'db', 'total'} <= set(entries)
+        assert entries['total'][0] >= entries['validate'][0]
+
+    def test_counts_queries(self, timed_client):
+        """Test the db entry matches the queries the request ran"""
+        client, _ = timed_client
+        with CaptureQueriesContext(connection) as queries:
+            response = client.put(reverse('profile'), {'email': 'new@example.com'}, format='json')
+
+        assert server_timing(response)['db'][1] == f'{len(queries)} queries'
+
+    def test_login_reports_hashing_only_in_logs(self, api_client, create_user, timing_logs):
+        """Test password verification is logged as its own phase but never sent to the anonymous client"""
+        create_user(email='login@example.com')
+        response = api_client.post(reverse('login'), {
+            'email': 'login@example.com', 'password': 'TestPass123!'
+        }, format='json')
+
+        assert response.status_code == status.HTTP_200_OK
+        assert 'Server-Timing' not in response
+        [record] = timing_logs.records
+        assert record.hash_ms > 0
+
+    def test_header_for_staff_only(self, api_client, create_user):
+        """Test an authenticated non-staff user gets no Server-Timing header"""
+        user = create_user()
+        api_client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(user).access_token}')
+
+        response = api_client.get(reverse('profile'))
+
+        assert response.status_code == status.HTTP_200_OK
+        assert 'Server-Timing' not in response
+
+    def test_structured_log(self, timed_client, timing_logs):
+        """Test each timed request logs one record with its metrics as attributes"""
+        client, _ = timed_client
+        client.get(reverse('profile'))
+
+        [record] = timing_logs.records
+        assert record.path == reverse('profile') and record.method == 'GET' and record.status == 200
+        assert record.db_queries >= 0 and record.total_ms > 0
+        assert 'auth_ms=' in record.getMessage()
+
+    def test_disabled(self, settings, timed_client, timing_logs):
+        """Test nothing is added when sampling is off"""
+        settings.REQUEST_TIMING = {'SAMPLE_RATE': 0}
+        client, _ = timed_client
+        response = client.get(reverse('profile'))
+
+        assert 'Server-Timing' not in response
+        assert not timing_logs.records
+
+    def test_other_paths_not_timed(self, settings, timed_client):
+        """Test only requests under PATH_PREFIX are timed"""
+        settings.REQUEST_TIMING = {'SAMPLE_RATE': 1.0, 'PATH_PREFIX': '/api/other/'}
+        client, _ = timed_client
+        assert 'Server-Timing' not in client.get(reverse('profile'))
+
+    def test_log_only(self, settings, timed_client, timing_logs):
+        """Test the header can be switched off while still logging"""
+        settings.REQUEST_TIMING = {'SAMPLE_RATE': 1.0, 'HEADER': False}
+        client, _ = timed_client
+        response = client.get(reverse('profile'))
+
+        assert 'Server-Timing' not in response
+        assert len(timing_logs.records) == 1
+
+
+@pytest.mark.django_db
+@pytest.mark.urls('users.tests.test_async_views')
+class TestAsyncRequestTiming:
+    """Tests for request timing on the async views"""
+
+    def test_profile_put_phases(self, create_user):
+        """Test the async profile update reports its phases, including queries from the async ORM"""
+        user = create_user(is_staff=True)
+        response = AsyncViewsClient(user).put('profile', {'email': 'new@example.com'})
+
+        assert response.status_code == status.HTTP_200_OK
+        entries = server_timing(response)
+        assert {'auth', 'validate', 'save', 'serialize', 'render', 'db', 'total'} <= set(entries)
+        assert entries['db'][1] != '0 queries'
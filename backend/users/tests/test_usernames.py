@@ -0,0 +1,132 @@
+import pytest
+from unittest import mock
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+
+from users import usernames
+from users.usernames import highest_username_suffix, next_free_username
+
+User = get_user_model()
+
+
+def make_users(*usernames_):
+    """Insert users with hand-set usernames without paying for password hashing"""
+    User.objects.bulk_create([
+        User(email=f'{username}@other.example.com', username=username, password='!')
+        for username in usernames_
+    ])
+
+
+def allocate(base, *suffixes):
+    """Insert users as registration would have allocated ``base`` + each suffix"""
+    users = []
+    for suffix in suffixes:
+        user = User(email=f'{base}{suffix}@other.example.com', password='!')
+        usernames.assign_username(user, base, suffix)
+        users.append(user)
+    User.objects.bulk_create(users)
+
+
+@pytest.mark.django_db
+class TestUsernameAllocation:
+    """Tests for username allocation on registration"""
+
+    def test_free_base_is_used_as_is(self):
+        """Test the email local part is used when nobody has it"""
+        assert next_free_username('john') == 'john'
+
+    def test_next_suffix_after_highest(self):
+        """Test allocation continues after the highest numeric suffix"""
+        allocate('john', 0, 1, 2, 10)
+
+        assert highest_username_suffix('john') == 10
+        assert next_free_username('john') == 'john11'
+
+    def test_neighbouring_usernames_ignored(self):
+        """Test usernames that merely share the prefix are not counted"""
+        make_users('john.doe', 'john5x', 'john007')
+        allocate('johnny', 0, 1)
+
+        assert next_free_username('john') == 'john'
+
+    def test_single_query(self, django_assert_num_queries):
+        """Test allocation costs one query regardless of how many suffixes exist"""
+        allocate('info', *range(20))
+
+        with django_assert_num_queries(1):
+            assert next_free_username('info') == 'info20'
+
+    def test_lookup_is_one_index_seek(self):
+        """Test the highest suffix is read from the stem/suffix index without sorting"""
+        query = usernames._highest_username_query('info')[:1]
+        sql, params = query.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+            plan = ' '.join(row[-1] for row in cursor.fetchall())
+
+        assert 'users_user_username_seq_idx' in plan
+        assert 'TEMP B-TREE' not in plan
+
+    def test_create_user_retries_on_collision(self):
+        """Test a username taken concurrently is retried with a fresh suffix"""
+        allocate('john', 0)
+        real_highest = usernames.highest_username_suffix
+        calls = []
+
+        def stale_then_real(base):
+            calls.append(base)
+            # First attempt behaves as if the concurrent insert was not yet visible
+            return -1 if len(calls) == 1 else real_highest(base)
+
+        with mock.patch.object(usernames, 'highest_username_suffix', side_effect=stale_then_real):
+            user = usernames.create_user(email='john@example.com', password='TestPass123!')
+
+        assert len(calls) == 2
+        assert (user.username, user.username_stem, user.username_suffix) == ('john1', 'john', 1)
+        assert user.check_password('TestPass123!')
+
+    def test_create_user_skips_hand_set_usernames(self):
+        """Test usernames set by hand, which the suffix lookup cannot see, are stepped over"""
+        make_users('john', 'john1')
+
+        user = usernames.create_user(email='john@example.com', password='TestPass123!')
+
+        assert user.username == 'john2'
+
+    def test_create_user_duplicate_email_not_retried(self):
+        """Test a failing email constraint is raised rather than retried"""
+        from django.db import IntegrityError
+        User.objects.create(email='taken@example.com', username='someone', password='!')
+
+        with pytest.raises(IntegrityError):
+            usernames.create_user(email='taken@example.com', password='TestPass123!')
+
+
+
+@pytest.mark.django_db(transaction=True)
+class TestUsernameSuffixMigration:
+    """Tests for migration 0013, which records the stem and suffix of existing usernames"""
+
+    def migrate(self, target):
+        executor = MigrationExecutor(connection)
+        executor.migrate([('users', target)])
+        executor.loader.build_graph()
+        return executor.loader.project_state([('users', target)]).apps
+
+    def test_backfill(self):
+        """Test allocated usernames get their stem and suffix and hand-set ones are left out"""
+        apps = self.migrate('0012_lastseen')
+        try:
+            OldUser = apps.get_model('users', 'User')
+            for email, username in [('john@a.example.com', 'john'), ('john@b.example.com', 'john12'),
+                                    ('jane@example.com', 'admin'), ('bob2@example.com', 'bob21')]:
+                OldUser.objects.create(email=email, username=username)
+
+            self.migrate('0013_username_suffix')
+
+            rows = User.objects.order_by('pk').values_list('username_stem', 'username_suffix')
+            assert list(rows) == [('john', 0), ('john', 12), (None, None), ('bob2', 1)]
+            assert highest_username_suffix('john') == 12
+        finally:
+            self.migrate(MigrationExecutor(connection).loader.graph.leaf_nodes('users')[0][1])
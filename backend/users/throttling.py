@@ -0,0 +1,172 @@
+"""
+Brute-force throttling for the login endpoint.
+
+Every login attempt costs a user lookup and a full PBKDF2 verification, so
+a credential-stuffing burst turns straight into CPU load. LoginThrottle
+rejects excess attempts before any of that runs, in two layers:
+
+1. An in-process token bucket per client IP absorbs bursts without a cache
+   round trip.
+2. Sliding-window counters per client IP and per email in the shared cache
+   enforce the limits across every web worker, so an attacker gains nothing
+   from spreading attempts over processes or rotating IPs against one
+   account.
+
+Rejected attempts get 429 with Retry-After. Configured through the
+LOGIN_THROTTLE setting.
+"""
+import hashlib
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.throttling import BaseThrottle
+
+from .cache import LRUCache
+
+DEFAULTS = {
+    'ENABLED': True,
+    'CACHE_ALIAS': 'default',
+    'BURST': 10,                # attempts a client IP may make back to back
+    'REFILL_PER_SECOND': 0.5,   # bucket refill rate after a burst
+    'LOCAL_KEYS': 10000,        # client IPs tracked per process
+    'WINDOW': 300,              # sliding window length in seconds
+    'IP_LIMIT': 100,            # attempts per client IP per window
+    'EMAIL_LIMIT': 10,          # attempts per email per window
+}
+
+
+def get_setting(name):
+    """Read a LOGIN_THROTTLE setting, falling back to the module defaults"""
+    return getattr(settings, 'LOGIN_THROTTLE', {}).get(name, DEFAULTS[name])
+
+
+class TokenBucket:
+    """Per-key token buckets held in a bounded in-process LRU"""
+
+    def __init__(self, capacity, refill_per_second, maxsize):
+        self.capacity = capacity
+        self.refill_per_second = refill_per_second
+        self._buckets = LRUCache(maxsize)
+        self._lock = threading.Lock()
+
+    def take(self, key, now=None):
+        """
+        Take one token for ``key``. Returns 0 on success, otherwise the
+        seconds until a token is available.
+        """
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            tokens, updated = self._buckets.get(key) or (self.capacity, now)
+            tokens = min(self.capacity, tokens + (now - updated) * self.refill_per_second)
+            if tokens >= 1:
+                self._buckets.set(key, (tokens - 1, now))
+                return 0
+            self._buckets.set(key, (tokens, now))
+        if self.refill_per_second <= 0:
+            return float('inf')
+        return (1 - tokens) / self.refill_per_second
+
+    def clear(self):
+        self._buckets.clear()
+
+
+_buckets = TokenBucket(get_setting('BURST'), get_setting('REFILL_PER_SECOND'), get_setting('LOCAL_KEYS'))
+
+
+def clear_local_buckets():
+    """Reset the in-process token buckets (used by tests)"""
+    _buckets.clear()
+
+
+def _window_keys(kind, ident, now, window):
+    """Cache keys of the current and previous window plus the previous window's weight"""
+    index, offset = divmod(now, window)
+    index = int(index)
+    digest = hashlib.sha256(ident.encode()).hexdigest()[:32]
+    return (
+        f'users:login:{kind}:{digest}:{index}',
+        f'users:login:{kind}:{digest}:{index - 1}',
+        1 - offset / window,
+    )
+
+
+def _normalize_email(email):
+    if not isinstance(email, str) or not email.strip():
+        return None
+    return email.strip().lower()
+
+
+class LoginThrottle(BaseThrottle):
+    """
+    Throttle for LoginView and the async login view. Only reads the client
+    address and the request body, so it never touches the database.
+    """
+
+    def __init__(self):
+        self.cache = caches[get_setting('CACHE_ALIAS')]
+        self.window = get_setting('WINDOW')
+        self.retry_after = None
+
+    def _counters(self, request):
+        """(kind, ident, limit) for each shared counter this attempt counts against"""
+        counters = [('ip', self.get_ident(request), get_setting('IP_LIMIT'))]
+        email = _normalize_email(request.data.get('email'))
+        if email is not None:
+            counters.append(('email', email, get_setting('EMAIL_LIMIT')))
+        return [
+            (*_window_keys(kind, ident, time.time(), self.window), limit)
+            for kind, ident, limit in counters
+        ]
+
+    def _local_check(self, request):
+        wait = _buckets.take(self.get_ident(request))
+        if wait:
+            self.retry_after = wait
+            return False
+        return True
+
+    def _shared_check(self, counters, counts):
+        for current, previous, weight, limit in counters:
+            if counts.get(previous, 0) * weight + counts.get(current, 0) >= limit:
+                # Retry once the current window closes and its count starts to decay
+                self.retry_after = max(1, self.window * weight)
+                return False
+        return True
+
+    def allow_request(self, request, view):
+        if not get_setting('ENABLED'):
+            return True
+        if not self._local_check(request):
+            return False
+
+        counters = self._counters(request)
+        counts = self.cache.get_many([key for c in counters for key in c[:2]])
+        if not self._shared_check(counters, counts):
+            return False
+
+        for current, _, _, _ in counters:
+            if not self.cache.add(current, 1, timeout=self.window * 2):
+                self.cache.incr(current)
+        return True
+
+    async def aallow_request(self, request):
+        """Async variant of allow_request() for users/async_views.py"""
+        if not get_setting('ENABLED'):
+            return True
+        if not self._local_check(request):
+            return False
+
+        counters = self._counters(request)
+        counts = await self.cache.aget_many([key for c in counters for key in c[:2]])
+        if not self._shared_check(counters, counts):
+            return False
+
+        for current, _, _, _ in counters:
+            if not await self.cache.aadd(current, 1, timeout=self.window * 2):
+                await self.cache.aincr(current)
+        return True
+
+    def wait(self):
+        return self.retry_after
@@ -0,0 +1,206 @@
+"""
+Per-request performance instrumentation for the users API.
+
+RequestTimingMiddleware samples a share of requests under PATH_PREFIX and
+gives each sampled request a RequestTimings in a context variable. While
+it is set:
+
+- ``with phase(name):`` blocks add their wall time to that phase
+  (auth, validate, save, hash, serialize and render are marked in the
+  users code)
+- every database query, on any connection, adds to the db count and time
+
+The totals go out in one structured log record per request on the
+``users.timing`` logger and, for staff users only, in a ``Server-Timing``
+response header: anyone else, including anonymous login and registration
+requests, would get a timing oracle for password checks and account
+existence from it.
+Phases nest: db time is also counted inside validate and save, and hash
+inside validate for password checks.
+
+Unsampled requests never create a RequestTimings, so phase() and the
+query hook reduce to one context variable lookup each. Configured through
+the REQUEST_TIMING setting; SAMPLE_RATE = 0 turns it off.
+"""
+import logging
+import random
+import time
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+from django.http import JsonResponse
+from rest_framework.renderers import JSONRenderer
+
+DEFAULTS = {
+    'SAMPLE_RATE': 0.0,         # share of requests timed, 0.0 - 1.0
+    'PATH_PREFIX': '/api/auth/',
+    'HEADER': True,             # send Server-Timing on sampled responses to staff users
+    'LOG': True,                # log one users.timing record per sampled request
+}
+
+logger = logging.getLogger('users.timing')
+
+_current = ContextVar('users_request_timings', default=None)
+
+
+def get_setting(name):
+    """Read a REQUEST_TIMING setting, falling back to the module defaults"""
+    return getattr(settings, 'REQUEST_TIMING', {}).get(name, DEFAULTS[name])
+
+
+class RequestTimings:
+    """Accumulated seconds and call counts per phase for one request"""
+
+    __slots__ = ('started', 'durations', 'counts')
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.durations = {}
+        self.counts = {}
+
+    def add(self, name, seconds):
+        self.durations[name] = self.durations.get(name, 0.0) + seconds
+        self.counts[name] = self.counts.get(name, 0) + 1
+
+    def finish(self):
+        self.durations['total'] = time.perf_counter() - self.started
+        self.counts['total'] = 1
+
+    def header(self):
+        """Server-Timing header value, durations in milliseconds"""
+        entries = []
+        for name, seconds in self.durations.items():
+            entry = f'{name};dur={seconds * 1000:.2f}'
+            if name == 'db':
+                entry += f';desc="{self.counts[name]} queries"'
+            entries.append(entry)
+        return ', '.join(entries)
+
+    def as_dict(self):
+        """Flat metrics for logging: ``<phase>_ms`` for each phase plus ``db_queries``"""
+        metrics = {f'{name}_ms': round(seconds * 1000, 3) for name, seconds in self.durations.items()}
+        metrics['db_queries'] = self.counts.get('db', 0)
+        return metrics
+
+
+class phase:
+    """
+    Context manager adding the wall time of its block to ``name`` on the
+    current request. A no-op when the request is not being timed.
+    """
+
+    __slots__ = ('name', 'timings', 'started')
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.timings = _current.get()
+        if self.timings is not None:
+            self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        if self.timings is not None:
+            self.timings.add(self.name, time.perf_counter() - self.started)
+
+
+def _record_query(execute, sql, params, many, context):
+    timings = _current.get()
+    if timings is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timings.add('db', time.perf_counter() - started)
+
+
+@receiver(connection_created)
+def install_query_hook(sender, connection, **kwargs):
+    """
+    Count queries on every connection. Installed per connection rather than
+    per request so queries made from sync_to_async threads (async views) are
+    attributed through the copied context as well.
+    """
+    if _record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_record_query)
+
+
+class TimedJSONRenderer(JSONRenderer):
+    """JSONRenderer that reports its work as the render phase"""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        with phase('render'):
+            return super().render(data, accepted_media_type, renderer_context)
+
+
+class TimedJsonResponse(JsonResponse):
+    """JsonResponse whose encoding is reported as the render phase, for the async views"""
+
+    def __init__(self, *args, **kwargs):
+        with phase('render'):
+            super().__init__(*args, **kwargs)
+
+
+def _is_staff(request):
+    # Set by DRF (or the async views) once the view has authenticated the request
+    user = getattr(request, 'user', None)
+    return user is not None and user.is_authenticated and user.is_staff
+
+
+class RequestTimingMiddleware:
+    """Time sampled users API requests; see the module docstring"""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        if not self._sampled(request):
+            return self.get_response(request)
+        token = _current.set(RequestTimings())
+        try:
+            response = self.get_response(request)
+            self._report(request, response, _current.get())
+            return response
+        finally:
+            _current.reset(token)
+
+    async def __acall__(self, request):
+        if not self._sampled(request):
+            return await self.get_response(request)
+        token = _current.set(RequestTimings())
+        try:
+            response = await self.get_response(request)
+            self._report(request, response, _current.get())
+            return response
+        finally:
+            _current.reset(token)
+
+    def _sampled(self, request):
+        rate = get_setting('SAMPLE_RATE')
+        return rate > 0 and request.path.startswith(get_setting('PATH_PREFIX')) and random.random() < rate
+
+    def _report(self, request, response, timings):
+        timings.finish()
+        if get_setting('HEADER') and _is_staff(request):
+            response['Server-Timing'] = timings.header()
+        if get_setting('LOG'):
+            metrics = timings.as_dict()
+            logger.info(
+                'request_timing method=%s path=%s status=%s %s',
+                request.method, request.path, response.status_code,
+                ' '.join(f'{key}={value}' for key, value in metrics.items()),
+                extra={'method': request.method, 'path': request.path, 'status': response.status_code, **metrics},
+            )
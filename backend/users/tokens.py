@@ -0,0 +1,75 @@
+"""
+Refresh token classes that consult the blacklist Bloom filter
+(users/blacklist.py) before querying the blacklist table, plus async-safe
+counterparts of the simplejwt token operations that touch the database
+(outstanding-token inserts and blacklist reads/writes) for the views in
+users/async_views.py.
+"""
+from django.contrib.auth import get_user_model
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from rest_framework_simplejwt.tokens import BlacklistMixin, RefreshToken
+from rest_framework_simplejwt.utils import datetime_from_epoch
+
+from . import blacklist
+
+User = get_user_model()
+
+
+class FilteredRefreshToken(RefreshToken):
+    """RefreshToken that only queries the blacklist table when the Bloom filter reports a possible match"""
+
+    def check_blacklist(self):
+        if blacklist.might_be_blacklisted(self.payload[api_settings.JTI_CLAIM]):
+            super().check_blacklist()
+
+
+class AsyncRefreshToken(RefreshToken):
+    """
+    RefreshToken whose constructor verifies signature and expiry but leaves
+    the blacklist lookup to ``acheck_blacklist()``.
+    """
+
+    def check_blacklist(self):
+        pass
+
+    async def acheck_blacklist(self):
+        jti = self.payload[api_settings.JTI_CLAIM]
+        if not await blacklist.amight_be_blacklisted(jti):
+            return
+        if await BlacklistedToken.objects.filter(token__jti=jti).aexists():
+            raise TokenError(_("Token is blacklisted"))
+
+    async def ablacklist(self):
+        """Async variant of ``blacklist()``"""
+        jti = self.payload[api_settings.JTI_CLAIM]
+        user_id = self.payload.get(api_settings.USER_ID_CLAIM)
+        user = await User.objects.filter(**{api_settings.USER_ID_FIELD: user_id}).afirst()
+
+        token, _ = await OutstandingToken.objects.aget_or_create(
+            jti=jti,
+            defaults={
+                "user": user,
+                "created_at": self.current_time,
+                "token": str(self),
+                "expires_at": datetime_from_epoch(self.payload["exp"]),
+            },
+        )
+        return await BlacklistedToken.objects.aget_or_create(token=token)
+
+
+async def arefresh_for_user(user):
+    """Async variant of ``RefreshToken.for_user()``"""
+    # Build the token without BlacklistMixin.for_user's synchronous insert...
+    token = super(BlacklistMixin, RefreshToken).for_user(user)
+    # ...and record it as outstanding through the async ORM instead
+    await OutstandingToken.objects.acreate(
+        user=user,
+        jti=token[api_settings.JTI_CLAIM],
+        token=str(token),
+        created_at=token.current_time,
+        expires_at=datetime_from_epoch(token["exp"]),
+    )
+    return token
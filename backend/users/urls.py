@@ -1,4 +1,4 @@
-from django.urls import path
+from django.urls import path, re_path
 from rest_framework_simplejwt.views import TokenRefreshView
 from . import views
 
@@ -13,6 +13,16 @@ urlpatterns = [
     
     # Profile endpoints
     path('profile/', views.profile_view, name='profile'),
+    path('profile/batch/', views.profile_batch_view, name='profile_batch'),
     path('change-password/', views.change_password_view, name='change_password'),
     path('delete-account/', views.delete_account_view, name='delete_account'),
+    
+    # Directory search
+    path('directory/', views.directory_view, name='directory'),
+    
+    # Online presence
+    path('presence/', views.presence_view, name='presence'),
+    
+    # Staff-only streaming export
+    re_path(r'^users/export\.(?P<export_format>csv|ndjson)$', views.export_users_view, name='export_users'),
 ]
@@ -0,0 +1,125 @@
+"""
+Username allocation for new accounts.
+
+Usernames are derived from the email local part (``john@example.com`` ->
+``john``, ``john1``, ``john2``...). Every allocated username records its
+stem and numeric suffix in ``username_stem``/``username_suffix``, so the
+next free suffix is one seek of users_user_username_seq_idx instead of
+probing candidates one by one or sorting every ``johnN`` row. The partial
+unique constraint on ``User.username`` turns a concurrent allocation of the
+same name, or a collision with a username set by hand, into an
+IntegrityError that is retried with a higher suffix.
+"""
+from django.contrib.auth import get_user_model
+from django.db import IntegrityError, transaction
+
+from . import hashing
+
+User = get_user_model()
+
+MAX_ATTEMPTS = 5
+
+
+def username_base(email):
+    """Return the username stem for an email address"""
+    return User.normalize_username(email.split('@')[0])
+
+
+def highest_username_suffix(base):
+    """
+    Return the highest numeric suffix allocated for ``base``: -1 if none,
+    0 if only ``base`` itself, N if ``baseN`` is the highest.
+    """
+    return _parse_suffix(_highest_username_query(base).first())
+
+
+async def ahighest_username_suffix(base):
+    """Async variant of highest_username_suffix()"""
+    return _parse_suffix(await _highest_username_query(base).afirst())
+
+
+def _highest_username_query(base):
+    return (
+        User.objects.filter(username_stem=base)
+        .order_by('-username_suffix')
+        .values_list('username_suffix', flat=True)
+    )
+
+
+def _parse_suffix(highest):
+    return -1 if highest is None else highest
+
+
+def next_free_username(base):
+    """Return the next unused username for ``base``"""
+    return _with_suffix(base, highest_username_suffix(base) + 1)
+
+
+async def anext_free_username(base):
+    """Async variant of next_free_username()"""
+    return _with_suffix(base, await ahighest_username_suffix(base) + 1)
+
+
+def _with_suffix(base, suffix):
+    return base if suffix == 0 else f'{base}{suffix}'
+
+
+def assign_username(user, base, suffix):
+    """Give ``user`` the username ``base`` + ``suffix`` and record how it was built"""
+    user.username = _with_suffix(base, suffix)
+    user.username_stem = base
+    user.username_suffix = suffix
+
+
+def retry_suffix(taken, next_suffix):
+    """
+    Suffix to try after suffix ``taken`` collided: the next free one, or one
+    past the collision when the taken name was set by hand (and so is
+    invisible to the suffix lookup).
+    """
+    return max(next_suffix, taken + 1)
+
+
+def create_user(email, password, **extra_fields):
+    """
+    Create a user with an auto-allocated username, retrying when a concurrent
+    registration claims the same username first.
+    """
+    email = User.objects.normalize_email(email)
+    user = User(email=email, **extra_fields)
+    hashing.set_password(user, password)
+    base = username_base(email)
+
+    assign_username(user, base, highest_username_suffix(base) + 1)
+    for _ in range(MAX_ATTEMPTS):
+        try:
+            with transaction.atomic():
+                user.save()
+            return user
+        except IntegrityError:
+            if not User.objects.filter(username=user.username).exists():
+                raise  # another constraint failed (e.g. duplicate email)
+            assign_username(user, base, retry_suffix(user.username_suffix, highest_username_suffix(base) + 1))
+    raise IntegrityError(f'Could not allocate a unique username for "{base}"')
+
+
+async def acreate_user(email, password, **extra_fields):
+    """
+    Async variant of create_user(). Runs in autocommit, so a failed insert
+    needs no savepoint to be retried.
+    """
+    email = User.objects.normalize_email(email)
+    user = User(email=email, **extra_fields)
+    await hashing.aset_password(user, password)
+    base = username_base(email)
+
+    assign_username(user, base, await ahighest_username_suffix(base) + 1)
+    for _ in range(MAX_ATTEMPTS):
+        try:
+            await user.asave(force_insert=True)
+            return user
+        except IntegrityError:
+            if not await User.objects.filter(username=user.username).aexists():
+                raise
+            assign_username(user, base, retry_suffix(user.username_suffix, await ahighest_username_suffix(base) + 1))
+    raise IntegrityError(f'Could not allocate a unique username for "{base}"')
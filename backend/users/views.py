@@ -1,21 +1,70 @@
-from rest_framework import status, generics
+import hashlib
+
+from rest_framework import serializers, status, generics
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
-from rest_framework.permissions import IsAuthenticated, AllowAny
+from rest_framework.permissions import IsAdminUser, IsAuthenticated, AllowAny
 from rest_framework_simplejwt.tokens import RefreshToken
 from rest_framework_simplejwt.views import TokenObtainPairView
 from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.utils.http import parse_etags, quote_etag
+
+from . import deletion, directory, export, hashing, presence, routers
+from .cache import user_version_for
+from .throttling import LoginThrottle
+from .timing import phase
+from .tokens import FilteredRefreshToken
 
 from .serializers import (
-    UserSerializer, 
+    FastUserSerializer,
+    parse_profile_fields,
     UserRegistrationSerializer, 
     UserProfileUpdateSerializer,
-    ChangePasswordSerializer
+    ChangePasswordSerializer,
+    DirectorySearchSerializer,
+    DirectoryUserSerializer,
+    PresenceQuerySerializer,
+    UserExportSerializer
 )
 
 User = get_user_model()
 
 
+def profile_etag(user, fields=None):
+    """
+    Strong ETag for a user's profile payload, derived from its cache version.
+    Sparse payloads (``fields``) get their own tag per field set.
+    """
+    etag = f'{user.pk}-{user_version_for(user)}'
+    if fields is not None:
+        etag += '-' + hashlib.blake2b(','.join(fields).encode(), digest_size=4).hexdigest()
+    return quote_etag(etag)
+
+
+def requested_profile_fields(query_params):
+    """
+    Field names selected by the ``fields`` query parameter, or None for the
+    full payload. Raises ValidationError for unknown names.
+    """
+    value = query_params.get('fields')
+    return None if value is None else parse_profile_fields(value)
+
+
+def etag_matches(request, etag):
+    """True when the request's If-None-Match already names ``etag``"""
+    client_etags = parse_etags(request.headers.get('If-None-Match', ''))
+    return etag in client_etags or '*' in client_etags
+
+
+def with_profile_etag(response, etag):
+    """Attach validators so clients (and browser caches) revalidate with If-None-Match"""
+    response['ETag'] = etag
+    response['Cache-Control'] = 'private, no-cache'
+    response['Vary'] = 'Authorization'
+    return response
+
+
 class RegisterView(generics.CreateAPIView):
     """
     POST /api/auth/register/
@@ -34,7 +83,7 @@ class RegisterView(generics.CreateAPIView):
         refresh = RefreshToken.for_user(user)
         
         return Response({
-            'user': UserSerializer(user).data,
+            'user': FastUserSerializer(user).data,
             'access': str(refresh.access_token),
             'refresh': str(refresh),
             'message': 'User registered successfully'
@@ -47,6 +96,8 @@ class LoginView(TokenObtainPairView):
     Login with email and password, returns JWT tokens
     """
     permission_classes = [AllowAny]
+    # Runs in initial(), before the user lookup and password check below
+    throttle_classes = [LoginThrottle]
     
     def post(self, request, *args, **kwargs):
         # Get email and password from request
@@ -58,16 +109,16 @@ class LoginView(TokenObtainPairView):
                 'error': 'Please provide both email and password'
             }, status=status.HTTP_400_BAD_REQUEST)
         
-        # Find user by email
+        # Find user by email (on a replica unless this address just registered or changed)
         try:
-            user = User.objects.get(email=email)
+            user = User.objects.using(routers.read_alias(email=email)).get(email=email)
         except User.DoesNotExist:
             return Response({
                 'error': 'Invalid credentials'
             }, status=status.HTTP_401_UNAUTHORIZED)
         
-        # Check password
-        if not user.check_password(password):
+        # Check password (hashed off the request thread)
+        if not hashing.check_password(user, password):
             return Response({
                 'error': 'Invalid credentials'
             }, status=status.HTTP_401_UNAUTHORIZED)
@@ -82,7 +133,7 @@ class LoginView(TokenObtainPairView):
         refresh = RefreshToken.for_user(user)
         
         return Response({
-            'user': UserSerializer(user).data,
+            'user': FastUserSerializer(user).data,
             'access': str(refresh.access_token),
             'refresh': str(refresh),
             'message': 'Login successful'
@@ -99,7 +150,7 @@ def logout_view(request):
     try:
         refresh_token = request.data.get('refresh')
         if refresh_token:
-            token = RefreshToken(refresh_token)
+            token = FilteredRefreshToken(refresh_token)
             token.blacklist()
         return Response({
             'message': 'Logout successful'
@@ -110,35 +161,94 @@ def logout_view(request):
         }, status=status.HTTP_400_BAD_REQUEST)
 
 
+@routers.read_replica
 @api_view(['GET', 'PUT'])
 @permission_classes([IsAuthenticated])
 def profile_view(request):
     """
-    GET /api/auth/profile/ - Get user profile
+    GET /api/auth/profile/ - Get user profile (?fields=theme,email for a subset)
     PUT /api/auth/profile/ - Update user profile
     """
     user = request.user
     
     if request.method == 'GET':
-        serializer = UserSerializer(user)
-        return Response({
+        try:
+            fields = requested_profile_fields(request.query_params)
+        except serializers.ValidationError as e:
+            return Response({
+                'error': 'Invalid data',
+                'details': {'fields': e.detail}
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        # Answer revalidations before doing any serialization work
+        etag = profile_etag(user, fields)
+        if etag_matches(request, etag):
+            return with_profile_etag(Response(status=status.HTTP_304_NOT_MODIFIED), etag)
+        
+        serializer = FastUserSerializer(user, fields)
+        return with_profile_etag(Response({
             'user': serializer.data
-        }, status=status.HTTP_200_OK)
+        }, status=status.HTTP_200_OK), etag)
     
     elif request.method == 'PUT':
         serializer = UserProfileUpdateSerializer(user, data=request.data, partial=True)
         if serializer.is_valid():
             serializer.save()
-            return Response({
-                'user': UserSerializer(user).data,
+            return with_profile_etag(Response({
+                'user': FastUserSerializer(user).data,
                 'message': 'Profile updated successfully'
-            }, status=status.HTTP_200_OK)
+            }, status=status.HTTP_200_OK), profile_etag(user))
         return Response({
             'error': 'Invalid data',
             'details': serializer.errors
         }, status=status.HTTP_400_BAD_REQUEST)
 
 
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def profile_batch_view(request):
+    """
+    POST /api/auth/profile/batch/
+    Apply an ordered list of profile patches in one transaction and one write
+    """
+    user = request.user
+    patches = request.data.get('patches') if hasattr(request.data, 'get') else None
+    
+    if not isinstance(patches, list) or not all(isinstance(patch, dict) for patch in patches):
+        return Response({
+            'error': 'Invalid data',
+            'details': {'patches': ['Provide "patches" as a list of objects of profile fields.']}
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    with transaction.atomic():
+        # Each patch is validated against the profile as the earlier ones left
+        # it, so an invalid value is reported even if a later patch replaces it
+        changed = set()
+        errors = []
+        for patch in patches:
+            serializer = UserProfileUpdateSerializer(user, data=patch, partial=True)
+            if serializer.is_valid():
+                changed.update(serializer.apply())
+                errors.append({})
+            else:
+                errors.append(serializer.errors)
+        
+        if any(errors):
+            return Response({
+                'error': 'Invalid data',
+                'details': {'patches': errors}
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        if changed:
+            with phase('save'):
+                user.save(update_fields=User.storage_fields(changed))
+    
+    return with_profile_etag(Response({
+        'user': FastUserSerializer(user).data,
+        'message': 'Profile updated successfully'
+    }, status=status.HTTP_200_OK), profile_etag(user))
+
+
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def change_password_view(request):
@@ -176,14 +286,80 @@ def delete_account_view(request):
             'error': 'Password is required to delete account'
         }, status=status.HTTP_400_BAD_REQUEST)
     
-    if not user.check_password(password):
+    if not hashing.check_password(user, password):
         return Response({
             'error': 'Incorrect password'
         }, status=status.HTTP_401_UNAUTHORIZED)
     
-    # Delete the user
-    user.delete()
+    # Deactivate and revoke tokens now; the rows are purged in the background
+    deletion.deactivate_account(user)
     
     return Response({
         'message': 'Account deleted successfully'
     }, status=status.HTTP_200_OK)
+
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def export_users_view(request, export_format):
+    """
+    GET /api/auth/users/export.csv
+    GET /api/auth/users/export.ndjson
+    Stream every user (staff only); ?fields= and filters as query parameters
+    """
+    serializer = UserExportSerializer(data=request.query_params.dict())
+    if not serializer.is_valid():
+        return Response({
+            'error': 'Invalid data',
+            'details': serializer.errors
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    filters = dict(serializer.validated_data)
+    fields = filters.pop('fields', None)
+    # A read-only scan of the whole table: served by a replica when there is one
+    users = User.objects.using(routers.read_alias(user_id=request.user.pk))
+    return export.export_response(export.filter_users(users, **filters), export_format, fields)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def directory_view(request):
+    """
+    GET /api/auth/directory/?q=<words>
+    Search users who made their profile searchable; ?limit= and ?cursor= page the results
+    """
+    serializer = DirectorySearchSerializer(data=request.query_params)
+    if not serializer.is_valid():
+        return Response({
+            'error': 'Invalid data',
+            'details': serializer.errors
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    params = serializer.validated_data
+    users, next_cursor = directory.search(
+        params['q'], params.get('cursor'), params['limit'], using=routers.read_alias(user_id=request.user.pk),
+    )
+    return Response({
+        'results': DirectoryUserSerializer(users, many=True).data,
+        'next_cursor': next_cursor,
+    }, status=status.HTTP_200_OK)
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def presence_view(request):
+    """
+    POST /api/auth/presence/
+    Which of the given users are online; users who hide their status never are
+    """
+    serializer = PresenceQuerySerializer(data=request.data)
+    if not serializer.is_valid():
+        return Response({
+            'error': 'Invalid data',
+            'details': serializer.errors
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    online = presence.online(serializer.validated_data['ids'])
+    return Response({
+        'online': [{'id': user_id, 'last_seen': seen} for user_id, seen in sorted(online.items())],
+    }, status=status.HTTP_200_OK)
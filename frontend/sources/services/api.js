@@ -8,6 +8,7 @@ export const API_CONFIG = {
         REGISTER: '/auth/register/',
         LOGOUT: '/auth/logout/',
         PROFILE: '/auth/profile/',
+        PROFILE_BATCH: '/auth/profile/batch/',
         CHANGE_PASSWORD: '/auth/change-password/',
         DELETE_ACCOUNT: '/auth/delete-account/',
         TOKEN_REFRESH: '/auth/token/refresh/',
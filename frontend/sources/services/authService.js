@@ -238,14 +238,26 @@ class AuthService {
 
     /**
      * Get user profile from server
+     * @param {string} [fields] - Field or group names (account, theme, notifications,
+     *   privacy) to fetch only part of the profile; merged into the cached user
      */
-    async getProfile() {
+    async getProfile(fields) {
         try {
-            const response = await apiRequest(API_CONFIG.ENDPOINTS.PROFILE, {
+            const query = fields ? `?fields=${encodeURIComponent(fields)}` : '';
+            const response = await apiRequest(API_CONFIG.ENDPOINTS.PROFILE + query, {
                 method: 'GET'
             });
             
-            this.currentUser = transformUserFromBackend(response.user);
+            const user = transformUserFromBackend(response.user);
+            if (fields) {
+                // Keep the cached values of fields this response did not include
+                const received = Object.fromEntries(
+                    Object.entries(user).filter(([, value]) => value !== undefined)
+                );
+                this.currentUser = { ...(this.getCurrentUser() || {}), ...received };
+            } else {
+                this.currentUser = user;
+            }
             localStorage.setItem('user', JSON.stringify(this.currentUser));
             
             return {
@@ -289,6 +301,34 @@ class AuthService {
         }
     }
 
+    /**
+     * Apply several profile changes in one request; the response carries the
+     * updated profile, so no follow-up getProfile() is needed
+     */
+    async updateProfileBatch(patches) {
+        try {
+            const response = await apiRequest(API_CONFIG.ENDPOINTS.PROFILE_BATCH, {
+                method: 'POST',
+                body: JSON.stringify({ patches: patches.map(transformUserToBackend) })
+            });
+            
+            this.currentUser = transformUserFromBackend(response.user);
+            localStorage.setItem('user', JSON.stringify(this.currentUser));
+            
+            return {
+                success: true,
+                user: this.currentUser,
+                message: response.message
+            };
+        } catch (error) {
+            return {
+                success: false,
+                error: error.message || 'Failed to update profile',
+                details: error.details
+            };
+        }
+    }
+
     /**
      * Change user password
      */
@@ -151,7 +151,7 @@ export default class AccountSettingsView extends JetView{
 		form.showProgress();
 
 		try {
-			const result = await authService.getProfile();
+			const result = await authService.getProfile('account');
 			
 			if (result.success && result.user) {
 				const user = result.user;
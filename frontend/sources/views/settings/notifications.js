@@ -121,7 +121,7 @@ export default class NotificationSettingsView extends JetView{
 		
 		try {
 			// Always fetch fresh data from server to ensure consistency
-			const result = await authService.getProfile();
+			const result = await authService.getProfile('notifications');
 			
 			if (result.success && result.user) {
 				view.setValues(result.user);
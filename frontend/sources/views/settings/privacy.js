@@ -73,7 +73,7 @@ export default class PrivacySettingsView extends JetView{
 		
 		try {
 			// Always fetch fresh data from server to ensure consistency
-			const result = await authService.getProfile();
+			const result = await authService.getProfile('privacy');
 			
 			if (result.success && result.user) {
 				view.setValues(result.user);
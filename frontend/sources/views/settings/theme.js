@@ -3,6 +3,9 @@ import { getThemePreference, setThemePreference, getAccentPreference, setAccentP
 import { sectionHeader } from "../settings";
 import authService from "../../services/authService";
 
+// Changes made within this many milliseconds of each other are saved in one request
+const SAVE_DELAY = 300;
+
 export default class ThemeSettingsView extends JetView{
 	config(){
 		return {
@@ -31,20 +34,10 @@ export default class ThemeSettingsView extends JetView{
 							vertical:false,
 							localId:"theme:mode",
 							on:{
-								onChange: async (value) => {
+								onChange: (value) => {
 									const active = setThemePreference(value);
 									webix.message(`Theme set to ${active}`);
-									try {
-										const result = await authService.updateProfile({ themeMode: value });
-										if (result.success) {
-											// Refresh cache with latest server data
-											await authService.getProfile();
-										} else {
-											webix.message({ type: "error", text: "Failed to save theme preference" });
-										}
-									} catch (err) {
-										console.error("Failed to save theme:", err);
-									}
+									this.queueSave({ themeMode: value });
 								}
 							}
 						},
@@ -61,20 +54,10 @@ export default class ThemeSettingsView extends JetView{
 								{ id:"indigo", value:"Indigo", css:"accent-chip accent-indigo" }
 							],
 							on:{
-								onChange: async (value) => {
+								onChange: (value) => {
 									const active = setAccentPreference(value);
 									webix.message(`Accent set to ${active}`);
-									try {
-										const result = await authService.updateProfile({ accentColor: value });
-										if (result.success) {
-											// Refresh cache with latest server data
-											await authService.getProfile();
-										} else {
-											webix.message({ type: "error", text: "Failed to save accent color" });
-										}
-									} catch (err) {
-										console.error("Failed to save accent:", err);
-									}
+									this.queueSave({ accentColor: value });
 								}
 							}
 						}
@@ -96,20 +79,10 @@ export default class ThemeSettingsView extends JetView{
 								{ id:"workSans", value:"Work Sans" }
 							],
 							on:{
-								onChange: async (value) => {
+								onChange: (value) => {
 									setFontFamily(value);
 									webix.message(`Font family changed`);
-									try {
-										const result = await authService.updateProfile({ fontFamily: value });
-									if (result.success) {
-										// Refresh cache with latest server data
-										await authService.getProfile();
-									} else {
-											webix.message({ type: "error", text: "Failed to save font family" });
-										}
-									} catch (err) {
-										console.error("Failed to save font family:", err);
-									}
+									this.queueSave({ fontFamily: value });
 								}
 							}
 						},
@@ -126,20 +99,10 @@ export default class ThemeSettingsView extends JetView{
 							],
 							vertical:false,
 							on:{
-								onChange: async (value) => {
+								onChange: (value) => {
 									setFontSize(value);
 									webix.message(`Font size set to ${value}`);
-									try {
-										const result = await authService.updateProfile({ fontSize: value });
-										if (result.success) {
-											// Refresh cache with latest server data
-											await authService.getProfile();
-										} else {
-											webix.message({ type: "error", text: "Failed to save font size" });
-										}
-									} catch (err) {
-										console.error("Failed to save font size:", err);
-									}
+									this.queueSave({ fontSize: value });
 								}
 							}
 						}
@@ -161,7 +124,7 @@ export default class ThemeSettingsView extends JetView{
 
 	async init(view){
 		// Flag to prevent saving during initialization
-		let isInitializing = true;
+		this.initializing = true;
 		
 		// Show loading state while fetching fresh data
 		webix.extend(view, webix.ProgressBar);
@@ -169,7 +132,7 @@ export default class ThemeSettingsView extends JetView{
 		
 		try {
 			// Always fetch fresh data from server to ensure consistency
-			const result = await authService.getProfile();
+			const result = await authService.getProfile('theme');
 			
 			if (result.success && result.user) {
 				const user = result.user;
@@ -192,7 +155,7 @@ export default class ThemeSettingsView extends JetView{
 		} finally {
 			view.hideProgress();
 			// Initialization complete
-			isInitializing = false;
+			this.initializing = false;
 		}
 		
 		// Save layout preferences when changed
@@ -200,25 +163,46 @@ export default class ThemeSettingsView extends JetView{
 		layoutCheckboxes.forEach(fieldName => {
 			const field = view.elements[fieldName];
 			if (field) {
-				field.attachEvent("onChange", async (newValue) => {
-					// Skip auto-save during form initialization
-					if (isInitializing) return;
-					
-					const values = view.getValues();
-					try {
-						const result = await authService.updateProfile(values);
-						if (result.success) {
-							// Refresh cache with latest server data after successful save
-							await authService.getProfile();
-						} else {
-							webix.message({ type: "error", text: result.error || "Failed to save settings" });
-						}
-					} catch (err) {
-						console.error("Failed to save layout settings:", err);
-						webix.message({ type: "error", text: "Failed to save settings" });
-					}
+				field.attachEvent("onChange", (newValue) => {
+					this.queueSave({ [fieldName]: newValue });
 				});
 			}
 		});
 	}
+
+	/**
+	 * Queue a profile change; changes queued within SAVE_DELAY ms go to the
+	 * server together as one batch request
+	 */
+	queueSave(patch){
+		// Skip auto-save while the form is filled from the server
+		if (this.initializing) return;
+		
+		this.pendingPatches = (this.pendingPatches || []).concat([patch]);
+		clearTimeout(this.saveTimer);
+		this.saveTimer = setTimeout(() => this.flushSaves(), SAVE_DELAY);
+	}
+
+	async flushSaves(){
+		clearTimeout(this.saveTimer);
+		const patches = this.pendingPatches || [];
+		this.pendingPatches = [];
+		if (!patches.length) return;
+		
+		try {
+			// The response carries the updated profile and refreshes the cache
+			const result = await authService.updateProfileBatch(patches);
+			if (!result.success) {
+				webix.message({ type: "error", text: result.error || "Failed to save settings" });
+			}
+		} catch (err) {
+			console.error("Failed to save theme settings:", err);
+			webix.message({ type: "error", text: "Failed to save settings" });
+		}
+	}
+
+	destroy(){
+		// Save changes still waiting for the delay when leaving the page
+		this.flushSaves();
+	}
 }